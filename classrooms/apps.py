@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ClassroomsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'classrooms'
+
+    def ready(self):
+        from classrooms import signals  # noqa: F401 - registers signal receivers
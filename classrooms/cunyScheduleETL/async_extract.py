@@ -1,4 +1,7 @@
 import os
+import io
+import csv
+import time
 import asyncio
 import aiofiles
 from playwright.async_api import async_playwright
@@ -7,6 +10,12 @@ import uuid
 import logging
 from datetime import datetime
 
+from classrooms.utils import metrics
+from classrooms.cunyScheduleETL.browser_pool import BrowserPool, PageLease
+from classrooms.cunyScheduleETL.checkpoint import MANIFEST_NAME, Manifest
+from classrooms.cunyScheduleETL.scrape_queue import HostRateLimiter, Job, job_name, run_jobs
+from classrooms.cunyScheduleETL.sections import CSV_FIELDS, EXPAND_SCRIPT, MODALITIES, ROWS_SCRIPT, row_entries
+
 # Generate a unique runID and datetime string
 run_id = uuid.uuid4()
 start_time = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -23,33 +32,45 @@ logging.basicConfig(
 )
 
 
-async def setup_browser(playwright):
-    """Launch the browser and return the browser instance & a new page."""
-    logging.info("Launching browser...")
-    browser = await playwright.chromium.launch(
-        headless=True,
-        args=['--disable-blink-features=AutomationControlled']
-    )
-
-    context = await browser.new_context(
-        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-        extra_http_headers={
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Referer': 'https://www.cuny.edu/',
-        },
-        viewport=None
-    )
-
-    page = await context.new_page()
-    page.set_default_timeout(60000)  # 60 seconds timeout
-
-    return browser, context, page  # Return browser & context to keep it open
-
-
-async def get_colleges(playwright, filter=None):
-    """Fetch all college checkboxes and return their details."""
-    browser, context, page = await setup_browser(playwright)
-    await page.goto("https://globalsearch.cuny.edu/CFGlobalSearchTool/search.jsp", wait_until="networkidle")
+WORKERS = 8  # Browser pages searching subjects at the same time
+BROWSERS = 2  # Chromium processes the pages are spread over
+JOBS_PER_CONTEXT = 50  # Jobs before a page's browser context is replaced, to keep memory flat
+REQUESTS_PER_SECOND = 4  # Page loads and form submissions per second to Global Search, across all workers
+SEARCH_URL = "https://globalsearch.cuny.edu/CFGlobalSearchTool/search.jsp"
+MAX_AGE = 24 * 60 * 60  # Seconds before a subject finished by an earlier run is fetched again
+LAUNCH_OPTIONS = {
+    'headless': True,
+    'args': ['--disable-blink-features=AutomationControlled'],
+}
+CONTEXT_OPTIONS = {
+    'user_agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+    'extra_http_headers': {
+        'Accept-Language': 'en-US,en;q=0.9',
+        'Referer': 'https://www.cuny.edu/',
+    },
+    'viewport': None,
+}
+
+
+class Worker(PageLease):
+    """A pooled browser context and page reused for the jobs a worker runs."""
+
+    async def open(self):
+        await super().open()
+        self.college = None  # id of the college the page is searching
+        self.on_results = False  # True on a results page, False on the criteria page
+
+
+async def set_checked(toggle, checkbox, checked=True):
+    """Click ``toggle`` if ``checkbox`` is not already in the wanted state."""
+    if await checkbox.is_checked() != checked:
+        await toggle.click()
+
+
+async def get_colleges(page, limiter):
+    """Fetch all college checkboxes and the current term from the search page."""
+    await limiter.wait(SEARCH_URL)
+    await page.goto(SEARCH_URL, wait_until="networkidle")
     logging.info("Navigated to CUNY Global Search Tool")
 
     checkboxes = page.locator('ul.checkboxes input[type="checkbox"]')
@@ -65,149 +86,181 @@ async def get_colleges(playwright, filter=None):
     # TODO: add option to filter which colleges by seeing which match in filter using regex
     logging.info(f"Colleges: {[college['name'] for college in colleges]}")
 
-    # Select the college
-    college = colleges[0]
-    college_checkbox = page.locator(f'label[for="{college["id"]}"]')
-    await college_checkbox.click()
-
-    term_dropdown = page.get_by_label('Term')
-    term_options = await term_dropdown.locator('option').all()  # fall, summer, spring
+    term_options = await page.get_by_label('Term').locator('option').all()  # fall, summer, spring
     term_months = {1: 3, 2: 3, 3: 3, 4: 3, 5: 3, 6: 2, 7: 2, 8: 2, 9: 1, 10: 1, 11: 1, 12: 1}
     term_option = term_options[term_months[datetime.now().month]]
     value = await term_option.get_attribute('value')
-    await term_dropdown.select_option(value)  # Select current term
     term_name = await term_option.inner_text()
 
     # if term folder not created for current term, create it
     if not os.path.exists(f'schedules/{term_name}'): os.makedirs(f'schedules/{term_name}')
 
-    term = {'dropdown': term_dropdown, 'options': term_options, 'name': term_name, 'value': value}
+    term = {'name': term_name, 'value': value}
 
     return colleges, term
 
 
-async def process_college(playwright, college, term, semaphore, terms_filter=None):
-    """Configure search settings for a specific college."""
-    async with semaphore:
-        browser, context, page = await setup_browser(playwright)
-        await page.goto("https://globalsearch.cuny.edu/CFGlobalSearchTool/search.jsp", wait_until="networkidle")
-        logging.info("Navigated to CUNY Global Search Tool")
-
-        # Select the college and term
-        college_checkbox = page.locator(f'label[for="{college["id"]}"]')
-        await college_checkbox.click()
-        college_name = college['name']
-        term_dropdown, term_options, value, term = term['dropdown'], term['options'], term['value'], term['name']
-        await term_dropdown.select_option(value)  # Select current term
-        next_button = page.get_by_role("button", name="Next")
-        await next_button.click()
-        logging.info(f"{college_name} {term}")
-
-        # Configure search parameters
-        slider = page.locator(".slider").first
-        await slider.click()
-        modalities = ["HyFlex", "Hybrid Synchronous", "In Person", "Hybrid Asynchronous"]
-        for modality in modalities:
-            modality_checkbox = page.get_by_role("listitem").filter(has_text=modality).locator("span")
-            await modality_checkbox.click()
-        logging.info(f"Configured search {college_name} {term}")
-
-        # Loop through all the subjects
-        subject_dropdown = page.get_by_label('Subject')
-        subject_options = await subject_dropdown.locator('option').all()
-        if len(subject_options) == 1:  # Skip if no subjects found
-            logging.info(f"No subjects found for {college_name} {term}.")
-            await page.close()
-
-        for subject_option in subject_options[-2:]:
-            await subject_dropdown.select_option(value=await subject_option.get_attribute('value'))
-            subject = await subject_option.inner_text()
-            logging.info(f"{college_name} {term} {subject}")
-
-            search_button = page.get_by_role("button", name="Search")
-            await search_button.click()
-            if await page.get_by_text("The search returns no results").is_visible(timeout=6000):
-                logging.info(f"No results found for {college_name} {term} {subject}")
-                continue
-
-            # Expand all sections
-            sections = await page.query_selector_all('[aria-label="Class Section"]')
-            for section in sections:
-                await section.click()
-            expands_course = await page.query_selector_all('[aria-label="Class Section Sub"]')
-            for course in expands_course:
-                await course.click()
-            logging.info('All sections expanded.')
-
-            # Extract table rows for the course
-            tables = await page.locator("form[name=\"form_search\"] table").locator("tbody tr").all()
-            logging.info(f"Found {len(tables)} courses for {college_name} {term} {subject}")
-            schedule_entries = []
-            for table in tables:
-                cells = table.locator('td')
-                courseCode = await cells.nth(0).evaluate("cell => cell.innerText")
-                daysAndTimes = await cells.nth(2).evaluate("cell => cell.innerHTML")
-                daysAndTimes = daysAndTimes.split('<br>')
-                rooms = await cells.nth(3).evaluate("cell => cell.innerHTML")
-                rooms = rooms.split('<br>')
-                dates = await cells.nth(6).evaluate("cell => cell.innerHTML")
-                dates = dates.split('<br>')
-                courseName = await cells.nth(8).evaluate("cell => cell.innerText")
-                if len(rooms) < len(daysAndTimes): rooms = [rooms[0]] * len(daysAndTimes)
-
-                # filter out TBA and - in dayTimes and rooms
-                for j in range(len(daysAndTimes)):
-                    if (daysAndTimes[j] in ('TBA', '- ')) or (rooms[j] == 'TBA'): continue
-                    try:
-                        days, start_time, _, end_time = daysAndTimes[j].split(' ')
-                    except ValueError:
-                        logging.error(f"Error parsing days and times: {daysAndTimes[j]}")
-                        logging.error(f"{college_name} {term} {subject} {courseCode} {courseName}")
-                        continue
-                    start_date, _, end_date = dates[j].split(' ')
-
-                    entry = {
-                        'course_code': courseCode,
-                        'course_name': courseName,
-                        'room': rooms[j],
-                        'days': days,
-                        'start_time': start_time,
-                        'end_time': end_time,
-                        'start_date': start_date,
-                        'end_date': end_date,
-                    }
-                    schedule_entries.append(entry)
-                #logging.info(f"Extracted {college_name} {term} {subject} {courseCode} {courseName}")
-
-            async with aiofiles.open(f'schedules/{term}/{college_name}.csv', 'a') as f:
-                for entry in schedule_entries:
-                    await f.write(f"{college},{term},{subject},{entry['course_code']},{entry['course_name']},{entry['room']},{entry['start_date']},{entry['end_date']},{entry['days']},{entry['start_time']},{entry['end_time']}\n")
-            logging.info(f"Added {len(schedule_entries)} entries for {college_name} {term} {subject} {courseCode} {courseName}.")
-
-            # Go back to course selection page
-            modify_search_button = page.get_by_role("button", name="Modify Search")
-            await modify_search_button.click()
-            next_button = page.get_by_role("button", name="Next")
-            await next_button.click()
-            logging.info(f"Finished {college_name} {term} {subject}.")
-
-        # go back to term selection page
-        logging.info(f"Finished {college_name} {term}.")
-        await page.close()
-
-
-async def extract():
-    """Main function to extract data for all colleges asynchronously."""
-    async with async_playwright() as playwright:
-        colleges, term = await get_colleges(playwright)  # Get college list
-
-        semaphore = asyncio.Semaphore(4) # limit concurrent browser instances
-        tasks = [
-            process_college(playwright, college, term, semaphore)
-            for college in colleges
-        ]
-        await asyncio.gather(*tasks)
-        logging.info("Scraping completed.")
+async def open_criteria(worker, college, term, limiter):
+    """Bring the worker's page to the search criteria page of ``college`` and ``term``."""
+    page = worker.page
+    worker.college, worker.on_results = None, False
+    await limiter.wait(SEARCH_URL)
+    await page.goto(SEARCH_URL, wait_until="networkidle")
+
+    # Select only this college; the session may still have the worker's previous one selected
+    checkboxes = page.locator('ul.checkboxes input[type="checkbox"]')
+    for i in range(await checkboxes.count() - 1):  # Skip the last - "Select All"
+        checkbox = checkboxes.nth(i)
+        checkbox_id = await checkbox.get_attribute('id')
+        await set_checked(page.locator(f'label[for="{checkbox_id}"]'), checkbox, checkbox_id == college['id'])
+    await page.get_by_label('Term').select_option(term['value'])
+    await limiter.wait(SEARCH_URL)
+    await page.get_by_role("button", name="Next").click()
+
+    # Configure search parameters: closed classes too, every in-person and hybrid mode
+    slider = page.locator(".slider").first
+    await set_checked(slider, page.locator('label:has(.slider) input[type="checkbox"]').first, False)
+    for modality in MODALITIES:
+        item = page.get_by_role("listitem").filter(has_text=modality)
+        await set_checked(item.locator("span"), item.locator('input[type="checkbox"]'))
+    logging.info(f"Configured search {college['name']} {term['name']}")
+    worker.college = college['id']
+
+
+def subject_jobs(college, term, subjects, manifest):
+    """Jobs for the subjects of a college that are not finished in the manifest."""
+    pending = manifest.pending(college['name'], term['name'], subjects)
+    if len(pending) < len(subjects):
+        logging.info(f"Skipping {len(subjects) - len(pending)} finished subjects of {college['name']} {term['name']}")
+    return [Job(college, term, subject) for subject in pending]
+
+
+async def list_subjects(worker, job, manifest):
+    """Jobs for every unfinished subject of the job's college."""
+    subject_options = await worker.page.get_by_label('Subject').locator('option').all()
+    subjects = []
+    for subject_option in subject_options[1:]:  # The first option is "Select a subject"
+        subjects.append((await subject_option.get_attribute('value'), await subject_option.inner_text()))
+    if not subjects:
+        logging.info(f"No subjects found for {job.college['name']} {job.term['name']}.")
+    manifest.record_subjects(job.college['name'], job.term['name'], subjects)
+    jobs = subject_jobs(job.college, job.term, subjects, manifest)
+    logging.info(f"Queued {len(jobs)} subjects for {job.college['name']} {job.term['name']}")
+    return jobs
+
+
+async def search_subject(worker, job, limiter, file_locks, manifest):
+    """Search one subject, append its classes to the college's CSV file and record it in the manifest."""
+    page = worker.page
+    college_name, term = job.college['name'], job.term['name']
+    subject_value, subject = job.subject
+    logging.info(f"{college_name} {term} {subject}")
+    subject_started = time.perf_counter()
+
+    await page.get_by_label('Subject').select_option(value=subject_value)
+    search_button = page.get_by_role("button", name="Search")
+    await limiter.wait(SEARCH_URL)
+    await search_button.click()
+    if await page.get_by_text("The search returns no results").is_visible(timeout=6000):
+        logging.info(f"No results found for {college_name} {term} {subject}")
+        manifest.record(college_name, term, subject, [])
+        metrics.scraper_subjects_total.inc(college=college_name, outcome='empty')
+        metrics.scraper_subject_duration_seconds.observe(time.perf_counter() - subject_started)
+        return
+
+    # Expand all sections and read every row, one round trip each
+    await page.evaluate(EXPAND_SCRIPT)
+    rows = await page.evaluate(ROWS_SCRIPT)
+    logging.info(f"Found {len(rows)} courses for {college_name} {term} {subject}")
+    schedule_entries = row_entries(rows, college_name, term, subject)
+
+    # Workers searching other subjects of the same college append to the same file
+    path = f'schedules/{term}/{college_name}.csv'
+    rows = [[entry[field] for field in CSV_FIELDS] for entry in schedule_entries]
+    lines = io.StringIO()
+    writer = csv.writer(lines)
+    async with file_locks.setdefault(path, asyncio.Lock()):
+        async with aiofiles.open(path, 'a', newline='') as f:
+            if await f.tell() == 0:
+                writer.writerow(CSV_FIELDS)
+            writer.writerows(rows)
+            await f.write(lines.getvalue())
+        manifest.record(college_name, term, subject, rows)  # Only once the rows are in the file
+    logging.info(f"Added {len(schedule_entries)} entries for {college_name} {term} {subject}.")
+    metrics.scraper_rows_total.inc(len(schedule_entries), college=college_name)
+    metrics.scraper_subjects_total.inc(college=college_name, outcome='extracted')
+    metrics.scraper_subject_duration_seconds.observe(time.perf_counter() - subject_started)
+    worker.on_results = True  # The next job goes back to the criteria page or opens another college
+    logging.info(f"Finished {college_name} {term} {subject}.")
+
+
+async def back_to_criteria(worker, limiter):
+    """Go back from a results page to the course selection page of the same college."""
+    modify_search_button = worker.page.get_by_role("button", name="Modify Search")
+    await limiter.wait(SEARCH_URL)
+    await modify_search_button.click()
+    next_button = worker.page.get_by_role("button", name="Next")
+    await limiter.wait(SEARCH_URL)
+    await next_button.click()
+    worker.on_results = False
+
+
+async def run_job(worker, job, limiter, file_locks, manifest):
+    """List the subjects of a college or search one subject, on the worker's page."""
+    if worker.page is None:
+        await worker.open()
+    try:
+        if worker.college != job.college['id']:
+            await open_criteria(worker, job.college, job.term, limiter)
+        elif worker.on_results:
+            await back_to_criteria(worker, limiter)
+        if job.subject is None:
+            jobs = await list_subjects(worker, job, manifest)
+        else:
+            jobs = await search_subject(worker, job, limiter, file_locks, manifest)
+    except Exception:
+        await worker.job_done(failed=True)  # Page state unknown, start over in a fresh context
+        raise
+    await worker.job_done()
+    return jobs
+
+
+async def extract(workers=WORKERS, rate=REQUESTS_PER_SECOND, max_age=MAX_AGE):
+    """
+    Main function to extract data for all colleges asynchronously.
+
+    Every (college, term, subject) is a job in one queue consumed by ``workers``
+    pages from a pool of BROWSERS browsers, so big colleges are spread over all
+    of them. Subjects finished less than ``max_age`` seconds ago by an earlier
+    run (see checkpoint.py) are not searched again.
+    """
+    async with async_playwright() as playwright, BrowserPool(
+        playwright, BROWSERS, JOBS_PER_CONTEXT, launch_options=LAUNCH_OPTIONS, context_options=CONTEXT_OPTIONS
+    ) as pool:
+        pages = [Worker(pool) for _ in range(workers)]
+        limiter = HostRateLimiter(rate)
+        file_locks = {}
+
+        await pages[0].open()
+        colleges, term = await get_colleges(pages[0].page, limiter)  # Get college list
+
+        # Drop rows left by unfinished subjects of an earlier run, then queue only what is left to do
+        manifest = Manifest(f"schedules/{term['name']}/{MANIFEST_NAME}", max_age)
+        finished = manifest.resume(f"schedules/{term['name']}", term['name'])
+        logging.info(f"Resuming with {finished} subjects already finished")
+        jobs = []
+        for college in colleges:
+            subjects = manifest.subjects(college['name'], term['name'])
+            if subjects is None:
+                jobs.append(Job(college, term, None))
+            else:
+                jobs.extend(subject_jobs(college, term, subjects, manifest))
+        failed = await run_jobs(jobs, pages, lambda worker, job: run_job(worker, job, limiter, file_locks, manifest))
+        for job in failed:
+            logging.error(f"Gave up on {job_name(job)}")
+
+    logging.info("Scraping completed.")
+    metrics.flush()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,112 @@
+"""
+A small pool of Playwright browsers shared by the scraper's workers.
+
+Launching Chromium is the slowest and most memory-hungry part of a scrape, so
+a few browser processes are started once and every worker gets its own
+context (an isolated cookie session) and page in one of them. A worker's
+context is closed and replaced after ``max_jobs`` jobs or after an error, so
+memory leaked by long-lived pages does not build up over a full CUNY run, and
+a crashed browser is relaunched the next time a context is needed. Everything
+is closed when the pool's ``async with`` block exits, whether it succeeded or
+not.
+"""
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """
+    ``browsers`` Chromium processes launched with ``launch_options``; contexts
+    are created with ``context_options`` in the browser with the fewest open.
+
+        async with BrowserPool(playwright, browsers=2) as pool:
+            lease = PageLease(pool)
+            await lease.open()
+    """
+
+    def __init__(self, playwright, browsers=2, max_jobs=100, timeout=60000, launch_options=None,
+                 context_options=None):
+        self.playwright = playwright
+        self.size = browsers
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.launch_options = launch_options or {}
+        self.context_options = context_options or {}
+        self.browsers = []
+        self.contexts = []  # Open contexts of each browser, by position in self.browsers
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _launch(self):
+        logger.info("Launching browser...")
+        return await self.playwright.chromium.launch(**self.launch_options)
+
+    async def start(self):
+        """Launch the browsers."""
+        self.browsers = list(await asyncio.gather(*(self._launch() for _ in range(self.size))))
+        self.contexts = [set() for _ in self.browsers]
+
+    async def new_page(self):
+        """A new context and page in the least busy browser, relaunching it if it crashed."""
+        async with self._lock:
+            i = min(range(len(self.browsers)), key=lambda i: len(self.contexts[i]))
+            if not self.browsers[i].is_connected():
+                logger.warning("Browser disconnected, relaunching it")
+                self.contexts[i].clear()
+                self.browsers[i] = await self._launch()
+            context = await self.browsers[i].new_context(**self.context_options)
+            self.contexts[i].add(context)
+        page = await context.new_page()
+        page.set_default_timeout(self.timeout)
+        return context, page
+
+    async def close_context(self, context):
+        """Close a context handed out by new_page."""
+        for contexts in self.contexts:
+            contexts.discard(context)
+        try:
+            await context.close()
+        except Exception:  # Its browser may already be gone
+            logger.warning("Could not close browser context", exc_info=True)
+
+    async def close(self):
+        """Close every context and browser."""
+        contexts = [context for contexts in self.contexts for context in contexts]
+        await asyncio.gather(*(self.close_context(context) for context in contexts))
+        await asyncio.gather(*(browser.close() for browser in self.browsers), return_exceptions=True)
+        self.browsers, self.contexts = [], []
+
+
+class PageLease:
+    """
+    The context and page a worker borrows from a BrowserPool. Call ``job_done``
+    after every job: the context is replaced after ``pool.max_jobs`` jobs or
+    when the job failed.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.context = None
+        self.page = None
+        self.jobs = 0
+
+    async def open(self):
+        """Get a fresh context and page from the pool (closing the current ones)."""
+        if self.context is not None:
+            await self.pool.close_context(self.context)
+        self.context, self.page = await self.pool.new_page()
+        self.jobs = 0
+
+    async def job_done(self, failed=False):
+        """Count a job and recycle the context if it is worn out or in an unknown state."""
+        self.jobs += 1
+        if failed or self.jobs >= self.pool.max_jobs:
+            await self.open()
@@ -0,0 +1,170 @@
+"""
+Checkpoint manifest that lets a schedule scrape resume where it stopped.
+
+A unit is one (college, term, subject) search. When a unit's rows have been
+appended to its college's CSV file, the manifest records how many there were
+and a hash of their contents; the subjects listed for each college are
+recorded too. The manifest is a JSON-lines log next to the CSV files: each
+record appends one line, so saving costs the same on the last subject of a
+run as on the first and does not hold up the scrape's other workers. Later
+lines replace earlier ones for the same key, and a line cut short by a crash
+is ignored. ``resume`` compacts the log to one line per kept entry (write then
+rename, so a crash never leaves it half written).
+
+Before a rerun, ``resume`` checks the CSV files against the manifest: rows of
+units that never finished (the scrape died mid-college), that are older than
+``max_age`` seconds, or whose rows no longer match their hash are removed from
+the files and the units are forgotten. Only those units are fetched again, so
+the files never end up with duplicate rows.
+"""
+import csv
+import hashlib
+import json
+import logging
+import os
+import time
+
+from classrooms.cunyScheduleETL.sections import CSV_FIELDS
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+
+def unit_key(college_name, term, subject):
+    """Manifest key of a (college, term, subject) unit."""
+    return f'{college_name}|{term}|{subject}'
+
+
+def rows_hash(rows):
+    """Content hash of a unit's CSV rows (lists of strings in CSV_FIELDS order)."""
+    return hashlib.sha256(json.dumps(rows).encode()).hexdigest()
+
+
+def read_rows(path):
+    """Data rows of a CSV file; rows cut short by a crash mid-write are dropped."""
+    with open(path, newline='') as file:
+        return [row for row in csv.reader(file) if len(row) == len(CSV_FIELDS) and row != CSV_FIELDS]
+
+
+def write_rows(path, rows):
+    """Replace a CSV file with a header and ``rows``."""
+    with open(f'{path}.tmp', 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(CSV_FIELDS)
+        writer.writerows(rows)
+    os.replace(f'{path}.tmp', path)
+
+
+class Manifest:
+    """
+    The units and college subject lists completed by previous runs, stored in
+    the JSON-lines log at ``path``. Entries older than ``max_age`` seconds (default:
+    never) are stale and fetched again.
+    """
+
+    def __init__(self, path, max_age=None):
+        self.path = path
+        self.max_age = max_age
+        self.units = {}
+        self.colleges = {}
+        if os.path.exists(path):
+            with open(path) as file:
+                for line in file:
+                    try:
+                        kind, key, entry = json.loads(line)
+                    except ValueError:  # Cut short by a crash mid-write
+                        continue
+                    (self.units if kind == 'unit' else self.colleges)[key] = entry
+
+    def _lines(self, kind, entries):
+        return [json.dumps([kind, key, entry]) + '\n' for key, entry in entries.items()]
+
+    def _append(self, kind, key, entry):
+        with open(self.path, 'a') as file:
+            file.writelines(self._lines(kind, {key: entry}))
+
+    def save(self):
+        """Rewrite the log with one line per entry, then rename it into place."""
+        with open(f'{self.path}.tmp', 'w') as file:
+            file.writelines(self._lines('unit', self.units) + self._lines('college', self.colleges))
+        os.replace(f'{self.path}.tmp', self.path)
+
+    def _fresh(self, entry, now=None):
+        return self.max_age is None or (now or time.time()) - entry['completed_at'] < self.max_age
+
+    def is_done(self, college_name, term, subject):
+        """True if the unit was completed and is not stale."""
+        entry = self.units.get(unit_key(college_name, term, subject))
+        return entry is not None and self._fresh(entry)
+
+    def record(self, college_name, term, subject, rows):
+        """Record a completed unit and the CSV rows it appended."""
+        key = unit_key(college_name, term, subject)
+        self.units[key] = {
+            'college_name': college_name,
+            'term': term,
+            'subject': subject,
+            'rows': len(rows),
+            'hash': rows_hash(rows),
+            'completed_at': time.time(),
+        }
+        self._append('unit', key, self.units[key])
+
+    def subjects(self, college_name, term):
+        """The subjects (value, name) last listed for a college, or None if never listed or stale."""
+        entry = self.colleges.get(f'{college_name}|{term}')
+        if entry is None or not self._fresh(entry):
+            return None
+        return [tuple(subject) for subject in entry['subjects']]
+
+    def record_subjects(self, college_name, term, subjects):
+        """Record the subjects (value, name) listed for a college."""
+        key = f'{college_name}|{term}'
+        self.colleges[key] = {
+            'subjects': [list(subject) for subject in subjects],
+            'completed_at': time.time(),
+        }
+        self._append('college', key, self.colleges[key])
+
+    def pending(self, college_name, term, subjects):
+        """The subjects (value, name) of a college that still have to be searched."""
+        return [subject for subject in subjects if not self.is_done(college_name, term, subject[1])]
+
+    def resume(self, directory, term):
+        """
+        Make the CSV files of ``term`` in ``directory`` agree with the manifest:
+        keep the rows of fresh units whose rows match their hash, remove every
+        other row, forget those units and compact the log. Returns the number
+        of units kept.
+        """
+        now = time.time()
+        files = {}  # path -> rows
+        unit_rows = {}  # unit key -> rows
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                if name.endswith('.csv'):
+                    path = os.path.join(directory, name)
+                    files[path] = read_rows(path)
+                    for row in files[path]:
+                        unit_rows.setdefault(unit_key(row[0], row[1], row[2]), []).append(row)
+
+        kept = set()
+        for key, entry in list(self.units.items()):
+            if entry['term'] != term:
+                continue
+            if self._fresh(entry, now) and rows_hash(unit_rows.get(key, [])) == entry['hash']:
+                kept.add(key)
+            else:
+                del self.units[key]
+        stale = [key for key, entry in self.colleges.items() if key.endswith(f'|{term}') and not self._fresh(entry, now)]
+        for key in stale:
+            del self.colleges[key]
+
+        for path, rows in files.items():
+            keep = [row for row in rows if unit_key(row[0], row[1], row[2]) in kept]
+            if len(keep) != len(rows):
+                logger.info(f"Removing {len(rows) - len(keep)} rows of unfinished or stale subjects from {path}")
+                write_rows(path, keep)
+        self.save()
+        return len(kept)
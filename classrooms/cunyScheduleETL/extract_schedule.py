@@ -4,6 +4,8 @@ from datetime import datetime
 from playwright.sync_api import sync_playwright
 import logging
 
+from classrooms.cunyScheduleETL.sections import CSV_FIELDS, EXPAND_SCRIPT, MODALITIES, ROWS_SCRIPT, row_entries
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
@@ -15,10 +17,8 @@ def setupSearch(page):
     page.get_by_label("Term").select_option(index=1)
     page.get_by_role("button", name="Next").click()
     page.locator(".slider").first.click()
-    # page.get_by_role("listitem").filter(has_text="HyFlex").locator("span").click()
-    page.get_by_role("listitem").filter(has_text="Hybrid Synchronous").locator("span").click()
-    page.get_by_role("listitem").filter(has_text="In Person").locator("span").click()
-    page.get_by_role("listitem").filter(has_text="Hybrid Asynchronous").locator("span").click()
+    for modality in MODALITIES:
+        page.get_by_role("listitem").filter(has_text=modality).locator("span").click()
     page.get_by_label("Subject").select_option("ACCT")
     page.get_by_role("button", name="Search").click()
     page.get_by_role("button", name="Modify Search").click()
@@ -69,11 +69,7 @@ def extract(college_names=None, subjects=None, DEBUG=False):
         # write to csv file
         with open('cuny_schedule.csv', 'a', newline='') as f:
             writer = csv.writer(f)
-            #write header college_name,term,subject,course_code,course_name,building,room,start_date,end_date,days,start_time,end_time
-            writer.writerow([
-                'college_name', 'term', 'subject', 'course_code', 'course_name', 'building', 'room',
-                'start_date', 'end_date', 'days', 'start_time', 'end_time'
-            ])
+            writer.writerow(CSV_FIELDS)
 
         # loop through all the colleges
         for label in checkboxes:
@@ -124,61 +120,13 @@ def extract(college_names=None, subjects=None, DEBUG=False):
                     logging.info("No results found for this subject.")
                     continue
 
-                # Expand all sections
-                page.evaluate('''() => {
-                    document.querySelectorAll('[aria-label="Class Section"], [aria-label="Class Section Sub"]')
-                        .forEach(el => el.click());
-                }''')
-                #logging.info('All sections expanded.')
-
-                # Extract table rows for the course
-                tables = page.locator("form[name=\"form_search\"] table").locator("tbody tr").all()
-                #logging.info(f"Found {len(tables)} courses.")
-                classes_found = len(tables)
-                classes_added = 0
-                for table in tables:
-                    cells = table.locator('td')
-                    courseCode = cells.nth(0).inner_text()
-                    daysAndTimes = cells.nth(2).inner_html().split('<br>')
-                    rooms = cells.nth(3).inner_html().split('<br>')
-                    dates = cells.nth(6).inner_html().split('<br>')
-                    courseName = cells.nth(8).inner_text()
-                    if len(rooms) < len(daysAndTimes): rooms = [rooms[0]] * len(daysAndTimes)
-
-                    for j in range(len(daysAndTimes)):
-                        # filter out TBA and - in dayTimes and rooms
-                        if (daysAndTimes[j].strip() in ('TBA', '-', '-')) or (rooms[j] in ('TBA', '-', 'Online-Asynchronous', 'Online-Synchronous', 'Off-Campus')):
-                            continue
-
-                        # split days and times
-                        parts = daysAndTimes[j].split(' ')
-                        if len(parts) != 4 or parts[1] == '' or parts[3] == '':
-                            logging.error(f"Error parsing days and times: {daysAndTimes[j]}")
-                            logging.error(f"{college_name} {term} {subject} {courseCode} {courseName}")
-                            continue
-                        days, start_time, _, end_time = parts
-                        start_date, _, end_date = dates[j].split(' ')
-
-                        # split room which contains building and specific room
-                        room = rooms[j].split(' ')[-1]
-                        building = ' '.join(rooms[j].split(' ')[:-1])
-
-                        entry = {
-                            'college_name': college_name,
-                            'term': term,
-                            'subject': subject,
-                            'course_code': courseCode,
-                            'course_name': courseName,
-                            'building': building,
-                            'room': room,
-                            'days': days,
-                            'start_time': start_time,
-                            'end_time': end_time,
-                            'start_date': start_date,
-                            'end_date': end_date,
-                        }
-                        schedule_entries.append(entry)
-                        classes_added += 1
+                # Expand all sections, then read every row in one round trip
+                page.evaluate(EXPAND_SCRIPT)
+                rows = page.evaluate(ROWS_SCRIPT)
+                entries = row_entries(rows, college_name, term, subject)
+                schedule_entries.extend(entries)
+                classes_found = len(rows)
+                classes_added = len(entries)
 
                 total_classes_found += classes_found
                 total_classes_added += classes_added
@@ -193,13 +141,7 @@ def extract(college_names=None, subjects=None, DEBUG=False):
             # write to csv file
             with open('cuny_schedule.csv', 'a', newline='') as f:
                 writer = csv.writer(f)
-                for entry in schedule_entries:
-                    writer.writerow([
-                        entry['college_name'], entry['term'], entry['subject'], entry['course_code'],
-                        entry['course_name'], entry['building'], entry['room'],
-                        entry['start_date'], entry['end_date'], entry['days'],
-                        entry['start_time'], entry['end_time']
-                    ])
+                writer.writerows([entry[field] for field in CSV_FIELDS] for entry in schedule_entries)
 
             # go back to college select page, deselect college and then click on the college name
             logging.info(f"Finished {college_name} - {total_classes_added} of {total_classes_found}.")
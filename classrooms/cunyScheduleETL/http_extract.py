@@ -0,0 +1,482 @@
+"""
+Browser-free extraction backend for the CUNY Global Search tool.
+
+Instead of driving Chromium, the search forms are replayed as plain HTTP
+requests: every page is parsed with html.parser, its form is filled in the way
+a user would (college checkbox, term, subject, instruction modes) and submitted
+with an httpx.AsyncClient. The results page already contains every section row
+(the browser only hides them until "Class Section" is clicked), so nothing has
+to be expanded. Rows become the same CSV entries as in extract_schedule (see
+sections.py).
+
+The standard library's html.parser is used rather than lxml or selectolax: a
+large results page (about 200 sections, 80 KB) parses in about 20 ms, a small
+fraction of the request round trip, so a compiled parser would not make the
+scrape measurably faster.
+
+Colleges are searched concurrently, each in its own cookie session (the tool
+keeps the selected college and term server side) over one shared connection
+pool.
+
+    python -m classrooms.cunyScheduleETL.http_extract --college "City College" --output cuny_schedule.csv
+"""
+import argparse
+import asyncio
+import csv
+import logging
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import httpx
+
+from classrooms.utils import metrics
+from classrooms.cunyScheduleETL.sections import CSV_FIELDS, MODALITIES, section_entries
+
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = 'https://globalsearch.cuny.edu/CFGlobalSearchTool/search.jsp'
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Referer': 'https://www.cuny.edu/',
+}
+TIMEOUT = 60  # Seconds, as the browser's default timeout
+NO_RESULTS = 'The search returns no results'
+TERM_MONTHS = {1: 3, 2: 3, 3: 3, 4: 3, 5: 3, 6: 2, 7: 2, 8: 2, 9: 1, 10: 1, 11: 1, 12: 1}  # Month -> term option
+SUBMIT_TYPES = ('submit', 'button', 'image')
+
+
+def _text(parts):
+    """Join text fragments and collapse whitespace, like a browser's innerText."""
+    return ' '.join(''.join(parts).split())
+
+
+class Form:
+    """
+    A parsed HTML form. Controls are dicts with the keys tag, type, name, value,
+    id, checked, label, slider (a checkbox styled as a switch) and, for selects,
+    options: a list of (value, text) pairs.
+    """
+
+    def __init__(self, name, action, method):
+        self.name = name
+        self.action = action
+        self.method = method
+        self.controls = []
+
+    def find(self, label, types=None):
+        """The control labelled ``label`` (an exact match first, then a substring)."""
+        candidates = [c for c in self.controls if types is None or c['type'] in types]
+        for control in candidates:
+            if control['label'] == label:
+                return control
+        for control in candidates:
+            if label.lower() in control['label'].lower():
+                return control
+        raise LookupError(f"No control labelled {label!r} in form {self.name!r}")
+
+    def has(self, label, types=None):
+        try:
+            self.find(label, types)
+        except LookupError:
+            return False
+        return True
+
+    def checkboxes(self):
+        return [control for control in self.controls if control['type'] == 'checkbox']
+
+    def check(self, label, checked=True):
+        self.find(label, ('checkbox', 'radio'))['checked'] = checked
+
+    def options(self, label):
+        return self.find(label, ('select',))['options']
+
+    def select(self, label, value):
+        control = self.find(label, ('select',))
+        if value not in (option_value for option_value, _ in control['options']):
+            raise LookupError(f"{value!r} is not an option of {label!r}")
+        control['value'] = value
+
+    def data(self, button):
+        """(name, value) pairs the browser would send when ``button`` is clicked."""
+        pairs = []
+        for control in self.controls:
+            if not control['name']:
+                continue
+            if control['type'] in SUBMIT_TYPES:
+                if control['value'] == button or control['label'] == button:
+                    pairs.append((control['name'], control['value']))
+            elif control['type'] in ('checkbox', 'radio'):
+                if control['checked']:
+                    pairs.append((control['name'], control['value'] or 'on'))
+            elif control['type'] not in ('reset', 'file'):
+                pairs.append((control['name'], control['value'] or ''))
+        return pairs
+
+
+class FormParser(HTMLParser):
+    """
+    Collects the forms of a page. Controls are labelled by a <label for=...>,
+    else by the text of the <label> or <li> around them.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.forms = []
+        self._form = None
+        self._labels = {}  # for id -> text
+        self._containers = []  # Open <label>/<li>: {'for', 'text', 'controls'}
+        self._select = None
+        self._option = None
+        self._button = None
+        self._last_checkbox = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if 'slider' in (attrs.get('class') or '').split() and self._last_checkbox:
+            self._last_checkbox['slider'] = True
+
+        if tag == 'form':
+            self._form = Form(attrs.get('name'), attrs.get('action') or '', (attrs.get('method') or 'get').lower())
+            self.forms.append(self._form)
+        elif tag in ('label', 'li'):
+            self._containers.append({'for': attrs.get('for') if tag == 'label' else None, 'text': [], 'controls': []})
+        elif tag == 'option' and self._select is not None:
+            self._end_option()
+            self._option = {'value': attrs.get('value'), 'text': [], 'selected': 'selected' in attrs}
+        elif tag in ('input', 'button', 'select', 'textarea') and self._form is not None:
+            control = {
+                'tag': tag,
+                'type': (attrs.get('type') or ('submit' if tag == 'button' else 'text')).lower(),
+                'name': attrs.get('name'),
+                'value': attrs.get('value'),
+                'id': attrs.get('id'),
+                'checked': 'checked' in attrs,
+                'label': '',
+                'slider': False,
+            }
+            if tag == 'select':
+                control.update(type='select', options=[], selected=None)
+                self._select = control
+            elif tag == 'button':
+                self._button = control
+                control['text'] = []
+            self._form.controls.append(control)
+            if self._containers:
+                self._containers[-1]['controls'].append(control)
+            self._last_checkbox = control if control['type'] == 'checkbox' else None
+            if tag == 'input' and control['type'] in SUBMIT_TYPES:
+                control['label'] = control['value'] or ''
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        elif tag == 'button' and self._button is not None:
+            self._button['label'] = _text(self._button.pop('text'))
+            self._button = None
+        elif tag in ('label', 'li') and self._containers:
+            container = self._containers.pop()
+            text = _text(container['text'])
+            if container['for']:
+                self._labels[container['for']] = text
+            for control in container['controls']:
+                if not control['label']:
+                    control['label'] = text
+            if self._containers:  # Text and controls also belong to the enclosing container
+                self._containers[-1]['text'].extend(container['text'])
+                self._containers[-1]['controls'].extend(container['controls'])
+        elif tag == 'option':
+            self._end_option()
+        elif tag == 'select' and self._select is not None:
+            self._end_option()
+            select = self._select
+            selected = select.pop('selected')
+            select['value'] = selected if selected is not None else (select['options'][0][0] if select['options'] else None)
+            self._select = None
+
+    def handle_data(self, data):
+        if self._option is not None:
+            self._option['text'].append(data)
+        elif self._button is not None:
+            self._button['text'].append(data)
+        elif self._containers:
+            self._containers[-1]['text'].append(data)
+
+    def _end_option(self):
+        if self._option is None:
+            return
+        text = _text(self._option['text'])
+        value = self._option['value'] if self._option['value'] is not None else text
+        self._select['options'].append((value, text))
+        if self._option['selected']:
+            self._select['selected'] = value
+        self._option = None
+
+    def close(self):
+        super().close()
+        for form in self.forms:
+            for control in form.controls:
+                if control['id'] in self._labels:
+                    control['label'] = self._labels[control['id']]
+
+
+def parse_forms(html):
+    """Every form of the page ``html``."""
+    parser = FormParser()
+    parser.feed(html)
+    parser.close()
+    return parser.forms
+
+
+def find_form(html, label, types=None):
+    """The first form of ``html`` with a control labelled ``label``, or None."""
+    for form in parse_forms(html):
+        if form.has(label, types):
+            return form
+    return None
+
+
+class ResultsParser(HTMLParser):
+    """
+    Collects the table rows of the search results form. Each row is a list of
+    cells and each cell a list of its lines (the cell text split on <br>).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.rows = []
+        self._in_results = False
+        self._head = 0  # Depth of open <thead>/<tfoot>
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'form' and dict(attrs).get('name') == 'form_search':
+            self._in_results = True
+        elif not self._in_results:
+            return
+        elif tag in ('thead', 'tfoot'):
+            self._head += 1
+        elif tag == 'tr':
+            self._end_row()
+            self._row = []
+        elif tag in ('td', 'th') and self._row is not None:
+            self._end_cell()
+            self._cell = [[]] if tag == 'td' else None
+        elif tag == 'br' and self._cell is not None:
+            self._cell.append([])
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if not self._in_results:
+            return
+        if tag == 'form':
+            self._end_row()
+            self._in_results = False
+        elif tag in ('thead', 'tfoot'):
+            self._head -= 1
+        elif tag == 'tr':
+            self._end_row()
+        elif tag in ('td', 'th'):
+            self._end_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell[-1].append(data)
+
+    def _end_cell(self):
+        if self._cell is not None:
+            self._row.append([_text(line) for line in self._cell])
+        self._cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row and not self._head:
+            self.rows.append(self._row)
+        self._row = None
+
+
+def parse_results(html):
+    """Rows of a results page (empty when the search returned nothing)."""
+    if NO_RESULTS in html:
+        return []
+    parser = ResultsParser()
+    parser.feed(html)
+    parser.close()
+    return parser.rows
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """Connection pool shared by several clients; closed once by its owner, not by each client."""
+
+    def __init__(self, transport):
+        self.transport = transport
+
+    async def handle_async_request(self, request):
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self):
+        pass
+
+
+def college_names(form):
+    """Labels of the college checkboxes; the last checkbox is "Select All"."""
+    return [control['label'] for control in form.checkboxes()[:-1]]
+
+
+def choose_term(form, term=None):
+    """(value, name) of the term option named ``term``, or of the current term."""
+    options = form.options('Term')
+    if term is None:
+        return options[TERM_MONTHS[datetime.now().month]]
+    for value, name in options:
+        if name == term:
+            return value, name
+    raise LookupError(f"Term {term!r} not found, expected one of {[name for _, name in options[1:]]}")
+
+
+def configure_search(form):
+    """Show closed classes too and search every in-person and hybrid instruction mode."""
+    for control in form.checkboxes():
+        if control['slider']:  # "Show Open Classes Only"
+            control['checked'] = False
+            break
+    for modality in MODALITIES:
+        form.check(modality)
+    return form
+
+
+async def submit(client, response, form, button):
+    """Send ``form`` from the page ``response`` as if ``button`` was clicked."""
+    url = urljoin(str(response.url), form.action)
+    data = {}
+    for name, value in form.data(button):
+        data.setdefault(name, []).append(value)
+    if form.method == 'post':
+        response = await client.post(url, data=data)
+    else:
+        response = await client.get(url, params=data)
+    response.raise_for_status()
+    return response
+
+
+async def open_criteria(client, url, college_name, term=None):
+    """Select the college and term and return (term name, criteria page, configured criteria form)."""
+    response = await client.get(url)
+    response.raise_for_status()
+    form = find_form(response.text, 'Term', ('select',))
+    form.check(college_name)
+    term_value, term_name = choose_term(form, term)
+    form.select('Term', term_value)
+    response = await submit(client, response, form, 'Next')
+    return term_name, response, configure_search(find_form(response.text, 'Subject', ('select',)))
+
+
+async def back_to_criteria(client, response):
+    """The criteria page after a search ("Modify Search" then "Next" from a results page)."""
+    criteria = find_form(response.text, 'Subject', ('select',))
+    if criteria is None:
+        response = await submit(client, response, find_form(response.text, 'Modify Search', SUBMIT_TYPES),
+                                'Modify Search')
+        response = await submit(client, response, find_form(response.text, 'Next', SUBMIT_TYPES), 'Next')
+        criteria = find_form(response.text, 'Subject', ('select',))
+    return response, configure_search(criteria)
+
+
+async def extract_college(client, url, college_name, term=None, subjects=None):
+    """Search every subject (or only ``subjects``) of one college and return its CSV entries."""
+    term, response, criteria = await open_criteria(client, url, college_name, term)
+    logger.info(f"{college_name} {term}")
+
+    subject_options = criteria.options('Subject')[1:]  # The first option is "Select a subject"
+    if subjects:
+        subject_options = [option for option in subject_options if set(option) & set(subjects)]
+    if not subject_options:
+        logger.info(f"No subjects found for {college_name} {term}.")
+
+    entries = []
+    for value, subject in subject_options:
+        subject_started = time.perf_counter()
+        criteria.select('Subject', value)
+        response = await submit(client, response, criteria, 'Search')
+        rows = parse_results(response.text)
+        subject_entries = [
+            entry for cells in rows for entry in section_entries(cells, college_name, term, subject)
+        ]
+        entries.extend(subject_entries)
+        logger.info(f"Finished {college_name} {subject} - {len(subject_entries)} of {len(rows)}.")
+        metrics.scraper_rows_total.inc(len(subject_entries), college=college_name)
+        metrics.scraper_subjects_total.inc(college=college_name, outcome='extracted' if rows else 'empty')
+        metrics.scraper_subject_duration_seconds.observe(time.perf_counter() - subject_started)
+        response, criteria = await back_to_criteria(client, response)
+    return entries
+
+
+async def extract(colleges=None, subjects=None, term=None, output='cuny_schedule.csv', concurrency=4,
+                  url=SEARCH_URL):
+    """
+    Extract the schedules of ``colleges`` (default: all) into the CSV file
+    ``output``, searching up to ``concurrency`` colleges at a time. Returns the
+    number of rows written.
+    """
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    pool = httpx.AsyncHTTPTransport(limits=limits, retries=2)
+    transport = SharedTransport(pool)
+
+    def session():
+        return httpx.AsyncClient(transport=transport, headers=HEADERS, timeout=TIMEOUT, follow_redirects=True)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    try:
+        async with session() as client:
+            response = await client.get(url)
+            response.raise_for_status()
+            available = college_names(find_form(response.text, 'Term', ('select',)))
+        for name in set(colleges or ()) - set(available):
+            logger.error(f"College not found: {name}")
+        selected = [name for name in available if not colleges or name in colleges]
+        logger.info(f"Colleges: {selected}")
+
+        with open(output, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if file.tell() == 0:
+                writer.writerow(CSV_FIELDS)
+
+            async def run(college_name):
+                async with semaphore, session() as client:
+                    entries = await extract_college(client, url, college_name, term, subjects)
+                writer.writerows([entry[field] for field in CSV_FIELDS] for entry in entries)
+                logger.info(f"Finished {college_name} - {len(entries)} rows.")
+                return len(entries)
+
+            counts = await asyncio.gather(*(run(college_name) for college_name in selected))
+    finally:
+        await pool.aclose()
+        metrics.flush()
+    logger.info("Scraping completed.")
+    return sum(counts)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract CUNY class schedules over plain HTTP (no browser).')
+    parser.add_argument('--college', action='append', dest='colleges', help='College to extract (can be repeated; default all)')
+    parser.add_argument('--subject', action='append', dest='subjects', help='Subject code or name (can be repeated; default all)')
+    parser.add_argument('--term', help='Term name as shown in the Term menu (default: the current term)')
+    parser.add_argument('--output', default='cuny_schedule.csv', help='CSV file to append to')
+    parser.add_argument('--concurrency', type=int, default=4, help='Colleges searched at the same time')
+    parser.add_argument('--url', default=SEARCH_URL, help='Global Search start page')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    asyncio.run(extract(args.colleges, args.subjects, args.term, args.output, args.concurrency, args.url))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Work queue and per-host rate limiting for the schedule scrapers.
+
+Scraping is split into small jobs (one per college, term and subject) that a
+fixed pool of workers consumes, so the total time approaches
+``subjects / workers`` instead of being bound by the largest college. A job may
+return follow-up jobs, e.g. listing a college's subjects queues one job per
+subject.
+"""
+import asyncio
+import logging
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# college and term are dicts from the search page, subject a (value, name) option
+# of the Subject menu, or None for "list the subjects of this college"
+Job = namedtuple('Job', 'college term subject')
+
+
+class HostRateLimiter:
+    """
+    Spaces requests to the same host at least ``1 / rate`` seconds apart,
+    across every worker. A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate else 0
+        self._next_slot = {}  # host -> event loop time of its next free slot
+
+    async def wait(self, url):
+        """Sleep until a request to the host of ``url`` may be sent."""
+        host = urlsplit(url).hostname or url
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self._next_slot.get(host, now))
+        self._next_slot[host] = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+async def run_jobs(jobs, workers, handle, retries=1):
+    """
+    Run ``jobs`` with one consumer per item of ``workers`` (e.g. a browser
+    page each). ``handle(worker, job)`` is awaited for every job and may return
+    follow-up jobs, which are queued too. A job that raises is retried up to
+    ``retries`` times, possibly by another worker. Returns the jobs that failed.
+    """
+    queue = asyncio.Queue()  # (job, attempts so far)
+    for job in jobs:
+        queue.put_nowait((job, 0))
+    failed = []
+
+    async def consume(worker):
+        while True:
+            job, attempts = await queue.get()
+            try:
+                for follow_up in await handle(worker, job) or ():
+                    queue.put_nowait((follow_up, 0))
+            except Exception:
+                if attempts < retries:
+                    logger.warning(f"Retrying {job_name(job)}", exc_info=True)
+                    queue.put_nowait((job, attempts + 1))
+                else:
+                    logger.exception(f"Failed {job_name(job)}")
+                    failed.append(job)
+            finally:
+                queue.task_done()
+
+    consumers = [asyncio.create_task(consume(worker)) for worker in workers]
+    try:
+        await queue.join()
+    finally:
+        for consumer in consumers:
+            consumer.cancel()
+        await asyncio.gather(*consumers, return_exceptions=True)
+    return failed
+
+
+def job_name(job):
+    """Readable description of a job for the logs."""
+    parts = [job.college['name'], job.term['name']]
+    if job.subject is not None:
+        parts.append(job.subject[1])
+    return ' '.join(parts)
@@ -0,0 +1,93 @@
+"""
+Results-page parsing shared by the schedule scrapers.
+
+A results row is a list of cells and each cell a list of lines (its text split
+on <br>). The Playwright scrapers read every row of a page with a single
+``page.evaluate(ROWS_SCRIPT)`` and turn the cells' HTML into lines with
+cell_lines; the HTTP backend parses the page itself. section_entries then
+splits and filters the meetings in Python, the same way for every backend.
+"""
+import logging
+import re
+from html import unescape
+
+logger = logging.getLogger(__name__)
+
+CSV_FIELDS = [
+    'college_name', 'term', 'subject', 'course_code', 'course_name', 'building', 'room',
+    'start_date', 'end_date', 'days', 'start_time', 'end_time',
+]
+SKIPPED_TIMES = ('TBA', '-')
+SKIPPED_ROOMS = ('TBA', '-', 'Online-Asynchronous', 'Online-Synchronous', 'Off-Campus')
+# Instruction modes every scraper searches: the ones that meet in a room
+MODALITIES = ['HyFlex', 'Hybrid Synchronous', 'In Person', 'Hybrid Asynchronous']
+
+# innerHTML of every cell of every results row, in one round trip to the browser
+ROWS_SCRIPT = '''() => Array.from(
+    document.querySelectorAll('form[name="form_search"] table tbody tr'),
+    row => Array.from(row.cells, cell => cell.innerHTML)
+)'''
+# Click every section open, in one round trip to the browser
+EXPAND_SCRIPT = '''() => {
+    document.querySelectorAll('[aria-label="Class Section"], [aria-label="Class Section Sub"]')
+        .forEach(el => el.click());
+}'''
+
+BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+TAG_RE = re.compile(r'<[^>]*>')
+
+
+def cell_lines(cell_html):
+    """Text lines of a cell's innerHTML: split on <br>, without tags, entities decoded, whitespace collapsed."""
+    return [' '.join(unescape(TAG_RE.sub('', line)).split()) for line in BR_RE.split(cell_html)]
+
+
+def section_entries(cells, college_name, term, subject):
+    """
+    CSV entries (dicts with the CSV_FIELDS keys) of one results row: one per
+    meeting held in a room. TBA, online and off-campus meetings are skipped.
+    """
+    if len(cells) < 9:
+        return []
+    course_code = ' '.join(cells[0])
+    days_and_times, rooms, dates = cells[2], cells[3], cells[6]
+    course_name = ' '.join(cells[8])
+    if len(rooms) < len(days_and_times):
+        rooms = [rooms[0]] * len(days_and_times)
+
+    entries = []
+    for j, days_and_time in enumerate(days_and_times):
+        if days_and_time in SKIPPED_TIMES or rooms[j] in SKIPPED_ROOMS:
+            continue
+        parts = days_and_time.split(' ')
+        if len(parts) != 4 or j >= len(dates) or len(dates[j].split(' ')) != 3:
+            logger.error(f"Error parsing days and times: {days_and_time}")
+            logger.error(f"{college_name} {term} {subject} {course_code} {course_name}")
+            continue
+        days, start_time, _, end_time = parts
+        start_date, _, end_date = dates[j].split(' ')
+        *building, room = rooms[j].split(' ')
+        entries.append({
+            'college_name': college_name,
+            'term': term,
+            'subject': subject,
+            'course_code': course_code,
+            'course_name': course_name,
+            'building': ' '.join(building),
+            'room': room,
+            'start_date': start_date,
+            'end_date': end_date,
+            'days': days,
+            'start_time': start_time,
+            'end_time': end_time,
+        })
+    return entries
+
+
+def row_entries(rows, college_name, term, subject):
+    """CSV entries of the rows returned by ROWS_SCRIPT (lists of cell innerHTML)."""
+    return [
+        entry
+        for row in rows
+        for entry in section_entries([cell_lines(cell) for cell in row], college_name, term, subject)
+    ]
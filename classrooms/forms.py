@@ -40,8 +40,9 @@ class RoomBookingForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
-        # Extract next_class_time from kwargs if provided
+        # Extract next_class_time and today's BookingIntervals of the room from kwargs if provided
         self.next_class_time = kwargs.pop('next_class_time', None)
+        self.day_bookings = kwargs.pop('day_bookings', None)
         super().__init__(*args, **kwargs)
 
         # Format time fields to not show seconds
@@ -73,7 +74,7 @@ class RoomBookingForm(forms.ModelForm):
         end_datetime = timezone.datetime.combine(now.date(), end_time)
 
         # Calculate 10 minutes from now
-        ten_min_from_now = now + timezone.timedelta(minutes=10)
+        ten_min_from_now = current_datetime + timezone.timedelta(minutes=10)
 
         # Validate start time is between now and 10 minutes from now
         if start_datetime < current_datetime:
@@ -92,4 +93,8 @@ class RoomBookingForm(forms.ModelForm):
             if end_datetime > next_class_datetime:
                 raise forms.ValidationError(f"Booking must end before the next class starts at {self.next_class_time.strftime('%H:%M')}.")
 
+        # Validate the room is not already booked (checked again under the room's lock when saving)
+        if self.day_bookings is not None and self.day_bookings.overlaps(start_time, end_time):
+            raise forms.ValidationError("This room is already booked for the selected time.")
+
         return cleaned_data
@@ -0,0 +1,134 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import nullcontext
+from datetime import datetime
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from classrooms.models import College
+from classrooms.utils.all_rooms import get_all_rooms
+from classrooms.utils.empty_rooms import get_available_rooms
+from classrooms.utils.synthetic_data import create_bookings, generate_schedule_rows, write_schedule_csv
+
+
+class Command(BaseCommand):
+    help = ('Benchmarks load_schedule, populate_availabilities, get_available_rooms and get_all_rooms '
+            'on synthetic data (all changes are rolled back)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--colleges', type=int, default=3, help='Number of colleges')
+        parser.add_argument('--buildings', type=int, default=5, help='Buildings per college')
+        parser.add_argument('--rooms', type=int, default=30, help='Rooms per building')
+        parser.add_argument('--sections', type=int, default=10, help='Class sections per room')
+        parser.add_argument('--bookings', type=int, default=500, help='Bookings on the benchmark day')
+        parser.add_argument(
+            '--at',
+            default='2025-03-05 12:00',
+            help='Local date and time the room lists are computed for (YYYY-MM-DD HH:MM)',
+        )
+        parser.add_argument(
+            '--load-mode',
+            choices=['row', 'bulk', 'stream'],
+            default='bulk',
+            help='load_schedule import mode to benchmark',
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs of each repeatable path')
+        parser.add_argument('--seed', type=int, default=0, help='Random seed for the synthetic data')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        now = timezone.make_aware(datetime.strptime(options['at'], '%Y-%m-%d %H:%M'))
+        self.repeat = options['repeat']
+        self.results = []
+
+        handle, csv_path = tempfile.mkstemp(suffix='.csv')
+        try:
+            with os.fdopen(handle, 'w', newline='') as file:
+                rows = write_schedule_csv(file, generate_schedule_rows(
+                    colleges=options['colleges'], buildings=options['buildings'], rooms=options['rooms'],
+                    sections=options['sections'], seed=options['seed'],
+                ))
+
+            with transaction.atomic():
+                # The availability rebuild is measured on its own below
+                load_args = [csv_path, '--skip-availability']
+                if options['load_mode'] != 'row':
+                    load_args.append(f"--{options['load_mode']}")
+
+                def load():
+                    call_command('load_schedule', *load_args, stdout=StringIO())
+
+                self.measure('load_schedule', load, rollback=True)
+                load()
+                self.measure('populate_availabilities',
+                             lambda: call_command('populate_availabilities', stdout=StringIO()))
+
+                user = User.objects.create_user(username='benchmark-user')
+                bookings = create_bookings(user, now.date(), options['bookings'], seed=options['seed'])
+
+                college = College.objects.order_by('name').values_list('name', flat=True).first()
+                # The room lists read the clock, so pin it to the benchmark time
+                with patch('django.utils.timezone.now', return_value=now):
+                    self.measure('get_available_rooms', get_available_rooms)
+                    self.measure('get_available_rooms (one college)', lambda: get_available_rooms(college=college))
+                self.measure('get_all_rooms', get_all_rooms)
+                self.measure('get_all_rooms (one college)', lambda: get_all_rooms(college=college))
+
+                # Leave the database as it was
+                transaction.set_rollback(True)
+        finally:
+            os.remove(csv_path)
+
+        if options['json']:
+            self.stdout.write(json.dumps({'schedule_rows': rows, 'bookings': bookings, 'results': self.results}))
+            return
+
+        self.stdout.write(f"Synthetic data: {rows} schedule rows, {bookings} bookings, room lists at {options['at']}")
+        for result in self.results:
+            self.stdout.write(
+                f"{result['name']:<36} {result['seconds'] * 1000:>10.1f} ms ({result['runs']} runs)"
+                f" {result['queries']:>8} queries {result['peak_kib']:>10.0f} KiB peak"
+            )
+
+    def measure(self, name, func, rollback=False):
+        """
+        Run ``func`` once while counting queries and tracing allocations, then
+        ``--repeat`` more times untraced and record the median wall time.
+        With ``rollback`` every run is undone so it starts from the same data.
+        """
+        def run(context=nullcontext()):
+            with transaction.atomic():
+                started = time.perf_counter()
+                with context:
+                    func()
+                elapsed = time.perf_counter() - started
+                transaction.set_rollback(rollback)
+            return elapsed
+
+        queries = CaptureQueriesContext(connection)
+        tracemalloc.start()
+        timings = [run(queries)]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        if self.repeat > 0:
+            timings = [run() for _ in range(self.repeat)]
+
+        self.results.append({
+            'name': name,
+            'seconds': statistics.median(timings),
+            'runs': len(timings),
+            'queries': len(queries),
+            'peak_kib': peak / 1024,
+        })
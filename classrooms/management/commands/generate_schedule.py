@@ -0,0 +1,89 @@
+import math
+import time
+from datetime import datetime
+
+import regex as re
+from django.core.management.base import BaseCommand, CommandError
+
+from classrooms.utils.synthetic_data import MEETING_PATTERNS, generate_schedule_rows, write_schedule_csv
+
+PATTERN_RE = re.compile(r'^(?:Mo|Tu|We|Th|Fr)+$')
+
+
+class Command(BaseCommand):
+    help = 'Writes a synthetic schedule CSV in the load_schedule format for load and scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', type=str, help='Path of the CSV file to write, or - for stdout')
+        parser.add_argument('--colleges', type=int, default=3, help='Number of colleges')
+        parser.add_argument('--buildings', type=int, default=5, help='Buildings per college')
+        parser.add_argument('--rooms', type=int, default=30, help='Rooms per building')
+        parser.add_argument('--sections', type=int, default=10, help='Class sections per room (section density)')
+        parser.add_argument('--term', type=str, default='2025 Spring', help='Value of the term column')
+        parser.add_argument(
+            '--pattern',
+            action='append',
+            metavar='DAYS=WEIGHT',
+            help='Meeting pattern and relative weight, e.g. MoWe=40 (can be repeated; default '
+                 + ' '.join(f'{days}={weight}' for days, weight in MEETING_PATTERNS.items()) + ')',
+        )
+        parser.add_argument(
+            '--date-range',
+            action='append',
+            metavar='START:END',
+            help='Section start and end dates as MM/DD/YYYY:MM/DD/YYYY (can be repeated; default 01/27/2025:05/20/2025)',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+
+    def handle(self, *args, **options):
+        patterns = self.parse_patterns(options['pattern']) if options['pattern'] else None
+        date_ranges = self.parse_date_ranges(options['date_range']) if options['date_range'] else None
+        rows = generate_schedule_rows(
+            colleges=options['colleges'], buildings=options['buildings'], rooms=options['rooms'],
+            sections=options['sections'], term=options['term'], patterns=patterns,
+            date_ranges=date_ranges, seed=options['seed'],
+        )
+
+        started = time.perf_counter()
+        if options['output'] == '-':
+            count = write_schedule_csv(self.stdout, rows)
+            report = self.stderr  # Keep stdout clean for piping into a file
+        else:
+            # Rows are generated lazily and written through a large buffer, so memory stays flat
+            with open(options['output'], 'w', newline='', encoding='utf-8', buffering=1024 * 1024) as file:
+                count = write_schedule_csv(file, rows)
+            report = self.stdout
+
+        elapsed = time.perf_counter() - started
+        report.write(self.style.SUCCESS(
+            f"Wrote {count} rows in {elapsed:.2f}s ({count / elapsed if elapsed else 0:.0f} rows/s)"
+        ))
+
+    def parse_patterns(self, values):
+        """Parse DAYS=WEIGHT arguments into a pattern -> weight dict"""
+        patterns = {}
+        for value in values:
+            days, _, weight = value.partition('=')
+            if not PATTERN_RE.match(days):
+                raise CommandError(f"Invalid meeting pattern: {days}. Expected day codes such as MoWe or TuTh")
+            try:
+                patterns[days] = float(weight) if weight else 1.0
+            except ValueError:
+                raise CommandError(f"Invalid weight for {days}: {weight}")
+            # Also rejects nan; random.choices would fail later or silently skew the mix
+            if not 0 < patterns[days] < math.inf:
+                raise CommandError(f"Weight for {days} must be a positive number, got {weight}")
+        return patterns
+
+    def parse_date_ranges(self, values):
+        """Parse START:END arguments into (start_date, end_date) pairs"""
+        date_ranges = []
+        for value in values:
+            try:
+                start_date, end_date = (datetime.strptime(part.strip(), '%m/%d/%Y').date() for part in value.split(':'))
+            except ValueError:
+                raise CommandError(f"Invalid date range: {value}. Expected MM/DD/YYYY:MM/DD/YYYY")
+            if end_date < start_date:
+                raise CommandError(f"Date range ends before it starts: {value}")
+            date_ranges.append((start_date, end_date))
+        return date_ranges
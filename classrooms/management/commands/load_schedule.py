@@ -1,14 +1,18 @@
 import csv
+import os
+import time
 import regex as re
 from datetime import datetime
+from itertools import islice
 from django.db import transaction
 from django.db.utils import IntegrityError
 from django.core.management import call_command
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from classrooms.models import (
     ScheduleDump, College, Building,
-    Room, Schedule
+    Room, Schedule, ImportCheckpoint
 )
+from classrooms.utils import metrics
 
 
 class Command(BaseCommand):
@@ -26,9 +30,83 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip processing to normalized models',
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Read the whole file into memory and insert with bulk_create (much faster for large files)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows per bulk insert when using --bulk or --stream',
+        )
+        parser.add_argument(
+            '--stream',
+            action='store_true',
+            help='Stream the file in chunks, committing each chunk in its own transaction (bounded memory)',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Number of CSV rows per chunk when using --stream',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='With --stream, continue after the last chunk committed by an interrupted run',
+        )
+        parser.add_argument(
+            '--skip-availability',
+            action='store_true',
+            help='Do not regenerate room availability afterwards (run populate_availabilities yourself)',
+        )
 
     def handle(self, *args, **options):
         csv_file = options['csv_file']
+        if options['resume'] and not options['stream']:
+            raise CommandError('--resume only applies to --stream imports')
+        self.touched_room_ids = set()  # Rooms whose schedule may have changed
+        self.college_ids = {}  # name -> id, filled by the bulk import
+        self.building_ids = {}  # (name, college_id) -> id
+        self.room_ids = {}  # (name, college_id, building_id) -> id
+
+        started = time.perf_counter()
+        if options['stream']:
+            mode = 'stream'
+            processed_rows, total_rows = self.import_streaming(csv_file, options)
+        elif options['bulk']:
+            mode = 'bulk'
+            processed_rows, total_rows = self.import_bulk(csv_file, options)
+        else:
+            mode = 'row'
+            processed_rows, total_rows = self.import_row_by_row(csv_file, options)
+        elapsed = time.perf_counter() - started
+
+        metrics.load_schedule_rows_total.inc(processed_rows, mode=mode)
+        metrics.load_schedule_duration_seconds.observe(elapsed, mode=mode)
+        metrics.load_schedule_rows_per_second.set(processed_rows / max(elapsed, 1e-6), mode=mode)
+        metrics.flush()
+
+        self.stdout.write(self.style.SUCCESS(f'Successfully processed {processed_rows}/{total_rows} rows'))
+
+        if options['skip_availability']:
+            self.stdout.write('Skipping availability population (--skip-availability).')
+            return
+
+        if not self.touched_room_ids:
+            self.stdout.write('No rooms changed, skipping availability population.')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Starting availability population for {len(self.touched_room_ids)} rooms...'
+        ))
+        call_command('populate_availabilities', rooms=sorted(self.touched_room_ids), stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS('Availability population complete!'))
+
+    def import_row_by_row(self, csv_file, options):
+        """Import the CSV one row at a time using get_or_create"""
         total_rows = 0
         processed_rows = 0
 
@@ -60,11 +138,206 @@ class Command(BaseCommand):
                         ))
                         continue
 
-        self.stdout.write(self.style.SUCCESS(f'Successfully processed {processed_rows}/{total_rows} rows'))
+        return processed_rows, total_rows
 
-        self.stdout.write(self.style.SUCCESS('Starting availability population...'))
-        call_command('populate_availabilities')
-        self.stdout.write(self.style.SUCCESS('Availability population complete!'))
+    def import_bulk(self, csv_file, options):
+        """Read the whole CSV once and insert it with a handful of bulk queries"""
+        with open(csv_file, 'r', newline='') as file:
+            rows = list(csv.DictReader(file))
+
+        total_rows = len(rows)
+        self.stdout.write(self.style.SUCCESS(f'Starting bulk import of {total_rows} rows...'))
+
+        with transaction.atomic():
+            processed_rows = self.import_rows(rows, options)
+
+        return processed_rows, total_rows
+
+    def import_streaming(self, csv_file, options):
+        """
+        Import the CSV in fixed-size chunks, each committed in its own transaction.
+        Every chunk's transaction also updates the import's ImportCheckpoint row,
+        so an interrupted import can be continued with --resume.
+        """
+        chunk_size = options['chunk_size']
+        total_rows = 0
+        processed_rows = 0
+
+        if options['resume']:
+            checkpoint = self.load_checkpoint(csv_file)
+            if checkpoint:
+                total_rows = checkpoint.rows_committed
+                processed_rows = checkpoint.processed_rows
+                self.touched_room_ids.update(checkpoint.touched_room_ids)
+                self.stdout.write(self.style.SUCCESS(f'Resuming import after row {total_rows}...'))
+
+        with open(csv_file, 'r', newline='') as file:
+            reader = csv.DictReader(file)
+            for _ in islice(reader, total_rows):  # Skip rows committed by a previous run
+                pass
+
+            self.stdout.write(self.style.SUCCESS(f'Starting streaming import in chunks of {chunk_size} rows...'))
+
+            while True:
+                chunk = list(islice(reader, chunk_size))
+                if not chunk:
+                    break
+
+                started = time.perf_counter()
+                with transaction.atomic():
+                    processed_rows += self.import_rows(chunk, options, first_row=total_rows + 1)
+                    total_rows += len(chunk)
+                    self.save_checkpoint(csv_file, total_rows, processed_rows)
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Committed rows {total_rows - len(chunk) + 1}-{total_rows} '
+                    f'in {elapsed:.2f}s ({len(chunk) / max(elapsed, 1e-6):.0f} rows/s)'
+                )
+
+        ImportCheckpoint.objects.filter(csv_file=os.path.abspath(csv_file)).delete()
+
+        return processed_rows, total_rows
+
+    def load_checkpoint(self, csv_file):
+        """The checkpoint of an interrupted import, ignored if the CSV has changed since"""
+        checkpoint = ImportCheckpoint.objects.filter(csv_file=os.path.abspath(csv_file)).first()
+        if checkpoint is None:
+            self.stdout.write(self.style.WARNING('No checkpoint found, starting from the beginning.'))
+            return None
+
+        stat = os.stat(csv_file)
+        if checkpoint.size != stat.st_size or checkpoint.mtime != stat.st_mtime:
+            self.stdout.write(self.style.WARNING(
+                'CSV file changed since the checkpoint was written, starting from the beginning.'
+            ))
+            return None
+
+        return checkpoint
+
+    def save_checkpoint(self, csv_file, rows_committed, processed_rows):
+        """Record how far the streaming import has got, in the transaction of the chunk just imported"""
+        stat = os.stat(csv_file)
+        ImportCheckpoint.objects.update_or_create(csv_file=os.path.abspath(csv_file), defaults={
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'rows_committed': rows_committed,
+            'processed_rows': processed_rows,
+            'touched_room_ids': sorted(self.touched_room_ids),
+        })
+
+    def import_rows(self, rows, options, first_row=1):
+        """
+        Parse a list of CSV rows and bulk insert them. Colleges, buildings and rooms
+        are resolved through in-memory lookups kept on the command, so each one
+        is only queried or created once per import.
+        """
+        batch_size = options['batch_size']
+        parsed_rows = []
+        for i, row in enumerate(rows, first_row):
+            try:
+                parsed_rows.append(self.parse_row(row))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(
+                    f"Error processing row {i}: {str(e)}. Row data: {row}"
+                ))
+
+        if not options['skip_dump']:
+            ScheduleDump.objects.bulk_create([
+                ScheduleDump(**{field: value for field, value in parsed.items() if field != 'day_list'})
+                for parsed in parsed_rows
+            ], batch_size=batch_size)
+
+        if not options['skip_normalized']:
+            college_ids = self.resolve_colleges({parsed['college_name'] for parsed in parsed_rows})
+            building_ids = self.resolve_buildings({
+                (parsed['building'], college_ids[parsed['college_name']]) for parsed in parsed_rows
+            })
+
+            room_keys = []
+            for parsed in parsed_rows:
+                college_id = college_ids[parsed['college_name']]
+                room_keys.append((parsed['room'], college_id, building_ids[(parsed['building'], college_id)]))
+            room_ids = self.resolve_rooms(set(room_keys))
+
+            schedules = {}
+            for parsed, room_key in zip(parsed_rows, room_keys):
+                room_id = room_ids[room_key]
+                self.touched_room_ids.add(room_id)
+                if not parsed['day_list']:
+                    self.stdout.write(self.style.WARNING(
+                        f"No valid days found for course {parsed['course_code']}: {parsed['days']}"
+                    ))
+                    continue
+                for day in parsed['day_list']:
+                    key = (room_id, day, parsed['start_time'], parsed['end_time'],
+                           parsed['start_date'], parsed['end_date'])
+                    schedules[key] = Schedule(
+                        room_id=room_id,
+                        day=day,
+                        start_time=parsed['start_time'],
+                        end_time=parsed['end_time'],
+                        start_date=parsed['start_date'],
+                        end_date=parsed['end_date']
+                    )
+            Schedule.objects.bulk_create(schedules.values(), batch_size=batch_size, ignore_conflicts=True)
+
+        return len(parsed_rows)
+
+    def resolve_colleges(self, names):
+        """Map college names to ids, creating any that do not exist yet"""
+        missing = names - self.college_ids.keys()
+        if missing:
+            College.objects.bulk_create([College(name=name) for name in missing], ignore_conflicts=True)
+            self.college_ids.update(College.objects.filter(name__in=missing).values_list('name', 'id'))
+        return self.college_ids
+
+    def resolve_buildings(self, keys):
+        """Map (building name, college id) pairs to ids, creating any that do not exist yet"""
+        missing = keys - self.building_ids.keys()
+        if missing:
+            Building.objects.bulk_create(
+                [Building(name=name, college_id=college_id) for name, college_id in missing],
+                ignore_conflicts=True
+            )
+            for building_id, name, college_id in Building.objects.filter(
+                    college_id__in={college_id for _, college_id in missing}
+            ).values_list('id', 'name', 'college_id'):
+                self.building_ids[(name, college_id)] = building_id
+        return self.building_ids
+
+    def resolve_rooms(self, keys):
+        """Map (room name, college id, building id) triples to ids, creating any that do not exist yet"""
+        missing = keys - self.room_ids.keys()
+        if missing:
+            Room.objects.bulk_create(
+                [Room(name=name, college_id=college_id, building_id=building_id)
+                 for name, college_id, building_id in missing],
+                ignore_conflicts=True
+            )
+            for room_id, name, college_id, building_id in Room.objects.filter(
+                    building_id__in={building_id for _, _, building_id in missing}
+            ).values_list('id', 'name', 'college_id', 'building_id'):
+                self.room_ids[(name, college_id, building_id)] = room_id
+        return self.room_ids
+
+    def parse_row(self, row):
+        """Strip and parse a CSV row into ScheduleDump field values plus its list of day codes"""
+        return {
+            'college_name': row['college_name'].strip(),
+            'term': row['term'].strip(),
+            'subject': row['subject'].strip(),
+            'course_code': row['course_code'].strip(),
+            'course_name': row['course_name'].strip(),
+            'building': row['building'].strip(),
+            'room': row['room'].strip(),
+            'start_date': self.parse_date(row['start_date']),
+            'end_date': self.parse_date(row['end_date']),
+            'days': row['days'].strip(),
+            'start_time': self.parse_time(row['start_time']),
+            'end_time': self.parse_time(row['end_time']),
+            'day_list': self.parse_days(row['days']),
+        }
 
     def import_to_dump(self, row):
         """Import raw data into ScheduleDump model"""
@@ -110,6 +383,7 @@ class Command(BaseCommand):
                 college=college,
                 building=building
             )
+            self.touched_room_ids.add(room.id)
 
             # Process each day in the days string
             days = self.parse_days(row['days'])
@@ -1,48 +1,65 @@
-from django.utils import timezone
-from datetime import datetime, timedelta, time
+import os
+import time
 
-from django.core.management.base import BaseCommand
-from classrooms.models import Room, Schedule, RoomAvailability
+from django.core.management.base import BaseCommand, CommandError
+from classrooms.models import Room
+from classrooms.utils import metrics
+from classrooms.utils.availability_builder import rebuild_availabilities
 
 
 class Command(BaseCommand):
-    help = 'Generates weekly availability patterns (5-minute resolution)'
+    help = 'Generates weekly availability patterns (one bitmask per room and weekday on the AVAILABILITY_* time grid)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rooms',
+            type=int,
+            nargs='+',
+            help='Only recompute these Room ids',
+        )
+        parser.add_argument(
+            '--college',
+            action='append',
+            help='Only recompute rooms of this college (can be repeated)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Number of rows per bulk insert',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Compile the masks in this many processes (0 = one per CPU core); writes stay in this process',
+        )
 
     def handle(self, *args, **options):
-        RoomAvailability.objects.all().delete()
-
-        rooms = Room.objects.select_related('building', 'college').all()
-        total_minutes = 12 * 60  # 8am-8pm = 12 hours
-        interval = 5  # 5-minute resolution
-
-        # Monday=0 to Friday=4
-        for weekday in range(5):
-            day_code = ['Mo', 'Tu', 'We', 'Th', 'Fr'][weekday]
-
-            for minute in range(0, total_minutes, interval):
-                # Find scheduled rooms at this time
-                scheduled_rooms = Schedule.objects.filter(
-                    day=day_code,
-                    start_time__lte=time(8 + minute // 60, minute % 60),
-                    end_time__gte=time(8 + minute // 60, minute % 60)
-                ).values_list('room_id', flat=True)
-
-                # Create availability records
-                RoomAvailability.objects.bulk_create([
-                    RoomAvailability(
-                        room=room,
-                        building=room.building,
-                        college=room.college,
-                        weekday=weekday,
-                        minute_block=minute,
-                        is_available=room.id not in scheduled_rooms
-                    )
-                    for room in rooms
-                ], batch_size=1000)
-
-                if minute % 60 == 0:  # Log hourly progress
-                    self.stdout.write(f"Processed {day_code} {8 + minute // 60}:00")
+        if options['workers'] < 0:
+            raise CommandError(f"--workers must be 0 (one per CPU core) or more, got {options['workers']}")
+        room_ids = None
+        if options['rooms'] is not None:
+            room_ids = set(options['rooms'])
+        if options['college']:
+            college_rooms = Room.objects.filter(college__name__in=options['college']).values_list('id', flat=True)
+            room_ids = (room_ids or set()) | set(college_rooms)
+
+        if room_ids is None:
+            self.stdout.write("Recomputing availability for all rooms...")
+        else:
+            self.stdout.write(f"Recomputing availability for {len(room_ids)} rooms...")
+
+        workers = options['workers'] or os.cpu_count()
+
+        started = time.perf_counter()
+        created = rebuild_availabilities(room_ids=room_ids, batch_size=options['batch_size'], workers=workers)
+        elapsed = time.perf_counter() - started
+
+        metrics.populate_availabilities_duration_seconds.observe(elapsed)
+        metrics.populate_availabilities_rows_total.inc(created)
+        metrics.flush()
 
         self.stdout.write(self.style.SUCCESS(
-            f"Created weekly patterns with {RoomAvailability.objects.count()} entries"
-        ))
\ No newline at end of file
+            f"Created weekly patterns with {created} entries in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,73 @@
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from classrooms.utils import metrics, request_stats
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryTimingMiddleware:
+    """
+    Record wall time, query count and DB time of every request.
+
+    The numbers are sent back in a Server-Timing header (visible in the
+    browser's network panel) and kept as rolling per-view percentiles, see
+    classrooms.utils.request_stats. Enabled with the REQUEST_METRICS setting.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_METRICS', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = timer.duration * 1000
+
+        match = request.resolver_match
+        request_stats.record(match.view_name if match else 'unresolved', total_ms, timer.count, db_ms)
+
+        response['Server-Timing'] = (
+            f'total;dur={total_ms:.1f}, db;dur={db_ms:.1f};desc="{timer.count} queries"'
+        )
+        return response
+
+
+class MetricsMiddleware:
+    """Record the latency and status of every response for the Prometheus /metrics endpoint."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+        metrics.http_request_duration_seconds.observe(time.perf_counter() - started, view=view)
+        metrics.http_requests_total.inc(view=view, status=response.status_code)
+        return response
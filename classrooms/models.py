@@ -32,6 +32,23 @@ class ScheduleDump(models.Model):
         return f"{self.college_name} {self.term} {self.course_code} {self.course_name}"
 
 
+class ImportCheckpoint(models.Model):
+    """
+    Progress of a streaming load_schedule import. It is written in the same
+    transaction as each chunk, so after a crash it always matches the rows that
+    were committed and --resume neither skips nor repeats any.
+    """
+    csv_file = models.CharField(max_length=500, unique=True)  # Absolute path of the CSV file
+    size = models.BigIntegerField()  # Size and modification time of the file when the import started
+    mtime = models.FloatField()
+    rows_committed = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    touched_room_ids = models.JSONField(default=list)
+
+    def __str__(self):
+        return f"{self.csv_file} ({self.rows_committed} rows committed)"
+
+
 class College(models.Model):
     name = models.CharField(max_length=100, unique=True)
 
@@ -82,35 +99,44 @@ class Schedule(models.Model):
         return f"{self.room} | {self.day} {self.start_time} - {self.end_time} ({self.start_date} to {self.end_date})"
 
 
+class RoomAvailabilityQuerySet(models.QuerySet):
+    def on(self, day):
+        """Rows describing the given calendar date (one per room)"""
+        return self.filter(weekday=day.weekday(), valid_from__lte=day, valid_to__gte=day)
+
+
 class RoomAvailability(models.Model):
-    """Stores weekly availability patterns (Monday-Friday, 8am-8pm)"""
+    """
+    Stores weekly availability patterns (Monday-Friday, 8am-8pm unless the AVAILABILITY_* settings
+    change the time grid) as one bitmask per room and weekday.
+    Each row applies to the dates between valid_from and valid_to, during which the same classes meet.
+    """
     room = models.ForeignKey(Room, on_delete=models.CASCADE)
     building = models.ForeignKey(Building, on_delete=models.CASCADE)
     college = models.ForeignKey(College, on_delete=models.CASCADE)
 
     # Using simple integer fields instead of datetimes
-    weekday = models.PositiveSmallIntegerField(  # 0=Monday, 4=Friday
+    weekday = models.PositiveSmallIntegerField(  # 0=Monday, 6=Sunday
         choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'),
-                 (3, 'Thursday'), (4, 'Friday')]
+                 (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')]
+    )
+    valid_from = models.DateField()
+    valid_to = models.DateField()
+    occupancy = models.BinaryField(  # See classrooms/utils/availability.py
+        help_text="Packed bitmask of occupied time grid blocks since the start of the day (144 bits by default)"
     )
-    minute_block = models.PositiveSmallIntegerField(  # Minutes since 8:00am (0-719)
-        help_text="Minutes since 8:00am (0-719 for 12h at 5-min intervals)"
+    free_until = models.BinaryField(
+        help_text="For each block, the next occupied block (uint16 per block, blocks per day = free for the rest of the day)"
     )
-    is_available = models.BooleanField()
+
+    objects = RoomAvailabilityQuerySet.as_manager()
 
     class Meta:
-        unique_together = ('room', 'weekday', 'minute_block')
+        unique_together = ('room', 'weekday', 'valid_from')
         indexes = [
-            models.Index(fields=['weekday', 'minute_block', 'is_available']),
+            models.Index(fields=['weekday', 'valid_from', 'valid_to']),
         ]
 
-    @property
-    def time_display(self):
-        """Convert minute_block back to readable time"""
-        hours = 8 + self.minute_block // 60
-        minutes = self.minute_block % 60
-        return f"{hours:02d}:{minutes:02d}"
-
 
 class RoomBooking(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -131,4 +157,28 @@ class RoomBooking(models.Model):
         ]
 
     def __str__(self):
-        return f"{self.room} booked by {self.user.username} on {self.booking_date} from {self.start_time} to {self.end_time}"
\ No newline at end of file
+        return f"{self.room} booked by {self.user.username} on {self.booking_date} from {self.start_time} to {self.end_time}"
+
+
+class RoomDayLock(models.Model):
+    """
+    One row per room and day that booking writers update before checking for
+    conflicts, so concurrent bookings of the same room/day run one at a time
+    while other rooms are unaffected (see classrooms/utils/bookings.py).
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    date = models.DateField()
+    version = models.PositiveIntegerField(default=0)  # Bumped on every booking attempt
+
+    class Meta:
+        unique_together = ('room', 'date')
+
+
+class DataVersion(models.Model):
+    """
+    A single row counting changes to rooms, availability and bookings. It is
+    bumped in the transaction making the change, so the cached room lists and
+    ETags of every process can be checked with one primary-key lookup (see
+    classrooms/utils/availability_cache.py).
+    """
+    version = models.PositiveBigIntegerField(default=0)
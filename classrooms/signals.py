@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from classrooms.models import Room, RoomBooking
+from classrooms.utils.availability_cache import bump_data_version
+from classrooms.utils.availability_events import notify_subscribers
+
+
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=RoomBooking)
+def invalidate_room_lists(sender, **kwargs):
+    """
+    Rooms and bookings created, cancelled or deleted change the room lists, so
+    bump the data version every process's cached lists and ETags are keyed on.
+    """
+    bump_data_version()
+
+
+@receiver([post_save, post_delete], sender=RoomBooking)
+def wake_availability_streams(sender, **kwargs):
+    """
+    Bookings created, cancelled or deleted change which rooms are free.
+    """
+    # Open streams re-read the database, so only wake them once the change is visible
+    transaction.on_commit(notify_subscribers)
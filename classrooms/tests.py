@@ -12,6 +12,34 @@ from django.test import TestCase
 from classrooms.tests.test_login import LoginTestCase
 from classrooms.tests.test_password_reset import PasswordResetTestCase
 from classrooms.tests.test_integration import IntegrationTestCase
+from classrooms.tests.test_availability import (
+    AvailabilityEngineTestCase, TimeGridTestCase, PopulateAvailabilitiesTestCase, AvailableRoomsCacheTestCase,
+)
+from classrooms.tests.test_load_schedule import LoadScheduleTestCase
+from classrooms.tests.test_api import RoomsApiTestCase, AvailabilityStreamTestCase
+from classrooms.tests.test_bookings import (
+    BookingIntervalsTestCase, RoomBookingLookupTestCase, CreateBookingTestCase, ConcurrentBookingTestCase,
+)
+from classrooms.tests.test_benchmark import (
+    SyntheticDataTestCase, BenchmarkCommandTestCase, GenerateScheduleCommandTestCase,
+)
+from classrooms.tests.test_middleware import QueryTimingMiddlewareTestCase
+from classrooms.tests.test_metrics import MetricsExpositionTestCase, MetricsEndpointTestCase
+from classrooms.tests.test_http_extract import (
+    HttpExtractParsingTestCase, SectionParsingTestCase, HttpExtractServerTestCase,
+)
+from classrooms.tests.test_scrape_queue import ScrapeQueueTestCase
+from classrooms.tests.test_browser_pool import BrowserPoolTestCase
+from classrooms.tests.test_checkpoint import CheckpointTestCase
 
 # Re-export the test classes
-__all__ = ['LoginTestCase', 'PasswordResetTestCase', 'IntegrationTestCase']
+__all__ = [
+    'LoginTestCase', 'PasswordResetTestCase', 'IntegrationTestCase',
+    'AvailabilityEngineTestCase', 'TimeGridTestCase', 'PopulateAvailabilitiesTestCase', 'AvailableRoomsCacheTestCase',
+    'LoadScheduleTestCase', 'RoomsApiTestCase', 'AvailabilityStreamTestCase',
+    'BookingIntervalsTestCase', 'RoomBookingLookupTestCase', 'CreateBookingTestCase', 'ConcurrentBookingTestCase',
+    'SyntheticDataTestCase', 'BenchmarkCommandTestCase', 'GenerateScheduleCommandTestCase',
+    'QueryTimingMiddlewareTestCase', 'MetricsExpositionTestCase', 'MetricsEndpointTestCase',
+    'HttpExtractParsingTestCase', 'HttpExtractServerTestCase', 'ScrapeQueueTestCase',
+    'SectionParsingTestCase', 'BrowserPoolTestCase', 'CheckpointTestCase',
+]
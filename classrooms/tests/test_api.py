@@ -0,0 +1,212 @@
+import asyncio
+from datetime import date, datetime, time
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from classrooms.models import College, Building, Room, RoomBooking
+from classrooms.utils.availability_builder import rebuild_availabilities
+from classrooms.utils.availability_events import availability_events, notify_subscribers
+
+
+def local_datetime(*args):
+    """Aware datetime in the project time zone, for patching timezone.now."""
+    return timezone.make_aware(datetime(*args))
+
+
+class RoomsApiTestCase(TestCase):
+    """
+    Test case for the JSON room endpoints and their conditional GET support.
+    """
+
+    def setUp(self):
+        """
+        Set up a college with two free rooms and an empty cache.
+        """
+        cache.clear()
+        self.client = Client()
+        self.available_url = reverse('api_available_rooms')
+        self.all_rooms_url = reverse('api_all_rooms')
+
+        self.user = User.objects.create_user(username='student', password='securepassword123')
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.room = Room.objects.create(name='101', college=self.college, building=self.building)
+        Room.objects.create(name='102', college=self.college, building=self.building)
+        rebuild_availabilities()
+
+        patcher = patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 9, 1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_available_rooms_json(self):
+        """
+        Test that the endpoint returns the free rooms with a strong ETag.
+        """
+        response = self.client.get(self.available_url, {'college': 'City College'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual({room['name'] for room in response.json()['rooms']}, {'101', '102'})
+        self.assertTrue(response['ETag'].startswith('"'))
+
+    def test_unchanged_poll_returns_not_modified(self):
+        """
+        Test that polling with the previous ETag returns 304 with an empty body.
+        """
+        response = self.client.get(self.available_url)
+        response = self.client.get(self.available_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_booking_changes_etag(self):
+        """
+        Test that a new booking changes the ETag so clients fetch the new list.
+        """
+        etag = self.client.get(self.available_url)['ETag']
+        RoomBooking.objects.create(
+            user=self.user, room=self.room, college=self.college, building=self.building,
+            booking_date=date(2025, 3, 3), start_time=time(9, 0), end_time=time(10, 0)
+        )
+        response = self.client.get(self.available_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['name'] for room in response.json()['rooms']], ['102'])
+
+    def test_etag_is_built_from_database_state(self):
+        """
+        Test that every process computes the same ETag and that it changes with the data version in the database.
+        """
+        available_etag = self.client.get(self.available_url)['ETag']
+        all_rooms_etag = self.client.get(self.all_rooms_url)['ETag']
+        cache.clear()  # Another worker, with its own local memory cache
+        self.assertEqual(self.client.get(self.available_url)['ETag'], available_etag)
+
+        booking = RoomBooking.objects.create(
+            user=self.user, room=self.room, college=self.college, building=self.building,
+            booking_date=date(2025, 3, 3), start_time=time(9, 0), end_time=time(10, 0)
+        )
+        response = self.client.get(self.available_url, HTTP_IF_NONE_MATCH=available_etag)
+        self.assertEqual(response.status_code, 200)
+        booked_etag = response['ETag']
+        booking.active = False
+        booking.save()
+        self.assertNotEqual(self.client.get(self.available_url, HTTP_IF_NONE_MATCH=booked_etag).status_code, 304)
+
+        Room.objects.create(name='103', college=self.college, building=self.building)
+        response = self.client.get(self.all_rooms_url, HTTP_IF_NONE_MATCH=all_rooms_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([room['name'] for room in response.json()['rooms']], ['101', '102', '103'])
+
+    def test_polls_read_the_data_version_once(self):
+        """
+        Test that a 304 poll and a cached 200 each make a single primary-key query.
+        """
+        etag = self.client.get(self.available_url)['ETag']
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.available_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.available_url).status_code, 200)
+
+    def test_all_rooms_json(self):
+        """
+        Test that the all rooms endpoint lists every room and honours conditional GET.
+        """
+        response = self.client.get(self.all_rooms_url, {'buildings': 'Shepard Hall'})
+        self.assertEqual([room['name'] for room in response.json()['rooms']], ['101', '102'])
+        response = self.client.get(
+            self.all_rooms_url, {'buildings': 'Shepard Hall'}, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class AvailabilityStreamTestCase(TestCase):
+    """
+    Test case for the Server-Sent Events availability stream.
+    """
+
+    def setUp(self):
+        """
+        Set up a college with one free room at a fixed time.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='securepassword123')
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.room = Room.objects.create(name='101', college=self.college, building=self.building)
+        rebuild_availabilities()
+
+        patcher = patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 9, 1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def book_room(self):
+        """
+        Book the room for the current hour.
+        """
+        RoomBooking.objects.create(
+            user=self.user, room=self.room, college=self.college, building=self.building,
+            booking_date=date(2025, 3, 3), start_time=time(9, 0), end_time=time(10, 0)
+        )
+
+    async def test_stream_sends_snapshot_then_booking_delta(self):
+        """
+        Test that the stream starts with a snapshot and pushes a booked event after a booking.
+        """
+        events = availability_events(college='City College')
+        try:
+            snapshot = await asyncio.wait_for(anext(events), timeout=5)
+            self.assertTrue(snapshot.startswith('event: snapshot\n'))
+            self.assertIn('"state":"free"', snapshot)
+
+            await sync_to_async(self.book_room)()
+            notify_subscribers()
+
+            delta = await asyncio.wait_for(anext(events), timeout=5)
+            self.assertTrue(delta.startswith('event: booked\n'))
+            self.assertIn('"name":"101"', delta)
+        finally:
+            await events.aclose()
+
+    async def test_stream_view_sends_first_event_over_asgi(self):
+        """
+        Test that the stream endpoint, served over ASGI, responds with an unbuffered event stream starting with a snapshot.
+        """
+        response = await self.async_client.get(reverse('availability_stream'), {'college': 'City College'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        self.assertTrue(response.streaming)
+        events = aiter(response.streaming_content)
+        try:
+            snapshot = await asyncio.wait_for(anext(events), timeout=5)
+        finally:
+            await events.aclose()
+        self.assertTrue(snapshot.startswith(b'event: snapshot\n'))
+        self.assertIn(b'"name":"101"', snapshot)
+
+    def test_stream_view_is_not_served_over_wsgi(self):
+        """
+        Test that the stream endpoint answers 501 under WSGI, which would buffer the endless stream forever.
+        """
+        response = self.client.get(reverse('availability_stream'))
+        self.assertEqual(response.status_code, 501)
+        self.assertFalse(response.streaming)
+
+    async def test_heartbeat_does_not_recompute_states(self):
+        """
+        Test that a heartbeat between block boundaries only sends a comment and does not query the rooms again.
+        """
+        with patch('classrooms.utils.availability_events.HEARTBEAT_SECONDS', 0.01), \
+                patch('classrooms.utils.availability_events.get_room_states', return_value={}) as get_room_states:
+            events = availability_events(college='City College')
+            try:
+                await asyncio.wait_for(anext(events), timeout=5)
+                self.assertEqual(await asyncio.wait_for(anext(events), timeout=5), ': heartbeat\n\n')
+                self.assertEqual(await asyncio.wait_for(anext(events), timeout=5), ': heartbeat\n\n')
+            finally:
+                await events.aclose()
+        self.assertEqual(get_room_states.call_count, 1)
@@ -0,0 +1,481 @@
+from datetime import date, datetime, time
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, SimpleTestCase
+from django.utils import timezone
+
+from django.contrib.auth.models import User
+
+from classrooms.models import College, Building, Room, Schedule, RoomAvailability, RoomBooking
+from classrooms.utils.availability import (
+    BLOCKS_PER_DAY, block_for_time, free_until, free_until_index, is_free, is_free_for,
+    lookup_free_until, pack_mask, span_mask, time_for_block, unpack_mask,
+)
+from classrooms.utils.availability_builder import (
+    compile_epochs, compile_masks, compile_rows, merge_intervals, rebuild_availabilities,
+)
+from classrooms.utils.availability_matrix import HAS_NUMPY
+from classrooms.utils.availability_cache import (
+    bump_data_version, data_version, get_cached_available_rooms, seconds_until_next_block
+)
+from classrooms.utils.empty_rooms import get_available_rooms
+from classrooms.utils.time_grid import WEEKDAYS, TimeGrid
+
+
+def local_datetime(*args):
+    """Aware datetime in the project time zone, for patching timezone.now."""
+    return timezone.make_aware(datetime(*args))
+
+
+class AvailabilityEngineTestCase(SimpleTestCase):
+    """
+    Test case for the bitset helpers in classrooms.utils.availability.
+    """
+
+    def test_block_round_trip(self):
+        """
+        Test that times map to 5-minute blocks since 8am and back.
+        """
+        self.assertEqual(block_for_time(time(8, 0)), 0)
+        self.assertEqual(block_for_time(time(9, 52)), 22)
+        self.assertEqual(time_for_block(22), time(9, 50))
+        self.assertEqual(time_for_block(BLOCKS_PER_DAY), time(20, 0))
+
+    def test_span_mask_covers_overlapping_blocks(self):
+        """
+        Test that a class marks every block it overlaps, clipped to the school day.
+        """
+        mask = span_mask(time(9, 0), time(9, 50))
+        self.assertFalse(is_free(mask, 12))
+        self.assertFalse(is_free(mask, 21))
+        self.assertTrue(is_free(mask, 22))
+        self.assertTrue(is_free(mask, 11))
+
+        self.assertEqual(span_mask(time(7, 0), time(8, 5)), 1)
+        self.assertEqual(span_mask(time(20, 0), time(21, 0)), 0)
+
+    def test_free_until(self):
+        """
+        Test that free_until finds the next occupied block or None.
+        """
+        mask = span_mask(time(10, 0), time(11, 0))
+        self.assertEqual(free_until(mask, 0), 24)
+        self.assertEqual(free_until(mask, 24), 24)
+        self.assertIsNone(free_until(mask, 36))
+
+    def test_is_free_for(self):
+        """
+        Test that is_free_for checks a window of minutes from the given block.
+        """
+        mask = span_mask(time(10, 0), time(11, 0))
+        self.assertTrue(is_free_for(mask, 0, 120))
+        self.assertFalse(is_free_for(mask, 0, 125))
+        self.assertTrue(is_free_for(mask, 36, 600))
+
+    def test_blocks_outside_the_day_are_free(self):
+        """
+        Test that every helper treats blocks before opening and after closing the same way as lookup_free_until.
+        """
+        mask = span_mask(time(8, 0), time(8, 30))  # Occupied from the first block
+        index = free_until_index(mask)
+        early = block_for_time(time(7, 30))
+        self.assertLess(early, 0)
+        for block in (early, -1, BLOCKS_PER_DAY, BLOCKS_PER_DAY + 3):
+            with self.subTest(block=block):
+                self.assertTrue(is_free(mask, block))
+                self.assertEqual(free_until(mask, block), lookup_free_until(index, block))
+        self.assertEqual(free_until(mask, early), 0)
+        self.assertTrue(is_free_for(mask, early, 30))
+        self.assertFalse(is_free_for(mask, early, 35))
+
+    def test_pack_round_trip(self):
+        """
+        Test that masks survive serialisation, including memoryview input.
+        """
+        mask = span_mask(time(8, 0), time(20, 0))
+        self.assertEqual(unpack_mask(pack_mask(mask)), mask)
+        self.assertEqual(unpack_mask(memoryview(pack_mask(mask))), mask)
+
+    def test_free_until_index_matches_mask(self):
+        """
+        Test that the precomputed free-until index agrees with the bitmask for every block.
+        """
+        mask = (
+            span_mask(time(8, 30), time(9, 20))
+            | span_mask(time(13, 0), time(14, 15))
+            | span_mask(time(19, 55), time(20, 0))
+        )
+        index = free_until_index(mask)
+        self.assertEqual(len(index), BLOCKS_PER_DAY * 2)
+        for block in range(BLOCKS_PER_DAY):
+            self.assertEqual(lookup_free_until(index, block), free_until(mask, block))
+        self.assertIsNone(lookup_free_until(free_until_index(0), 10))
+
+    def test_merge_intervals(self):
+        """
+        Test that overlapping and touching classes are merged by the sweep.
+        """
+        intervals = [
+            (time(9, 0), time(9, 50)),
+            (time(9, 30), time(10, 15)),
+            (time(10, 15), time(11, 0)),
+            (time(13, 0), time(14, 0)),
+        ]
+        self.assertEqual(merge_intervals(intervals), [
+            [time(9, 0), time(11, 0)],
+            [time(13, 0), time(14, 0)],
+        ])
+
+    def test_compile_masks_groups_by_room_and_day(self):
+        """
+        Test that sorted schedule rows compile into masks per room and weekday.
+        """
+        term = (date(2025, 1, 27), date(2025, 5, 20))
+        rows = [
+            (1, 'Mo', time(9, 0), time(9, 50), *term),
+            (1, 'Mo', time(10, 0), time(10, 50), *term),
+            (1, 'Sa', time(9, 0), time(9, 50), *term),
+            (2, 'We', time(12, 0), time(13, 0), *term),
+        ]
+        masks = compile_masks(rows)
+        self.assertEqual(set(masks), {(1, 0), (2, 2)})
+        self.assertEqual(masks[(1, 0)], [
+            (date.min, date(2025, 1, 26), 0),
+            (*term, span_mask(time(9, 0), time(9, 50)) | span_mask(time(10, 0), time(10, 50))),
+            (date(2025, 5, 21), date.max, 0),
+        ])
+
+    def test_compile_epochs_splits_on_course_dates(self):
+        """
+        Test that a 7-week course and a full-term course produce separate epochs.
+        """
+        full_term = (time(9, 0), time(9, 50), date(2025, 1, 27), date(2025, 5, 20))
+        first_half = (time(11, 0), time(12, 0), date(2025, 1, 27), date(2025, 3, 14))
+        epochs = compile_epochs([full_term, first_half])
+        both = span_mask(time(9, 0), time(9, 50)) | span_mask(time(11, 0), time(12, 0))
+        self.assertEqual(epochs, [
+            (date.min, date(2025, 1, 26), 0),
+            (date(2025, 1, 27), date(2025, 3, 14), both),
+            (date(2025, 3, 15), date(2025, 5, 20), span_mask(time(9, 0), time(9, 50))),
+            (date(2025, 5, 21), date.max, 0),
+        ])
+
+    @skipUnless(HAS_NUMPY, 'NumPy is not installed')
+    def test_vectorised_compile_matches_python(self):
+        """
+        Test that the NumPy builder produces the same rows as the pure-Python one.
+        """
+        schedule_rows = [
+            (1, 'Mo', time(7, 30), time(8, 20), date(2025, 1, 27), date(2025, 5, 20)),
+            (1, 'Mo', time(9, 0), time(10, 15), date(2025, 1, 27), date(2025, 3, 14)),
+            (1, 'Mo', time(9, 30), time(9, 52), date(2025, 3, 17), date(2025, 5, 20)),
+            (1, 'Mo', time(19, 30), time(21, 0), date(2025, 1, 27), date(2025, 5, 20)),
+            (1, 'Sa', time(9, 0), time(10, 0), date(2025, 1, 27), date(2025, 5, 20)),
+            (1, 'We', time(12, 0), time(13, 0), date(2025, 5, 20), date(2025, 1, 27)),
+            (2, 'Fr', time(14, 0), time(14, 0), date(2025, 1, 27), date.max),
+            (3, 'Tu', time(11, 0), time(12, 0), date(2025, 1, 27), date(2025, 5, 20)),
+        ]
+        rooms = [(1, 10, 100), (2, 10, 100), (4, 11, 100)]
+        self.assertEqual(
+            sorted(compile_rows(schedule_rows, rooms, vectorised=True)),
+            sorted(compile_rows(schedule_rows, rooms, vectorised=False))
+        )
+
+
+class TimeGridTestCase(SimpleTestCase):
+    """
+    Test case for the configurable time grid in classrooms.utils.time_grid.
+    """
+
+    def test_default_grid(self):
+        """
+        Test that the default grid is 5-minute blocks on weekdays from 8am to 8pm.
+        """
+        grid = TimeGrid()
+        self.assertEqual((grid.blocks_per_day, grid.mask_bytes), (144, 18))
+        self.assertEqual(grid.weekdays, {'Mo': 0, 'Tu': 1, 'We': 2, 'Th': 3, 'Fr': 4})
+        self.assertEqual(str(grid), 'Mo, Tu, We, Th, Fr 8:00 to 20:00')
+
+    def test_other_resolutions_and_days(self):
+        """
+        Test 1 and 15-minute grids, weekend days and opening hours.
+        """
+        self.assertEqual(TimeGrid(block_minutes=1).blocks_per_day, 720)
+        grid = TimeGrid(block_minutes=15, day_start='07:30', day_end='24:00', days=['Su', 'Sa', 'Mo'])
+        self.assertEqual((grid.blocks_per_day, grid.mask_bytes), (66, 9))
+        self.assertEqual(grid.weekdays, {'Mo': 0, 'Sa': 5, 'Su': 6})
+        self.assertTrue(grid.is_open(local_datetime(2025, 3, 8, 23, 59)))  # Saturday
+        self.assertTrue(grid.is_open(local_datetime(2025, 3, 9, 7, 30)))  # Sunday
+        self.assertFalse(grid.is_open(local_datetime(2025, 3, 9, 7, 29)))
+        self.assertFalse(grid.is_open(local_datetime(2025, 3, 4, 12, 0)))  # Tuesday
+
+    def test_invalid_grids_are_rejected(self):
+        """
+        Test that blocks not dividing the day, empty days and unknown day codes raise.
+        """
+        for settings in [
+            {'block_minutes': 7},
+            {'block_minutes': 0},
+            {'day_start': '20:00', 'day_end': '08:00'},
+            {'day_end': '24:30'},
+            {'day_start': '8am'},
+            {'days': []},
+            {'days': ['Mo', 'Sat']},
+        ]:
+            with self.subTest(**settings), self.assertRaises(ImproperlyConfigured):
+                TimeGrid(**settings)
+
+    def test_weekend_days_are_compiled(self):
+        """
+        Test that both builders keep classes on weekend days added to the grid.
+        """
+        schedule_rows = [
+            (1, 'Sa', time(9, 0), time(10, 0), date.min, date.max),
+            (1, 'Su', time(12, 0), time(13, 0), date.min, date.max),
+        ]
+        rooms = [(1, 10, 100), (2, 10, 100)]
+        with patch.dict(WEEKDAYS, {'Sa': 5, 'Su': 6}):
+            rows = sorted(compile_rows(schedule_rows, rooms, vectorised=False))
+            if HAS_NUMPY:
+                self.assertEqual(sorted(compile_rows(schedule_rows, rooms, vectorised=True)), rows)
+        self.assertEqual(len(rows), 2 * 7)
+        masks = {(room_id, weekday): unpack_mask(occupancy) for room_id, _, _, weekday, _, _, occupancy, _ in rows}
+        self.assertEqual(masks[(1, 5)], span_mask(time(9, 0), time(10, 0)))
+        self.assertEqual(masks[(1, 6)], span_mask(time(12, 0), time(13, 0)))
+        self.assertEqual(masks[(2, 6)], 0)
+
+
+class PopulateAvailabilitiesTestCase(TestCase):
+    """
+    Test case for the populate_availabilities command and the index page query.
+    """
+
+    def setUp(self):
+        """
+        Set up a college with two rooms, one of which has a Monday morning class.
+        """
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.busy_room = Room.objects.create(name='101', college=self.college, building=self.building)
+        self.free_room = Room.objects.create(name='102', college=self.college, building=self.building)
+        Schedule.objects.create(
+            room=self.busy_room, day='Mo',
+            start_time=time(9, 0), end_time=time(9, 50),
+            start_date=date(2025, 1, 27), end_date=date(2025, 5, 20),
+        )
+        call_command('populate_availabilities', stdout=StringIO())
+
+    def test_one_row_per_room_and_weekday(self):
+        """
+        Test that the command stores a single bitmask row per room and weekday for any date.
+        """
+        # The Monday class adds rows for the dates before and after its term
+        self.assertEqual(RoomAvailability.objects.count(), 2 * 5 + 2)
+        self.assertEqual(RoomAvailability.objects.on(date(2025, 3, 3)).count(), 2)
+        monday = RoomAvailability.objects.on(date(2025, 3, 3)).get(room=self.busy_room)
+        self.assertEqual(unpack_mask(monday.occupancy), span_mask(time(9, 0), time(9, 50)))
+
+    def test_room_free_outside_class_dates(self):
+        """
+        Test that a room is free on a class's weekday once its term has ended.
+        """
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 6, 2, 9, 30)):
+            rooms = {room['name'] for room in get_available_rooms()}
+        self.assertEqual(rooms, {'101', '102'})
+
+    def test_rooms_sorted_by_longest_availability(self):
+        """
+        Test that rooms free the longest come first, comparing times numerically.
+        """
+        late_room = Room.objects.create(name='103', college=self.college, building=self.building)
+        Schedule.objects.create(
+            room=late_room, day='Mo',
+            start_time=time(10, 0), end_time=time(11, 0),
+            start_date=date(2025, 1, 27), end_date=date(2025, 5, 20),
+        )
+        rebuild_availabilities()
+
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 8, 15)):
+            rooms = get_available_rooms()
+        self.assertEqual(
+            [(room['name'], room['available_until']) for room in rooms],
+            [('102', '23:59'), ('103', '10:00'), ('101', '9:00')]
+        )
+
+    def test_scoped_rebuild_only_replaces_given_rooms(self):
+        """
+        Test that passing room ids recomputes those rooms and leaves the others alone.
+        """
+        untouched_ids = set(RoomAvailability.objects.filter(room=self.busy_room).values_list('id', flat=True))
+        Schedule.objects.create(
+            room=self.free_room, day='Tu',
+            start_time=time(12, 0), end_time=time(13, 0),
+            start_date=date(2025, 1, 27), end_date=date(2025, 5, 20),
+        )
+
+        created = rebuild_availabilities(room_ids=[self.free_room.id])
+
+        self.assertEqual(created, 5 + 2)
+        self.assertEqual(RoomAvailability.objects.count(), 2 * 5 + 4)
+        self.assertEqual(
+            set(RoomAvailability.objects.filter(room=self.busy_room).values_list('id', flat=True)),
+            untouched_ids
+        )
+        tuesday = RoomAvailability.objects.on(date(2025, 3, 4)).get(room=self.free_room)
+        self.assertEqual(unpack_mask(tuesday.occupancy), span_mask(time(12, 0), time(13, 0)))
+
+    def test_parallel_rebuild_matches_serial(self):
+        """
+        Test that compiling the masks in worker processes writes the same rows.
+        """
+        def snapshot():
+            return set(RoomAvailability.objects.values_list(
+                'room_id', 'weekday', 'valid_from', 'valid_to', 'occupancy', 'free_until'
+            ))
+
+        serial = snapshot()
+        out = StringIO()
+        call_command('populate_availabilities', '--workers', '2', stdout=out)
+        self.assertIn('Created weekly patterns with 12 entries', out.getvalue())
+        self.assertEqual(snapshot(), serial)
+
+    def test_negative_workers_are_rejected(self):
+        """
+        Test that a negative --workers is an error instead of a silent serial rebuild.
+        """
+        with self.assertRaises(CommandError):
+            call_command('populate_availabilities', '--workers', '-1', stdout=StringIO())
+
+    def test_available_rooms_excludes_scheduled_room(self):
+        """
+        Test that a room with a class in progress is not listed as available.
+        """
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 9, 30)):
+            rooms = get_available_rooms()
+        self.assertEqual([room['name'] for room in rooms], ['102'])
+        self.assertEqual(rooms[0]['available_until'], '23:59')
+
+    def test_available_until_next_class(self):
+        """
+        Test that a free room reports when its next class starts.
+        """
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 8, 15)):
+            rooms = {room['name']: room for room in get_available_rooms()}
+        self.assertEqual(rooms['101']['available_until'], '9:00')
+
+    def test_booked_room_is_not_available(self):
+        """
+        Test that a room booked right now is hidden and an upcoming booking shortens availability.
+        """
+        user = User.objects.create_user(username='student', password='securepassword123')
+        booking = dict(user=user, college=self.college, building=self.building, booking_date=date(2025, 3, 3))
+        RoomBooking.objects.create(room=self.free_room, start_time=time(8, 0), end_time=time(8, 30), **booking)
+        RoomBooking.objects.create(room=self.busy_room, start_time=time(8, 40), end_time=time(8, 50), **booking)
+
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 8, 15)):
+            rooms = {room['name']: room for room in get_available_rooms()}
+        self.assertNotIn('102', rooms)
+        self.assertEqual(rooms['101']['available_until'], '8:40')
+
+    def test_cancelled_booking_is_ignored(self):
+        """
+        Test that a cancelled booking does not hide the room.
+        """
+        user = User.objects.create_user(username='student', password='securepassword123')
+        RoomBooking.objects.create(
+            user=user, room=self.free_room, college=self.college, building=self.building,
+            booking_date=date(2025, 3, 3), start_time=time(8, 0), end_time=time(8, 30), active=False
+        )
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 8, 15)):
+            rooms = {room['name'] for room in get_available_rooms()}
+        self.assertIn('102', rooms)
+
+    def test_query_count_does_not_grow_with_rooms(self):
+        """
+        Test that the index page query count is constant however many rooms are free.
+        """
+        for number in range(10):
+            Room.objects.create(name=f'2{number:02d}', college=self.college, building=self.building)
+        rebuild_availabilities()
+
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 8, 15)):
+            with self.assertNumQueries(2):
+                rooms = get_available_rooms()
+        self.assertEqual(len(rooms), 12)
+
+
+class AvailableRoomsCacheTestCase(TestCase):
+    """
+    Test case for the time-bucketed cache of the available rooms list.
+    """
+
+    def setUp(self):
+        """
+        Set up one free room and an empty cache.
+        """
+        cache.clear()
+        self.user = User.objects.create_user(username='student', password='securepassword123')
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.room = Room.objects.create(name='101', college=self.college, building=self.building)
+        rebuild_availabilities()
+
+    def test_seconds_until_next_block(self):
+        """
+        Test that entries expire at the next 5-minute boundary.
+        """
+        self.assertEqual(seconds_until_next_block(local_datetime(2025, 3, 3, 9, 0, 0)), 300)
+        self.assertEqual(seconds_until_next_block(local_datetime(2025, 3, 3, 9, 7, 30)), 150)
+
+    def test_repeat_requests_hit_the_cache(self):
+        """
+        Test that a second request in the same block only reads the data version, or nothing when it is passed in.
+        """
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 9, 1)):
+            first = get_cached_available_rooms(college='City College')
+        with patch('django.utils.timezone.now', return_value=local_datetime(2025, 3, 3, 9, 3)):
+            with self.assertNumQueries(1):
+                second = get_cached_available_rooms(college='City College')
+            version = data_version()  # As read by the request's ETag function
+            with self.assertNumQueries(0):
+                third = get_cached_available_rooms(college='City College', version=version)
+        self.assertEqual(first, second)
+        self.assertEqual(first, third)
+
+    def test_booking_invalidates_the_cache(self):
+        """
+        Test that saving a booking makes the next request recompute the list.
+        """
+        now = local_datetime(2025, 3, 3, 9, 1)
+        with patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(len(get_cached_available_rooms()), 1)
+            RoomBooking.objects.create(
+                user=self.user, room=self.room, college=self.college, building=self.building,
+                booking_date=date(2025, 3, 3), start_time=time(9, 0), end_time=time(10, 0)
+            )
+            self.assertEqual(get_cached_available_rooms(), [])
+
+    def test_booking_made_by_another_process_invalidates_the_cache(self):
+        """
+        Test that a booking whose data version bump was made elsewhere, as by another worker, invalidates the cached list.
+        """
+        now = local_datetime(2025, 3, 3, 9, 1)
+        with patch('django.utils.timezone.now', return_value=now):
+            self.assertEqual(len(get_cached_available_rooms()), 1)
+            booking = RoomBooking(
+                user=self.user, room=self.room, college=self.college, building=self.building,
+                booking_date=date(2025, 3, 3), start_time=time(9, 0), end_time=time(10, 0)
+            )
+            RoomBooking.objects.bulk_create([booking])  # No signal, so no bump yet
+            self.assertEqual(len(get_cached_available_rooms()), 1)
+            bump_data_version()
+            self.assertEqual(get_cached_available_rooms(), [])
+            RoomBooking.objects.filter(pk=booking.pk).update(active=False)  # Cancelled elsewhere
+            bump_data_version()
+            self.assertEqual(len(get_cached_available_rooms()), 1)
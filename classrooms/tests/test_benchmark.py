@@ -0,0 +1,131 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, SimpleTestCase
+
+from classrooms.models import Room, RoomAvailability, RoomBooking, Schedule
+from classrooms.utils.synthetic_data import CSV_FIELDS, generate_schedule_rows, write_schedule_csv
+
+
+class SyntheticDataTestCase(SimpleTestCase):
+    """
+    Test case for the synthetic schedule generator.
+    """
+
+    def test_rows_match_schedule_csv_format(self):
+        """
+        Test that generated rows use the load_schedule CSV columns and formats.
+        """
+        out = StringIO()
+        count = write_schedule_csv(out, generate_schedule_rows(colleges=1, buildings=1, rooms=2, sections=3))
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual(len(rows), count)
+        self.assertEqual(list(rows[0]), CSV_FIELDS)
+        self.assertEqual(rows[0]['start_date'], '01/27/2025')
+        self.assertRegex(rows[0]['start_time'], r'^\d\d:\d\d [AP]M$')
+
+    def test_generation_is_reproducible(self):
+        """
+        Test that the same seed generates the same rows.
+        """
+        self.assertEqual(list(generate_schedule_rows(seed=3, rooms=2)), list(generate_schedule_rows(seed=3, rooms=2)))
+
+
+class BenchmarkCommandTestCase(TestCase):
+    """
+    Test case for the benchmark management command.
+    """
+
+    def test_benchmark_reports_every_path_and_rolls_back(self):
+        """
+        Test that every hot path is measured on its own and the synthetic data is not kept.
+        """
+        out = StringIO()
+        with patch('classrooms.management.commands.load_schedule.call_command') as load_schedule_rebuild:
+            call_command(
+                'benchmark', '--colleges', '1', '--buildings', '2', '--rooms', '3', '--bookings', '10',
+                '--repeat', '1', '--json', stdout=out
+            )
+        load_schedule_rebuild.assert_not_called()  # The import is measured without the rebuild
+        report = json.loads(out.getvalue())
+        self.assertEqual(
+            [result['name'] for result in report['results']],
+            ['load_schedule', 'populate_availabilities', 'get_available_rooms',
+             'get_available_rooms (one college)', 'get_all_rooms', 'get_all_rooms (one college)']
+        )
+        self.assertGreater(report['schedule_rows'], 0)
+        self.assertTrue(all(result['queries'] > 0 for result in report['results']))
+
+        self.assertFalse(Room.objects.exists())
+        self.assertFalse(RoomAvailability.objects.exists())
+        self.assertFalse(RoomBooking.objects.exists())
+
+
+class GenerateScheduleCommandTestCase(TestCase):
+    """
+    Test case for the generate_schedule management command.
+    """
+
+    def setUp(self):
+        """
+        Reserve a temporary output path.
+        """
+        handle, self.csv_path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+
+    def tearDown(self):
+        """
+        Remove the generated CSV file.
+        """
+        os.remove(self.csv_path)
+
+    def test_generated_file_loads(self):
+        """
+        Test that the generated CSV can be imported by load_schedule.
+        """
+        call_command(
+            'generate_schedule', self.csv_path, '--colleges', '1', '--buildings', '2', '--rooms', '2',
+            '--sections', '4', stdout=StringIO()
+        )
+        out = StringIO()
+        call_command('load_schedule', self.csv_path, '--bulk', stdout=out)
+        self.assertNotIn('Error', out.getvalue())
+        self.assertEqual(Room.objects.count(), 4)
+        self.assertTrue(Schedule.objects.exists())
+
+    def test_patterns_and_date_ranges(self):
+        """
+        Test that only the requested meeting patterns and date ranges are generated.
+        """
+        out = StringIO()
+        call_command(
+            'generate_schedule', '-', '--rooms', '3', '--pattern', 'TuTh=2', '--pattern', 'MoWeFr',
+            '--date-range', '01/27/2025:03/14/2025', stdout=out, stderr=StringIO()
+        )
+        rows = list(csv.DictReader(StringIO(out.getvalue())))
+        self.assertEqual({row['days'] for row in rows}, {'TuTh', 'MoWeFr'})
+        self.assertEqual({(row['start_date'], row['end_date']) for row in rows}, {('01/27/2025', '03/14/2025')})
+
+    def test_invalid_pattern(self):
+        """
+        Test that weekend or malformed meeting patterns are rejected.
+        """
+        with self.assertRaises(CommandError):
+            call_command('generate_schedule', self.csv_path, '--pattern', 'SaSu=1')
+
+    def test_invalid_pattern_weights(self):
+        """
+        Test that zero, negative and non-numeric pattern weights are rejected before any row is generated.
+        """
+        for weights in (['MoWe=0', 'TuTh=0'], ['MoWe=2', 'TuTh=-1'], ['MoWe=0'], ['MoWe=nan'], ['MoWe=x']):
+            with self.subTest(weights=weights):
+                with self.assertRaises(CommandError):
+                    call_command('generate_schedule', self.csv_path, *(
+                        argument for weight in weights for argument in ('--pattern', weight)
+                    ))
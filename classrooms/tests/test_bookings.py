@@ -0,0 +1,238 @@
+import threading
+import time as clock
+from datetime import date, datetime, time
+from unittest.mock import patch
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, SimpleTestCase, TransactionTestCase
+from django.utils import timezone
+
+from classrooms.forms import RoomBookingForm
+from classrooms.models import College, Building, Room, RoomBooking, RoomDayLock
+from classrooms.utils import bookings
+from classrooms.utils.bookings import (
+    BookingConflictError, BookingIntervals, create_booking, get_room_day_bookings, group_bookings_by_room,
+)
+
+
+class BookingIntervalsTestCase(SimpleTestCase):
+    """
+    Test case for the sorted booking lookups in classrooms.utils.bookings.
+    """
+
+    def setUp(self):
+        """
+        Set up back-to-back morning bookings and a separate afternoon booking.
+        """
+        self.intervals = BookingIntervals([
+            (time(14, 0), time(15, 0)),
+            (time(9, 0), time(10, 0)),
+            (time(10, 0), time(11, 0)),
+        ])
+
+    def test_overlaps_is_inclusive(self):
+        """
+        Test that touching or overlapping intervals conflict and disjoint ones do not.
+        """
+        self.assertTrue(self.intervals.overlaps(time(8, 0), time(9, 0)))
+        self.assertTrue(self.intervals.overlaps(time(10, 30), time(10, 45)))
+        self.assertTrue(self.intervals.overlaps(time(13, 0), time(16, 0)))
+        self.assertFalse(self.intervals.overlaps(time(11, 30), time(13, 30)))
+        self.assertFalse(self.intervals.overlaps(time(15, 30), time(16, 0)))
+
+    def test_booked_at_and_next_start(self):
+        """
+        Test the "booked now" check and the next booking start.
+        """
+        self.assertTrue(self.intervals.booked_at(time(9, 30)))
+        self.assertFalse(self.intervals.booked_at(time(12, 0)))
+        self.assertEqual(self.intervals.next_start_after(time(12, 0)), time(14, 0))
+        self.assertIsNone(self.intervals.next_start_after(time(14, 0)))
+
+    def test_next_free_follows_back_to_back_bookings(self):
+        """
+        Test that the next free time skips over consecutive bookings.
+        """
+        self.assertEqual(self.intervals.next_free(time(9, 30)), time(11, 0))
+        self.assertEqual(self.intervals.next_free(time(14, 30)), time(15, 0))
+        self.assertEqual(self.intervals.next_free(time(12, 0)), time(12, 0))
+
+    def test_nested_bookings(self):
+        """
+        Test that a long booking hiding shorter ones inside it is still detected.
+        """
+        intervals = BookingIntervals([(time(9, 0), time(17, 0)), (time(10, 0), time(10, 30))])
+        self.assertTrue(intervals.overlaps(time(12, 0), time(12, 30)))
+        self.assertEqual(intervals.next_free(time(10, 15)), time(17, 0))
+        self.assertFalse(BookingIntervals().booked_at(time(9, 0)))
+
+
+class RoomBookingLookupTestCase(TestCase):
+    """
+    Test case for loading BookingIntervals from RoomBooking rows.
+    """
+
+    def setUp(self):
+        """
+        Set up two rooms with one active and one cancelled booking.
+        """
+        self.user = User.objects.create_user(username='student', password='securepassword123')
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.room = Room.objects.create(name='101', college=self.college, building=self.building)
+        self.other_room = Room.objects.create(name='102', college=self.college, building=self.building)
+        self.day = date(2025, 3, 3)
+
+        for room, active in ((self.room, True), (self.other_room, False)):
+            RoomBooking.objects.create(
+                user=self.user, room=room, college=self.college, building=self.building,
+                booking_date=self.day, start_time=time(9, 0), end_time=time(10, 0), active=active
+            )
+
+    def test_room_day_bookings_ignore_cancelled(self):
+        """
+        Test that only active bookings on the requested day are loaded.
+        """
+        self.assertTrue(get_room_day_bookings(self.room, self.day).booked_at(time(9, 30)))
+        self.assertEqual(len(get_room_day_bookings(self.other_room, self.day)), 0)
+        self.assertEqual(len(get_room_day_bookings(self.room, date(2025, 3, 4))), 0)
+
+    def test_room_day_bookings_keep_booking_objects(self):
+        """
+        Test that with_bookings loads the bookings and their users in the same single query.
+        """
+        with self.assertNumQueries(1):
+            day_bookings = get_room_day_bookings(self.room, self.day, with_bookings=True)
+            self.assertEqual([booking.user.username for booking in day_bookings.bookings], ['student'])
+        self.assertTrue(day_bookings.booked_at(time(9, 30)))
+        self.assertIsNone(get_room_day_bookings(self.room, self.day).bookings)
+
+    def test_group_bookings_by_room(self):
+        """
+        Test that a booking queryset is grouped into one BookingIntervals per room.
+        """
+        grouped = group_bookings_by_room(RoomBooking.objects.all())
+        self.assertEqual(set(grouped), {self.room.id, self.other_room.id})
+        self.assertTrue(grouped[self.other_room.id].booked_at(time(9, 0)))
+
+
+class CreateBookingTestCase(TestCase):
+    """
+    Test case for creating bookings under the per room/day lock.
+    """
+
+    def setUp(self):
+        """
+        Set up a room with a 9:00-10:00 booking.
+        """
+        self.user = User.objects.create_user(username='student', password='securepassword123')
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.room = Room.objects.create(name='101', college=self.college, building=self.building)
+        self.day = date(2025, 3, 3)
+        self.first = create_booking(self.booking(time(9, 0), time(10, 0)))
+
+    def booking(self, start_time, end_time):
+        """
+        Build an unsaved booking of the room.
+        """
+        return RoomBooking(
+            user=self.user, room=self.room, college=self.college, building=self.building,
+            booking_date=self.day, start_time=start_time, end_time=end_time
+        )
+
+    def test_overlapping_booking_is_rejected(self):
+        """
+        Test that an overlapping booking raises and is not saved.
+        """
+        with self.assertRaises(BookingConflictError):
+            create_booking(self.booking(time(9, 30), time(10, 30)))
+        self.assertEqual(RoomBooking.objects.count(), 1)
+
+    def test_free_time_is_booked_under_lock(self):
+        """
+        Test that a free slot is booked and every attempt takes the room/day lock.
+        """
+        create_booking(self.booking(time(11, 0), time(12, 0)))
+        self.assertEqual(RoomBooking.objects.count(), 2)
+        self.assertEqual(RoomDayLock.objects.get(room=self.room, date=self.day).version, 2)
+
+    def test_form_checks_overlap_with_day_bookings(self):
+        """
+        Test that the booking form rejects a time overlapping today's BookingIntervals of the room.
+        """
+        data = {'booking_date': '2025-03-03', 'start_time': '09:30', 'end_time': '10:00'}
+        day_bookings = get_room_day_bookings(self.room, self.day)
+        with patch('django.utils.timezone.now', return_value=timezone.make_aware(datetime(2025, 3, 3, 9, 28))):
+            form = RoomBookingForm(data, day_bookings=day_bookings)
+            self.assertFalse(form.is_valid())
+            self.assertIn("This room is already booked for the selected time.", form.non_field_errors())
+            self.assertTrue(RoomBookingForm(data, day_bookings=BookingIntervals()).is_valid())
+
+    def test_cancelled_booking_start_reports_conflict(self):
+        """
+        Test that reusing the start time of a cancelled booking is reported as a conflict, not an error.
+        """
+        self.first.active = False
+        self.first.save()
+        with self.assertRaises(BookingConflictError):
+            create_booking(self.booking(time(9, 0), time(9, 30)))
+        create_booking(self.booking(time(9, 5), time(9, 30)))
+
+
+class ConcurrentBookingTestCase(TransactionTestCase):
+    """
+    Test case for two workers booking the same room at the same moment, each on its own database connection.
+    """
+
+    def setUp(self):
+        """
+        Set up a room with no bookings.
+        """
+        self.user = User.objects.create_user(username='student', password='securepassword123')
+        self.college = College.objects.create(name='City College')
+        self.building = Building.objects.create(name='Shepard Hall', college=self.college)
+        self.room = Room.objects.create(name='101', college=self.college, building=self.building)
+        self.day = date(2025, 3, 3)
+
+    def test_only_one_overlapping_booking_wins(self):
+        """
+        Test that of two overlapping bookings submitted together exactly one is saved and the other conflicts.
+        """
+        read_bookings = bookings.get_room_day_bookings
+
+        def slow_read(room, day):
+            # Widen the window between the conflict check and the save, where an unlocked path double-books
+            intervals = read_bookings(room, day)
+            clock.sleep(0.2)
+            return intervals
+
+        barrier = threading.Barrier(2)
+        results = []
+
+        def book(start_time, end_time):
+            barrier.wait()
+            try:
+                create_booking(RoomBooking(
+                    user=self.user, room=self.room, college=self.college, building=self.building,
+                    booking_date=self.day, start_time=start_time, end_time=end_time
+                ))
+                results.append('booked')
+            except BookingConflictError:
+                results.append('conflict')
+            finally:
+                connection.close()
+
+        with patch('classrooms.utils.bookings.get_room_day_bookings', slow_read):
+            threads = [
+                threading.Thread(target=book, args=(time(9, 0), time(10, 0))),
+                threading.Thread(target=book, args=(time(9, 30), time(10, 30))),
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(results), ['booked', 'conflict'])
+        self.assertEqual(RoomBooking.objects.filter(room=self.room).count(), 1)
@@ -0,0 +1,143 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from classrooms.cunyScheduleETL.browser_pool import BrowserPool, PageLease
+
+
+class FakePage:
+    def __init__(self):
+        self.timeout = None
+
+    def set_default_timeout(self, timeout):
+        self.timeout = timeout
+
+
+class FakeContext:
+    def __init__(self, browser, options):
+        self.browser = browser
+        self.options = options
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self, options):
+        self.options = options
+        self.connected = True
+        self.contexts = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        context = FakeContext(self, options)
+        self.contexts.append(context)
+        return context
+
+    async def close(self):
+        self.connected = False
+
+
+class FakePlaywright:
+    """Stands in for the object returned by async_playwright(), recording launched browsers."""
+
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self, **options):
+        browser = FakeBrowser(options)
+        self.launched.append(browser)
+        return browser
+
+
+class BrowserPoolTestCase(SimpleTestCase):
+    """
+    Test case for the scraper's browser and context pool.
+    """
+
+    def setUp(self):
+        """
+        Set up a fake Playwright.
+        """
+        self.playwright = FakePlaywright()
+
+    def test_browsers_are_launched_once_and_shared(self):
+        """
+        Test that contexts are spread over the browsers launched when the pool starts, and all are closed at exit.
+        """
+        async def scrape():
+            async with BrowserPool(self.playwright, browsers=2, timeout=1000, launch_options={'headless': True},
+                                   context_options={'viewport': None}) as pool:
+                leases = [PageLease(pool) for _ in range(4)]
+                for lease in leases:
+                    await lease.open()
+                return leases
+
+        leases = asyncio.run(scrape())
+        self.assertEqual(len(self.playwright.launched), 2)
+        self.assertEqual([len(browser.contexts) for browser in self.playwright.launched], [2, 2])
+        self.assertEqual(self.playwright.launched[0].options, {'headless': True})
+        self.assertEqual(leases[0].context.options, {'viewport': None})
+        self.assertEqual(leases[0].page.timeout, 1000)
+        self.assertTrue(all(lease.context.closed for lease in leases))
+        self.assertFalse(any(browser.connected for browser in self.playwright.launched))
+
+    def test_contexts_are_recycled_after_max_jobs_or_an_error(self):
+        """
+        Test that a lease gets a fresh context after max_jobs jobs and after a failed job.
+        """
+        async def scrape():
+            async with BrowserPool(self.playwright, browsers=1, max_jobs=3) as pool:
+                lease = PageLease(pool)
+                await lease.open()
+                contexts = [lease.context]
+                for failed in (False, False, False, False, True):
+                    await lease.job_done(failed)
+                    contexts.append(lease.context)
+                return contexts
+
+        contexts = asyncio.run(scrape())
+        self.assertEqual(len(set(contexts)), 3)
+        self.assertIs(contexts[2], contexts[0])  # Two jobs done, still the first context
+        self.assertIsNot(contexts[3], contexts[0])  # Third job: replaced
+        self.assertIsNot(contexts[5], contexts[4])  # Failed job: replaced
+        self.assertTrue(contexts[0].closed)
+
+    def test_crashed_browser_is_relaunched(self):
+        """
+        Test that a disconnected browser is replaced before a new context is opened in it.
+        """
+        async def scrape():
+            async with BrowserPool(self.playwright, browsers=1) as pool:
+                self.playwright.launched[0].connected = False
+                lease = PageLease(pool)
+                await lease.open()
+                return lease.context
+
+        with self.assertLogs('classrooms.cunyScheduleETL.browser_pool', 'WARNING'):
+            context = asyncio.run(scrape())
+        self.assertEqual(len(self.playwright.launched), 2)
+        self.assertIs(context.browser, self.playwright.launched[1])
+
+    def test_pool_is_closed_when_scraping_fails(self):
+        """
+        Test that contexts and browsers are closed when the scrape raises.
+        """
+        async def scrape():
+            async with BrowserPool(self.playwright, browsers=2) as pool:
+                lease = PageLease(pool)
+                await lease.open()
+                self.context = lease.context
+                raise RuntimeError('Target page, context or browser has been closed')
+
+        with self.assertRaises(RuntimeError):
+            asyncio.run(scrape())
+        self.assertTrue(self.context.closed)
+        self.assertFalse(any(browser.connected for browser in self.playwright.launched))
@@ -0,0 +1,139 @@
+import csv
+import os
+import shutil
+import tempfile
+import time
+
+from django.test import SimpleTestCase
+
+from classrooms.cunyScheduleETL.checkpoint import MANIFEST_NAME, Manifest
+from classrooms.cunyScheduleETL.sections import CSV_FIELDS
+
+TERM = '2025 Spring Term'
+SUBJECTS = [('ACCT', 'Accounting'), ('MATH', 'Mathematics'), ('PHIL', 'Philosophy')]
+
+
+def rows(subject, count):
+    """CSV rows of a City College subject."""
+    return [
+        ['City College', TERM, subject, str(54320 + i), 'Course', 'NAC', f'4/{i}', '1/27/2025', '5/20/2025', 'Mo',
+         '9:30AM', '10:45AM']
+        for i in range(count)
+    ]
+
+
+class CheckpointTestCase(SimpleTestCase):
+    """
+    Test case for the checkpoint manifest that lets the async scraper resume.
+    """
+
+    def setUp(self):
+        """
+        Create a term directory with a manifest path and a college CSV file.
+        """
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.manifest_path = os.path.join(self.directory, MANIFEST_NAME)
+        self.csv_path = os.path.join(self.directory, 'City College.csv')
+
+    def scrape(self, manifest, subject, count):
+        """
+        Append a subject's rows to the CSV file and record it, like search_subject does.
+        """
+        new = not os.path.exists(self.csv_path)
+        with open(self.csv_path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            if new:
+                writer.writerow(CSV_FIELDS)
+            writer.writerows(rows(subject, count))
+        manifest.record('City College', TERM, subject, rows(subject, count))
+
+    def read(self):
+        """
+        Rows of the CSV file, header included.
+        """
+        with open(self.csv_path, newline='') as file:
+            return list(csv.reader(file))
+
+    def test_rerun_skips_finished_subjects(self):
+        """
+        Test that finished subjects and college subject lists survive a restart and are not searched again.
+        """
+        manifest = Manifest(self.manifest_path)
+        manifest.record_subjects('City College', TERM, SUBJECTS)
+        self.scrape(manifest, 'Accounting', 2)
+        manifest.record('City College', TERM, 'Mathematics', [])  # No results
+
+        manifest = Manifest(self.manifest_path)
+        self.assertEqual(manifest.resume(self.directory, TERM), 2)
+        self.assertEqual(manifest.subjects('City College', TERM), SUBJECTS)
+        self.assertEqual(manifest.pending('City College', TERM, SUBJECTS), [('PHIL', 'Philosophy')])
+        self.assertEqual(self.read(), [CSV_FIELDS] + rows('Accounting', 2))
+        self.assertFalse(os.path.exists(f'{self.manifest_path}.tmp'))
+
+    def test_rows_of_unfinished_subjects_are_removed(self):
+        """
+        Test that rows written before a crash, including a half-written row, are removed so a rerun adds no duplicates.
+        """
+        manifest = Manifest(self.manifest_path)
+        self.scrape(manifest, 'Accounting', 2)
+        with open(self.csv_path, 'a', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerows(rows('Mathematics', 3))  # Crashed before it was recorded
+            file.write('City College,2025 Spring Term,Philosophy,543')
+
+        manifest = Manifest(self.manifest_path)
+        with self.assertLogs('classrooms.cunyScheduleETL.checkpoint'):
+            self.assertEqual(manifest.resume(self.directory, TERM), 1)
+        self.assertEqual(self.read(), [CSV_FIELDS] + rows('Accounting', 2))
+
+        self.scrape(manifest, 'Mathematics', 3)
+        self.assertEqual(Manifest(self.manifest_path).resume(self.directory, TERM), 2)
+        self.assertEqual(self.read(), [CSV_FIELDS] + rows('Accounting', 2) + rows('Mathematics', 3))
+
+    def test_stale_and_altered_subjects_are_fetched_again(self):
+        """
+        Test that subjects older than max_age or whose rows no longer match their hash are forgotten.
+        """
+        manifest = Manifest(self.manifest_path)
+        manifest.record_subjects('City College', TERM, SUBJECTS)
+        self.scrape(manifest, 'Accounting', 2)
+        self.scrape(manifest, 'Mathematics', 2)
+        self.scrape(manifest, 'Philosophy', 1)
+        manifest.units[f'City College|{TERM}|Accounting']['completed_at'] = time.time() - 7200
+        manifest.colleges[f'City College|{TERM}']['completed_at'] = time.time() - 7200
+        manifest.save()
+        with open(self.csv_path) as file:
+            lines = file.readlines()
+        with open(self.csv_path, 'w') as file:
+            file.writelines(lines[:-1])  # Drop the Philosophy row
+
+        manifest = Manifest(self.manifest_path, max_age=3600)
+        with self.assertLogs('classrooms.cunyScheduleETL.checkpoint'):
+            self.assertEqual(manifest.resume(self.directory, TERM), 1)
+        self.assertIsNone(manifest.subjects('City College', TERM))
+        self.assertEqual(manifest.pending('City College', TERM, SUBJECTS), [('ACCT', 'Accounting'), ('PHIL', 'Philosophy')])
+        self.assertEqual(self.read(), [CSV_FIELDS] + rows('Mathematics', 2))
+
+    def test_records_are_appended_to_the_log(self):
+        """
+        Test that each record appends one line instead of rewriting the manifest, and that a line cut short is ignored.
+        """
+        manifest = Manifest(self.manifest_path)
+        manifest.record_subjects('City College', TERM, SUBJECTS)
+        self.scrape(manifest, 'Accounting', 2)
+        with open(self.manifest_path) as file:
+            first_lines = file.readlines()
+        self.scrape(manifest, 'Mathematics', 1)
+        with open(self.manifest_path) as file:
+            lines = file.readlines()
+        self.assertEqual(lines[:2], first_lines)
+        self.assertEqual(len(lines), 3)
+
+        with open(self.manifest_path, 'a') as file:
+            file.write(lines[-1][:20])  # Crashed mid-write
+        manifest = Manifest(self.manifest_path)
+        self.assertEqual(manifest.pending('City College', TERM, SUBJECTS), [('PHIL', 'Philosophy')])
+        self.assertEqual(manifest.resume(self.directory, TERM), 2)
+        with open(self.manifest_path) as file:
+            self.assertEqual(len(file.readlines()), 3)
@@ -0,0 +1,256 @@
+import asyncio
+import csv
+import os
+import tempfile
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+from django.test import SimpleTestCase
+
+from classrooms.cunyScheduleETL.http_extract import college_names, configure_search, extract, find_form, parse_results
+from classrooms.cunyScheduleETL.sections import CSV_FIELDS, cell_lines, row_entries, section_entries
+from classrooms.utils import metrics
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures' / 'global_search'
+SEARCH_PATH = '/CFGlobalSearchTool/search.jsp'
+CONTROLLER_PATH = '/CFGlobalSearchTool/CFSearchToolController'
+COLLEGES = {'BAR01': 'Baruch College', 'CTY01': 'City College'}
+RESULT_SUBJECTS = {'MATH'}  # Subjects with sections in results.html; the others return no results
+
+
+def fixture(name):
+    """Contents of a saved Global Search page."""
+    return (FIXTURES / name).read_text()
+
+
+MATH_ENTRIES = [
+    ['54321', 'Calculus I', 'NAC', '4/221', '1/27/2025', '5/20/2025', 'MoWe', '9:30AM', '10:45AM'],
+    ['54322', 'Calculus I', 'Shepard Hall', '201', '1/27/2025', '3/14/2025', 'Mo', '2:00PM', '3:15PM'],
+    ['54322', 'Calculus I', 'Shepard Hall', '201', '1/27/2025', '5/20/2025', 'We', '2:00PM', '3:15PM'],
+    ['54330', 'Calculus II', 'Marshak Science & Tech', '1026', '1/27/2025', '5/20/2025', 'TuTh', '11:00AM', '12:15PM'],
+]
+
+
+class GlobalSearchHandler(BaseHTTPRequestHandler):
+    """
+    Stand-in for the Global Search tool: serves the saved pages and, like the
+    real tool, keeps the selected college and term in a cookie session.
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_page(self, html, cookie=None):
+        body = html.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if cookie:
+            self.send_header('Set-Cookie', f'JSESSIONID={cookie}; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def search_page(self, session):
+        """The institution/term page, with the session's selections checked like the real tool."""
+        html = fixture('search.html')
+        if 'college' in session:
+            html = html.replace(f'value="{session["college"]}">', f'value="{session["college"]}" checked>')
+            html = html.replace(f'value="{session["term"]}">', f'value="{session["term"]}" selected>')
+        return html
+
+    def do_GET(self):
+        if self.path != SEARCH_PATH:
+            return self.send_error(404)
+        with self.server.lock:
+            session_id = str(len(self.server.sessions) + 1)
+            self.server.sessions[session_id] = {}
+        self.send_page(self.search_page({}), cookie=session_id)
+
+    def do_POST(self):
+        cookie = SimpleCookie(self.headers.get('Cookie', ''))
+        session = self.server.sessions.get(cookie['JSESSIONID'].value if 'JSESSIONID' in cookie else None)
+        if self.path != CONTROLLER_PATH or session is None:
+            return self.send_error(403)
+        fields = parse_qs(self.rfile.read(int(self.headers['Content-Length'])).decode())
+
+        if 'next_btn' in fields:
+            if len(fields.get('inst_selection', [])) != 1 or not fields.get('term_value'):
+                return self.send_error(400)
+            session.update(college=fields['inst_selection'][0], term=fields['term_value'][0])
+            self.send_page(fixture('criteria.html'))
+        elif 'search_btn_search' in fields:
+            subject = fields['subject_name'][0]
+            with self.server.lock:
+                self.server.searches.append((COLLEGES[session['college']], subject, fields))
+            if subject in RESULT_SUBJECTS:
+                self.send_page(fixture('results.html'))
+            else:
+                self.send_page(fixture('criteria.html').replace(
+                    '<!-- message -->', '<p>The search returns no results that match the criteria specified.</p>'
+                ))
+        elif 'repeat_search' in fields:
+            self.send_page(self.search_page(session))
+        else:
+            self.send_error(400)
+
+
+class HttpExtractParsingTestCase(SimpleTestCase):
+    """
+    Test case for the form and results parsing of the HTTP extraction backend.
+    """
+
+    def test_search_form_is_filled_like_a_browser(self):
+        """
+        Test that colleges are found by label and submitted with the term and the Next button.
+        """
+        form = find_form(fixture('search.html'), 'Term', ('select',))
+        self.assertEqual(form.name, 'searchform')
+        self.assertEqual(college_names(form), ['Baruch College', 'City College'])
+        self.assertEqual([value for value, _ in form.options('Term')], ['', '1259', '1256', '1252'])
+
+        form.check('City College')
+        form.select('Term', '1252')
+        self.assertEqual(form.data('Next'), [
+            ('selectedInstName', ''), ('inst_selection', 'CTY01'), ('term_value', '1252'), ('next_btn', 'Next'),
+        ])
+
+    def test_search_criteria_are_configured(self):
+        """
+        Test that the open classes switch is turned off and the in-person and hybrid modes are selected.
+        """
+        form = configure_search(find_form(fixture('criteria.html'), 'Subject', ('select',)))
+        form.select('Subject', 'MATH')
+        self.assertEqual(form.data('Search'), [
+            ('subject_name', 'MATH'), ('courseCareer', ''),
+            ('instructionMode', 'HF'), ('instructionMode', 'HS'), ('instructionMode', 'P'), ('instructionMode', 'HA'),
+            ('search_btn_search', 'Search'),
+        ])
+
+    def test_results_rows_become_csv_entries(self):
+        """
+        Test that every meeting in a room becomes an entry and TBA, online and malformed meetings are skipped.
+        """
+        rows = parse_results(fixture('results.html'))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][2], ['Mo 2:00PM - 3:15PM', 'We 2:00PM - 3:15PM'])
+
+        with self.assertLogs('classrooms.cunyScheduleETL.sections', 'ERROR'):
+            entries = [
+                entry for cells in rows for entry in section_entries(cells, 'City College', '2025 Spring Term', 'Mathematics')
+            ]
+        self.assertEqual([
+            [entry[field] for field in CSV_FIELDS[3:]] for entry in entries
+        ], MATH_ENTRIES)
+        self.assertEqual(
+            [entries[0][field] for field in CSV_FIELDS[:3]], ['City College', '2025 Spring Term', 'Mathematics']
+        )
+
+    def test_no_results_page(self):
+        """
+        Test that the "no results" page yields no rows.
+        """
+        html = fixture('criteria.html').replace(
+            '<!-- message -->', '<p>The search returns no results that match the criteria specified.</p>'
+        )
+        self.assertEqual(parse_results(html), [])
+
+
+class SectionParsingTestCase(SimpleTestCase):
+    """
+    Test case for the results row parsing shared by the scrapers.
+    """
+
+    def test_cell_lines(self):
+        """
+        Test that a cell's innerHTML is split on <br> and stripped of tags, entities and extra whitespace.
+        """
+        self.assertEqual(cell_lines('<a href="#">54321</a>'), ['54321'])
+        self.assertEqual(cell_lines('Mo 2:00PM - 3:15PM<BR/>\n  We  2:00PM - 3:15PM '), [
+            'Mo 2:00PM - 3:15PM', 'We 2:00PM - 3:15PM',
+        ])
+        self.assertEqual(cell_lines('Marshak Science &amp; Tech 1026'), ['Marshak Science & Tech 1026'])
+
+    def test_browser_rows_match_parsed_rows(self):
+        """
+        Test that the cells returned by the single page.evaluate give the same entries as the HTTP backend.
+        """
+        rows = [
+            ['<a href="#">54321</a>', 'A-LEC Regular', 'MoWe 9:30AM - 10:45AM', 'NAC 4/221', 'Staff', 'In Person',
+             '1/27/2025 - 5/20/2025', '<img src="open.png" alt="Open">', 'Calculus I'],
+            ['<a href="#">54322</a>', 'B-LEC Regular', 'Mo 2:00PM - 3:15PM<br>We 2:00PM - 3:15PM', 'Shepard Hall 201',
+             'Staff', 'In Person', '1/27/2025 - 3/14/2025<br>1/27/2025 - 5/20/2025', '', 'Calculus I'],
+            ['<a href="#">54330</a>', 'C-LEC Regular', '\n  TuTh   11:00AM - 12:15PM\n', 'Marshak Science &amp; Tech 1026',
+             'Staff', 'Hybrid Synchronous', '1/27/2025 - 5/20/2025', '', 'Calculus II'],
+            ['<a href="#">54331</a>', 'D-LEC Regular', 'TBA', 'TBA', 'Staff', 'In Person', '1/27/2025 - 5/20/2025', '',
+             'Calculus II'],
+        ]
+        entries = row_entries(rows, 'City College', '2025 Spring Term', 'Mathematics')
+        self.assertEqual([[entry[field] for field in CSV_FIELDS[3:]] for entry in entries], MATH_ENTRIES)
+
+
+class HttpExtractServerTestCase(SimpleTestCase):
+    """
+    Test case for extracting schedules from a local stand-in for the Global Search tool.
+    """
+
+    def setUp(self):
+        """
+        Start the stand-in server and create an empty output file.
+        """
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), GlobalSearchHandler)
+        self.server.lock = threading.Lock()
+        self.server.sessions = {}
+        self.server.searches = []
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f'http://127.0.0.1:{self.server.server_address[1]}{SEARCH_PATH}'
+
+        handle, self.csv_path = tempfile.mkstemp(suffix='.csv')
+        os.close(handle)
+        self.addCleanup(os.remove, self.csv_path)
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+
+    def extract(self, **kwargs):
+        """
+        Run the extraction against the stand-in server and return the CSV rows.
+        """
+        with self.assertLogs('classrooms.cunyScheduleETL.http_extract'), \
+                self.assertLogs('classrooms.cunyScheduleETL.sections', 'ERROR'):  # The malformed meeting in results.html
+            count = asyncio.run(extract(term='2025 Spring Term', output=self.csv_path, url=self.url, **kwargs))
+        with open(self.csv_path, newline='') as file:
+            rows = list(csv.reader(file))
+        self.assertEqual(count, len(rows) - 1)
+        return rows
+
+    def test_every_college_and_subject_is_extracted(self):
+        """
+        Test that each college is searched in its own session and writes the same rows as the browser scraper.
+        """
+        rows = self.extract(concurrency=2)
+        self.assertEqual(rows[0], CSV_FIELDS)
+        self.assertEqual(sorted(rows[1:]), sorted(
+            [college, '2025 Spring Term', 'Mathematics', *entry]
+            for college in COLLEGES.values() for entry in MATH_ENTRIES
+        ))
+        self.assertEqual(sorted((college, subject) for college, subject, _ in self.server.searches), [
+            (college, subject) for college in sorted(COLLEGES.values()) for subject in ('ACCT', 'MATH', 'PHIL')
+        ])
+        self.assertIn('classrooms_scraper_rows_total{college="City College"} 4\n', metrics.render())
+
+    def test_colleges_and_subjects_can_be_filtered(self):
+        """
+        Test that only the requested colleges and subjects are searched.
+        """
+        rows = self.extract(colleges=['City College'], subjects=['MATH', 'Philosophy'])
+        self.assertEqual(len(rows), 1 + len(MATH_ENTRIES))
+        self.assertEqual([(college, subject) for college, subject, _ in self.server.searches], [
+            ('City College', 'MATH'), ('City College', 'PHIL'),
+        ])
+        self.assertEqual(self.server.searches[0][2]['instructionMode'], ['HF', 'HS', 'P', 'HA'])
+        self.assertNotIn('open_class', self.server.searches[0][2])
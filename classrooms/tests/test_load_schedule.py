@@ -0,0 +1,159 @@
+import os
+import tempfile
+from datetime import date, time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from classrooms.management.commands.load_schedule import Command as LoadScheduleCommand
+from classrooms.models import ScheduleDump, College, Building, Room, Schedule, RoomAvailability, ImportCheckpoint
+
+CSV_HEADER = 'college_name,term,subject,course_code,course_name,building,room,start_date,end_date,days,start_time,end_time\n'
+CSV_ROWS = [
+    'City College,2025 Spring,ACCT,ACCT 21000,Principles of Accounting I,Shepard Hall,101,01/27/2025,05/20/2025,MoWe,09:00 AM,09:50 AM\n',
+    'City College,2025 Spring,ACCT,ACCT 22000,Principles of Accounting II,Shepard Hall,101,01/27/2025,05/20/2025,TuTh,11:00AM,12:15PM\n',
+    'City College,2025 Spring,BIO,BIO 10100,Biological Foundations I,Marshak,J-101,01/27/2025,05/20/2025,Fr,02:00 PM,04:30 PM\n',
+    'Baruch College,2025 Spring,ACC,ACC 2101,Principles of Accounting,Vertical Campus,10-150,01/27/2025,05/20/2025,MoWe,09:00 AM,09:50 AM\n',
+    'City College,2025 Spring,BIO,BIO 10100,Biological Foundations I,Marshak,J-101,not a date,05/20/2025,Fr,02:00 PM,04:30 PM\n',
+]
+
+
+class LoadScheduleTestCase(TestCase):
+    """
+    Test case for the load_schedule management command.
+    """
+
+    def setUp(self):
+        """
+        Write a small schedule CSV to a temporary file.
+        """
+        handle, self.csv_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as file:
+            file.write(CSV_HEADER)
+            file.writelines(CSV_ROWS)
+
+    def tearDown(self):
+        """
+        Remove the temporary CSV file.
+        """
+        os.remove(self.csv_path)
+
+    def load(self, *args):
+        """
+        Run load_schedule on the temporary CSV and return its output.
+        """
+        out = StringIO()
+        call_command('load_schedule', self.csv_path, *args, stdout=out)
+        return out.getvalue()
+
+    def assert_imported(self):
+        """
+        Check the rows created from the four valid CSV lines.
+        """
+        self.assertEqual(ScheduleDump.objects.count(), 4)
+        self.assertEqual(College.objects.count(), 2)
+        self.assertEqual(Building.objects.count(), 3)
+        self.assertEqual(Room.objects.count(), 3)
+        self.assertEqual(Schedule.objects.count(), 2 + 2 + 1 + 2)
+        self.assertEqual(RoomAvailability.objects.on(date(2025, 3, 3)).count(), 3)
+        self.assertTrue(Schedule.objects.filter(
+            room__name='101', day='Tu', start_time=time(11, 0), end_time=time(12, 15)
+        ).exists())
+
+    def test_row_by_row_import(self):
+        """
+        Test that the default import creates normalized rows and availability.
+        """
+        output = self.load()
+        self.assertIn('Successfully processed 4/5 rows', output)
+        self.assert_imported()
+
+    def test_bulk_import(self):
+        """
+        Test that --bulk produces the same data as the row-by-row import.
+        """
+        output = self.load('--bulk')
+        self.assertIn('Successfully processed 4/5 rows', output)
+        self.assert_imported()
+
+    def test_bulk_import_is_idempotent_for_normalized_models(self):
+        """
+        Test that re-importing the same file in bulk does not duplicate normalized rows.
+        """
+        self.load('--bulk', '--skip-dump')
+        self.load('--bulk', '--skip-dump')
+        self.assertEqual(Room.objects.count(), 3)
+        self.assertEqual(Schedule.objects.count(), 7)
+
+    def test_streaming_import(self):
+        """
+        Test that --stream imports the file chunk by chunk and reports throughput.
+        """
+        output = self.load('--stream', '--chunk-size', '2')
+        self.assertIn('Committed rows 1-2', output)
+        self.assertIn('Committed rows 5-5', output)
+        self.assertIn('Successfully processed 4/5 rows', output)
+        self.assert_imported()
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_streaming_import_resumes_after_crash(self):
+        """
+        Test that --resume continues after the last committed chunk of a failed run.
+        """
+        import_rows = LoadScheduleCommand.import_rows
+        calls = []
+
+        def crash_on_second_chunk(command, rows, options, first_row=1):
+            calls.append(first_row)
+            if len(calls) == 2:
+                raise RuntimeError('worker killed')
+            return import_rows(command, rows, options, first_row)
+
+        with patch.object(LoadScheduleCommand, 'import_rows', crash_on_second_chunk):
+            with self.assertRaises(RuntimeError):
+                self.load('--stream', '--chunk-size', '2')
+        self.assertEqual(ScheduleDump.objects.count(), 2)
+        self.assertEqual(ImportCheckpoint.objects.get().rows_committed, 2)
+
+        output = self.load('--stream', '--chunk-size', '2', '--resume')
+        self.assertIn('Resuming import after row 2', output)
+        self.assert_imported()
+
+    def test_checkpoint_is_committed_with_its_chunk(self):
+        """
+        Test that a crash while recording progress rolls the chunk back too, so --resume inserts no duplicate dump rows.
+        """
+        save_checkpoint = LoadScheduleCommand.save_checkpoint
+
+        def crash_after_first_chunk(command, csv_file, rows_committed, processed_rows):
+            if rows_committed > 2:
+                raise RuntimeError('worker killed')
+            return save_checkpoint(command, csv_file, rows_committed, processed_rows)
+
+        with patch.object(LoadScheduleCommand, 'save_checkpoint', crash_after_first_chunk):
+            with self.assertRaises(RuntimeError):
+                self.load('--stream', '--chunk-size', '2')
+        self.assertEqual(ScheduleDump.objects.count(), 2)
+
+        self.load('--stream', '--chunk-size', '2', '--resume')
+        self.assert_imported()
+
+    def test_skip_availability(self):
+        """
+        Test that --skip-availability imports the schedule without regenerating availability.
+        """
+        output = self.load('--bulk', '--skip-availability')
+        self.assertIn('Skipping availability population', output)
+        self.assertEqual(Schedule.objects.count(), 7)
+        self.assertFalse(RoomAvailability.objects.exists())
+
+    def test_resume_requires_stream(self):
+        """
+        Test that --resume without --stream is rejected instead of silently ignored.
+        """
+        with self.assertRaises(CommandError):
+            self.load('--bulk', '--resume')
+        self.assertFalse(ScheduleDump.objects.exists())
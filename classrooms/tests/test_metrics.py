@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase, SimpleTestCase, Client
+from django.urls import reverse
+
+from classrooms.models import College, Building, Room
+from classrooms.utils import metrics
+
+
+class MetricsExpositionTestCase(SimpleTestCase):
+    """
+    Test case for the in-process metrics and their Prometheus text format.
+    """
+
+    def setUp(self):
+        """
+        Start from empty metrics and a private METRICS_DIR.
+        """
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.metrics_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.metrics_dir)
+
+    def test_counter_and_histogram_format(self):
+        """
+        Test that counters and cumulative histogram buckets are rendered.
+        """
+        metrics.load_schedule_rows_total.inc(120, mode='bulk')
+        metrics.populate_availabilities_duration_seconds.observe(0.3)
+        metrics.populate_availabilities_duration_seconds.observe(7)
+        text = metrics.render()
+
+        self.assertIn('# TYPE classrooms_load_schedule_rows_total counter\n', text)
+        self.assertIn('classrooms_load_schedule_rows_total{mode="bulk"} 120\n', text)
+        self.assertIn('classrooms_populate_availabilities_duration_seconds_bucket{le="0.25"} 0\n', text)
+        self.assertIn('classrooms_populate_availabilities_duration_seconds_bucket{le="0.5"} 1\n', text)
+        self.assertIn('classrooms_populate_availabilities_duration_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn('classrooms_populate_availabilities_duration_seconds_count 2\n', text)
+        self.assertIn('classrooms_populate_availabilities_duration_seconds_sum 7.3\n', text)
+
+    def test_wrong_labels_are_rejected(self):
+        """
+        Test that updating a metric with the wrong label names raises.
+        """
+        with self.assertRaises(ValueError):
+            metrics.load_schedule_rows_total.inc(college='City College')
+
+    def test_values_of_other_processes_are_added(self):
+        """
+        Test that the files dumped by other processes are merged into the output.
+        """
+        with patch.dict(os.environ, {'METRICS_DIR': self.metrics_dir}):
+            metrics.scraper_rows_total.inc(5, college='City College')
+            metrics.load_schedule_rows_per_second.set(100, mode='stream')
+            with open(os.path.join(self.metrics_dir, 'metrics_1.json'), 'w') as file:
+                json.dump({
+                    'classrooms_scraper_rows_total': [[['City College'], 7], [['Baruch College'], 2]],
+                    'classrooms_load_schedule_rows_per_second': [[['stream'], [50, 0]]],
+                }, file)
+            text = metrics.render()
+
+        self.assertIn('classrooms_scraper_rows_total{college="City College"} 12\n', text)
+        self.assertIn('classrooms_scraper_rows_total{college="Baruch College"} 2\n', text)
+        self.assertIn('classrooms_load_schedule_rows_per_second{mode="stream"} 100\n', text)
+
+    def test_flush_writes_process_file(self):
+        """
+        Test that flushing dumps this process's values to METRICS_DIR.
+        """
+        with patch.dict(os.environ, {'METRICS_DIR': self.metrics_dir}):
+            metrics.populate_availabilities_rows_total.inc(3)
+            metrics.flush()
+        with open(os.path.join(self.metrics_dir, f'metrics_{os.getpid()}.json')) as file:
+            state = json.load(file)
+        self.assertEqual(state['classrooms_populate_availabilities_rows_total'], [[[], 3]])
+
+    def test_recording_does_not_write_to_disk(self):
+        """
+        Test that recording a value leaves the writing to the flush thread instead of the caller.
+        """
+        with patch.dict(os.environ, {'METRICS_DIR': self.metrics_dir}), \
+                patch('classrooms.utils.metrics.FLUSH_INTERVAL', 60):
+            metrics.http_requests_total.inc(view='home', status=200)
+            metrics.http_request_duration_seconds.observe(0.1, view='home')
+        self.assertEqual(os.listdir(self.metrics_dir), [])
+
+    def test_files_of_exited_processes_are_folded(self):
+        """
+        Test that the file of an exited process is removed but its counters are still reported, once.
+        """
+        process = subprocess.Popen([sys.executable, '-c', ''])
+        process.wait()
+        with open(os.path.join(self.metrics_dir, f'metrics_{process.pid}.json'), 'w') as file:
+            json.dump({
+                'classrooms_scraper_rows_total': [[['City College'], 7]],
+                'classrooms_load_schedule_rows_per_second': [[['stream'], [50, 0]]],
+            }, file)
+        with open(os.path.join(self.metrics_dir, f'metrics_{os.getppid()}.json'), 'w') as file:
+            json.dump({'classrooms_scraper_rows_total': [[['City College'], 2]]}, file)
+
+        with patch.dict(os.environ, {'METRICS_DIR': self.metrics_dir}):
+            for _ in range(3):
+                text = metrics.render()
+                self.assertIn('classrooms_scraper_rows_total{college="City College"} 9\n', text)
+                self.assertIn('classrooms_load_schedule_rows_per_second{mode="stream"} 50\n', text)
+        self.assertEqual(
+            sorted(os.listdir(self.metrics_dir)), sorted([f'metrics_{os.getppid()}.json', metrics.EXITED_FILE])
+        )
+
+
+class MetricsEndpointTestCase(TestCase):
+    """
+    Test case for the /metrics endpoint and the metrics recorded by views and commands.
+    """
+
+    def setUp(self):
+        """
+        Set up a room and empty metrics.
+        """
+        metrics.reset()
+        self.addCleanup(metrics.reset)
+        self.client = Client()
+        college = College.objects.create(name='City College')
+        building = Building.objects.create(name='Shepard Hall', college=college)
+        Room.objects.create(name='101', college=college, building=building)
+
+    def test_view_latency_is_exported(self):
+        """
+        Test that requests are counted per view and exported in the text format.
+        """
+        self.client.get(reverse('api_all_rooms'))
+        response = self.client.get(reverse('prometheus_metrics'))
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+        text = response.content.decode()
+        self.assertIn('classrooms_http_requests_total{view="api_all_rooms",status="200"} 1\n', text)
+        self.assertIn('classrooms_http_request_duration_seconds_count{view="api_all_rooms"} 1\n', text)
+
+    def test_populate_availabilities_is_recorded(self):
+        """
+        Test that populate_availabilities reports its duration and row count.
+        """
+        call_command('populate_availabilities', stdout=StringIO())
+        text = metrics.render()
+        self.assertIn('classrooms_populate_availabilities_rows_total 5\n', text)
+        self.assertIn('classrooms_populate_availabilities_duration_seconds_count 1\n', text)
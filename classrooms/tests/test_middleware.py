@@ -0,0 +1,59 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from classrooms.models import College, Building, Room
+from classrooms.utils import request_stats
+
+
+@override_settings(REQUEST_METRICS=True)
+class QueryTimingMiddlewareTestCase(TestCase):
+    """
+    Test case for the per-request timing middleware and its metrics view.
+    """
+
+    def setUp(self):
+        """
+        Set up a room, a staff user and empty request statistics.
+        """
+        request_stats.reset()
+        self.addCleanup(request_stats.reset)
+        self.client = Client()
+        college = College.objects.create(name='City College')
+        building = Building.objects.create(name='Shepard Hall', college=college)
+        Room.objects.create(name='101', college=college, building=building)
+        self.staff = User.objects.create_user(username='admin', password='securepassword123', is_staff=True)
+
+    def test_server_timing_header(self):
+        """
+        Test that responses report total time, DB time and query count.
+        """
+        response = self.client.get(reverse('api_all_rooms'))
+        self.assertRegex(response['Server-Timing'], r'^total;dur=[\d.]+, db;dur=[\d.]+;desc="[1-9]\d* queries"$')
+
+    def test_metrics_view_reports_percentiles(self):
+        """
+        Test that staff users can read the rolling per-view percentiles.
+        """
+        for _ in range(3):
+            self.client.get(reverse('api_all_rooms'))
+        self.client.login(username='admin', password='securepassword123')
+        stats = self.client.get(reverse('request_metrics')).json()['views']['api_all_rooms']
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(set(stats['queries']), {'p50', 'p90', 'p99', 'max'})
+        self.assertGreater(stats['queries']['p50'], 0)
+
+    def test_metrics_view_requires_staff(self):
+        """
+        Test that anonymous users are redirected away from the metrics view.
+        """
+        response = self.client.get(reverse('request_metrics'))
+        self.assertEqual(response.status_code, 302)
+
+    @override_settings(REQUEST_METRICS=False)
+    def test_disabled_by_default(self):
+        """
+        Test that the middleware is skipped when REQUEST_METRICS is off.
+        """
+        response = Client().get(reverse('api_all_rooms'))
+        self.assertFalse(response.has_header('Server-Timing'))
@@ -0,0 +1,78 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from classrooms.cunyScheduleETL.scrape_queue import HostRateLimiter, Job, run_jobs
+
+TERM = {'name': '2025 Spring Term', 'value': '1252'}
+COLLEGES = [{'id': 'CTY01', 'name': 'City College'}, {'id': 'BAR01', 'name': 'Baruch College'}]
+SUBJECTS = {'CTY01': ['ACCT', 'MATH', 'PHIL', 'PHYS', 'CSC'], 'BAR01': ['ACC']}
+
+
+class ScrapeQueueTestCase(SimpleTestCase):
+    """
+    Test case for the scraper's subject job queue and per-host rate limiter.
+    """
+
+    def run_scrape(self, workers, fail=None):
+        """
+        Queue one job per college that lists its subjects; return the handled subject jobs and the failed jobs.
+        """
+        handled = []
+        active = []
+        self.max_active = 0
+        fail = fail or {}
+
+        async def handle(worker, job):
+            active.append(job)
+            self.max_active = max(self.max_active, len(active))
+            await asyncio.sleep(0.001)
+            active.remove(job)
+            if job.subject is None:
+                return [Job(job.college, job.term, (code, code)) for code in SUBJECTS[job.college['id']]]
+            if fail.get(job.subject[0], 0) > 0:
+                fail[job.subject[0]] -= 1
+                raise RuntimeError('Timeout 60000ms exceeded')
+            handled.append((worker, job.subject[0]))
+
+        failed = asyncio.run(run_jobs([Job(college, TERM, None) for college in COLLEGES], workers, handle))
+        return handled, failed
+
+    def test_subjects_are_spread_over_the_workers(self):
+        """
+        Test that the subject jobs queued by each college run on every worker, at most one job per worker at a time.
+        """
+        handled, failed = self.run_scrape(['page 1', 'page 2', 'page 3'])
+        self.assertEqual(failed, [])
+        self.assertEqual(sorted(subject for _, subject in handled), sorted(sum(SUBJECTS.values(), [])))
+        self.assertEqual({worker for worker, _ in handled}, {'page 1', 'page 2', 'page 3'})
+        self.assertEqual(self.max_active, 3)
+
+    def test_failed_jobs_are_retried_then_reported(self):
+        """
+        Test that a job failing once is retried and a job failing every time is returned.
+        """
+        with self.assertLogs('classrooms.cunyScheduleETL.scrape_queue', 'WARNING') as logs:
+            handled, failed = self.run_scrape(['page 1', 'page 2'], fail={'MATH': 1, 'PHYS': 2})
+        self.assertIn('MATH', [subject for _, subject in handled])
+        self.assertEqual([job.subject for job in failed], [('PHYS', 'PHYS')])
+        self.assertEqual(len([line for line in logs.output if line.startswith('ERROR')]), 1)
+
+    def test_rate_limiter_spaces_requests_per_host(self):
+        """
+        Test that requests to one host are spaced by the rate while other hosts are not delayed.
+        """
+        limiter = HostRateLimiter(rate=20)
+
+        async def requests():
+            loop = asyncio.get_running_loop()
+            started = loop.time()
+            await asyncio.gather(*(limiter.wait('https://globalsearch.cuny.edu/search.jsp') for _ in range(4)))
+            same_host = loop.time() - started
+            started = loop.time()
+            await limiter.wait('https://www.cuny.edu/')
+            return same_host, loop.time() - started
+
+        same_host, other_host = asyncio.run(requests())
+        self.assertGreaterEqual(same_host, 3 / 20 - 0.01)
+        self.assertLess(other_host, 0.05)
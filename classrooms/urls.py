@@ -6,6 +6,9 @@ from . import views
 urlpatterns = [
     path('', views.index, name='index'),
     path('all-rooms/', views.all_rooms, name='all_rooms'),
+    path('api/rooms/', views.api_all_rooms, name='api_all_rooms'),
+    path('api/rooms/available/', views.api_available_rooms, name='api_available_rooms'),
+    path('api/rooms/stream/', views.availability_stream, name='availability_stream'),
     path('colleges/', views.colleges, name='colleges'),
     path('colleges/<str:college_name>/buildings/', views.college_buildings, name='college_buildings'),
     path('colleges/<str:college_name>/buildings/<str:building_name>/', views.building_rooms, name='building_rooms'),
@@ -21,4 +24,6 @@ urlpatterns = [
     path('bookings/cancel/<int:booking_id>/', views.cancel_booking, name='cancel_booking'),
     path('password-change/', auth_views.PasswordResetView.as_view(template_name='change_password.html'), name='password_change'),
     path('import-data/', views.import_data, name='import_data'),
+    path('metrics', views.prometheus_metrics, name='prometheus_metrics'),
+    path('metrics/requests/', views.request_metrics, name='request_metrics'),
 ]
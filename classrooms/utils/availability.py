@@ -0,0 +1,114 @@
+"""
+Bitset engine for weekly room availability.
+
+Each RoomAvailability row stores the occupancy of one room on one weekday as a
+packed bitmask: bit ``i`` is set when the room is occupied during the ``i``-th
+block after the start of the day, on the grid configured in settings (see
+classrooms.utils.time_grid; 5-minute blocks from 8:00am by default). "Free now", "free until" and "free for the next N
+minutes" are then answered with a couple of bitwise operations instead of
+scanning one row per block.
+
+Alongside the mask the builder stores a "free until" index: for every block,
+the first occupied block at or after it, so "available until" is a direct
+lookup on the index page.
+"""
+import sys
+from array import array
+from datetime import time
+
+from classrooms.utils.time_grid import (  # noqa: F401 (re-exported)
+    BLOCK_MINUTES, BLOCKS_PER_DAY, DAY_CODES, DAY_END, DAY_START, MASK_BYTES, WEEKDAYS,
+)
+
+
+def minutes_since_start(t):
+    """Minutes between the start of the school day and ``t`` (negative before it)."""
+    return t.hour * 60 + t.minute - DAY_START
+
+
+def block_for_time(t):
+    """Index of the block containing ``t``."""
+    return minutes_since_start(t) // BLOCK_MINUTES
+
+
+def time_for_block(block):
+    """Start time of a block (``BLOCKS_PER_DAY`` maps to the end of the day)."""
+    minutes = DAY_START + block * BLOCK_MINUTES
+    if minutes >= 24 * 60:  # A day ending at midnight
+        return time.max
+    return time(minutes // 60, minutes % 60)
+
+
+def span_mask(start_time, end_time):
+    """
+    Bitmask of every block overlapping the interval [start_time, end_time),
+    clipped to the school day.
+    """
+    first = max(minutes_since_start(start_time) // BLOCK_MINUTES, 0)
+    last = min(-(-minutes_since_start(end_time) // BLOCK_MINUTES), BLOCKS_PER_DAY)  # ceil
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def pack_mask(mask):
+    """Serialise an occupancy bitmask for storage in a BinaryField."""
+    return mask.to_bytes(MASK_BYTES, 'little')
+
+
+def unpack_mask(data):
+    """Inverse of pack_mask; accepts bytes or the memoryview some backends return."""
+    return int.from_bytes(bytes(data), 'little')
+
+
+# Blocks outside the day (negative before it opens, BLOCKS_PER_DAY or more after
+# it closes) are accepted by every helper and count as free, like lookup_free_until.
+
+def is_free(mask, block):
+    """True if the room is not occupied during ``block``."""
+    return block < 0 or not (mask >> block) & 1
+
+
+def free_until(mask, block):
+    """
+    First occupied block at or after ``block``.
+    Returns None when the room stays free for the rest of the day.
+    """
+    block = max(block, 0)
+    remaining = mask >> block
+    if not remaining:
+        return None
+    return block + (remaining & -remaining).bit_length() - 1
+
+
+def is_free_for(mask, block, minutes):
+    """True if the room is free for the next ``minutes`` starting at ``block``."""
+    blocks = -(-minutes // BLOCK_MINUTES)
+    if block < 0:  # Only the part of the window after the day starts can be occupied
+        return not mask & ((1 << max(blocks + block, 0)) - 1)
+    return not mask & (((1 << blocks) - 1) << block)
+
+
+def free_until_index(mask):
+    """
+    Precompute free_until for every block of the day, packed as little-endian
+    uint16 values. BLOCKS_PER_DAY marks "free for the rest of the day".
+    """
+    index = array('H', [BLOCKS_PER_DAY]) * BLOCKS_PER_DAY
+    next_occupied = BLOCKS_PER_DAY
+    for block in range(BLOCKS_PER_DAY - 1, -1, -1):
+        if (mask >> block) & 1:
+            next_occupied = block
+        index[block] = next_occupied
+    if sys.byteorder == 'big':
+        index.byteswap()
+    return index.tobytes()
+
+
+def lookup_free_until(index, block):
+    """free_until read from a precomputed index instead of the mask."""
+    if block >= BLOCKS_PER_DAY:
+        return None
+    offset = max(block, 0) * 2
+    value = int.from_bytes(bytes(index[offset:offset + 2]), 'little')
+    return None if value == BLOCKS_PER_DAY else value
@@ -0,0 +1,201 @@
+"""
+Single-pass builder for RoomAvailability.
+
+All Schedule rows are read once, ordered by room and day, and each room/day's
+classes are merged with a sweep over their start times before being turned
+into an occupancy bitmask. The cost is linear in the number of schedule rows
+instead of rooms x time blocks.
+
+Classes only meet between their start_date and end_date, so each room/day is
+split into date-range "epochs" during which the same set of classes meets
+(e.g. before and after a 7-week course ends). One mask is compiled per epoch
+and stored with its valid_from/valid_to dates, so lookups for any calendar
+date stay a single row per room.
+
+Compiling masks is pure CPU work with no database access, so with
+``workers > 1`` the rooms are split into shards compiled in a process pool
+while the parent process does all reads and writes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from itertools import groupby
+
+import django
+from django.db import transaction
+
+from classrooms.models import Room, Schedule, RoomAvailability
+from classrooms.utils.availability import DAY_CODES, WEEKDAYS, free_until_index, pack_mask, span_mask
+from classrooms.utils.availability_cache import bump_data_version
+from classrooms.utils.availability_matrix import HAS_NUMPY, compile_rows_vectorised
+
+ALWAYS_FREE = [(date.min, date.max, 0)]  # Epochs of a room/day without classes
+
+
+def merge_intervals(intervals):
+    """
+    Merge (start_time, end_time) intervals that are sorted by start time.
+    Overlapping or touching classes collapse into a single interval.
+    """
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def occupancy_mask(intervals):
+    """Bitmask of the blocks covered by (start_time, end_time) intervals sorted by start time."""
+    mask = 0
+    for start, end in merge_intervals(intervals):
+        mask |= span_mask(start, end)
+    return mask
+
+
+def compile_epochs(classes):
+    """
+    Split the calendar into epochs for one room/day.
+
+    ``classes`` are (start_time, end_time, start_date, end_date) tuples sorted
+    by start time. Returns (valid_from, valid_to, mask) tuples covering every
+    date from date.min to date.max, with consecutive epochs that share a mask
+    merged together.
+    """
+    boundaries = {date.min}
+    for _, _, start_date, end_date in classes:
+        boundaries.add(start_date)
+        if end_date < date.max:
+            boundaries.add(end_date + timedelta(days=1))
+    boundaries = sorted(boundaries)
+
+    epochs = []
+    for i, valid_from in enumerate(boundaries):
+        valid_to = boundaries[i + 1] - timedelta(days=1) if i + 1 < len(boundaries) else date.max
+        mask = occupancy_mask(
+            (start, end) for start, end, start_date, end_date in classes
+            if start_date <= valid_from <= end_date
+        )
+        if epochs and epochs[-1][2] == mask:
+            epochs[-1] = (epochs[-1][0], valid_to, mask)
+        else:
+            epochs.append((valid_from, valid_to, mask))
+    return epochs
+
+
+def compile_masks(schedule_rows):
+    """
+    Turn (room_id, day, start_time, end_time, start_date, end_date) rows sorted
+    by room, day and start time into a {(room_id, weekday): epochs} dict (see
+    compile_epochs). Days outside the time grid are ignored.
+    """
+    masks = {}
+    for (room_id, day), rows in groupby(schedule_rows, key=lambda row: (row[0], row[1])):
+        if day not in WEEKDAYS:
+            continue
+        masks[(room_id, WEEKDAYS[day])] = compile_epochs([row[2:] for row in rows])
+    return masks
+
+
+def compile_rows(schedule_rows, rooms, vectorised=HAS_NUMPY):
+    """
+    Compile the RoomAvailability field values of ``rooms``.
+
+    ``schedule_rows`` are as for compile_masks and ``rooms`` are (room_id,
+    building_id, college_id) tuples. Returns (room_id, building_id, college_id,
+    weekday, valid_from, valid_to, occupancy, free_until) tuples. Does not touch
+    the database, so it can run in a worker process. Uses the NumPy version in
+    availability_matrix when NumPy is installed.
+    """
+    if vectorised:
+        return compile_rows_vectorised(schedule_rows, rooms)
+
+    masks = compile_masks(schedule_rows)
+    rows = []
+    for room_id, building_id, college_id in rooms:
+        for weekday in WEEKDAYS.values():
+            for valid_from, valid_to, mask in masks.get((room_id, weekday), ALWAYS_FREE):
+                rows.append((
+                    room_id, building_id, college_id, weekday, valid_from, valid_to,
+                    pack_mask(mask), free_until_index(mask),
+                ))
+    return rows
+
+
+def compile_rows_parallel(schedule_rows, rooms, workers):
+    """
+    compile_rows split over ``workers`` processes.
+
+    Rooms are cut into a few shards per worker so one large college does not
+    leave the other workers idle; each shard gets only its rooms' schedule rows.
+    """
+    rooms = sorted(rooms)
+    rows_by_room = {
+        room_id: list(room_rows) for room_id, room_rows in groupby(schedule_rows, key=lambda row: row[0])
+    }
+    shard_size = max(-(-len(rooms) // (workers * 4)), 1)  # ceil
+    shard_rooms = [rooms[i:i + shard_size] for i in range(0, len(rooms), shard_size)]
+    shard_schedules = [
+        [row for room in shard for row in rows_by_room.get(room[0], ())]
+        for shard in shard_rooms
+    ]
+
+    # Workers set up Django so this module can be imported under any start method
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        rows = []
+        for shard in pool.map(compile_rows, shard_schedules, shard_rooms):
+            rows.extend(shard)
+    return rows
+
+
+def rebuild_availabilities(room_ids=None, batch_size=5000, workers=1):
+    """
+    Regenerate RoomAvailability rows from Schedule.
+
+    When ``room_ids`` is given only those rooms are recomputed and replaced;
+    otherwise every room is. The masks are compiled in ``workers`` processes
+    (see compile_rows_parallel). The old rows are swapped for the new ones
+    inside a single transaction, which also bumps the data version, so readers
+    never see a partially rebuilt table. Returns the number of rows written.
+    """
+    rooms = Room.objects.all()
+    schedules = Schedule.objects.filter(day__in=DAY_CODES)
+    existing = RoomAvailability.objects.all()
+    if room_ids is not None:
+        room_ids = list(room_ids)
+        rooms = rooms.filter(id__in=room_ids)
+        schedules = schedules.filter(room_id__in=room_ids)
+        existing = existing.filter(room_id__in=room_ids)
+
+    schedule_rows = (
+        schedules
+        .order_by('room_id', 'day', 'start_time')
+        .values_list('room_id', 'day', 'start_time', 'end_time', 'start_date', 'end_date')
+        .iterator(chunk_size=batch_size)
+    )
+    rooms = list(rooms.values_list('id', 'building_id', 'college_id'))
+    if workers > 1 and len(rooms) > 1:
+        rows = compile_rows_parallel(schedule_rows, rooms, workers)
+    else:
+        rows = compile_rows(schedule_rows, rooms)
+
+    availabilities = [
+        RoomAvailability(
+            room_id=room_id,
+            building_id=building_id,
+            college_id=college_id,
+            weekday=weekday,
+            valid_from=valid_from,
+            valid_to=valid_to,
+            occupancy=occupancy,
+            free_until=free_until
+        )
+        for room_id, building_id, college_id, weekday, valid_from, valid_to, occupancy, free_until in rows
+    ]
+
+    with transaction.atomic():
+        existing.delete()
+        RoomAvailability.objects.bulk_create(availabilities, batch_size=batch_size)
+        bump_data_version()
+    return len(availabilities)
@@ -0,0 +1,68 @@
+"""
+Caching of the "available rooms now" list.
+
+The list only changes at block boundaries or when bookings/availability change,
+so results are cached per (date, block, college, buildings) until the end of
+the current block. Every key also holds data_version(), the counter of the
+single DataVersion row, which booking saves/deletes and availability rebuilds
+bump in their own transaction. A change made by any process (another web
+worker, a management command) therefore invalidates the cached lists of all of
+them without a shared cache, and checking costs one primary-key lookup; stale
+entries simply expire. Writes that bypass the models' signals (bulk_create,
+queryset update) must call bump_data_version() themselves.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from classrooms.models import DataVersion
+from classrooms.utils.availability import BLOCK_MINUTES, DAY_START, block_for_time
+from classrooms.utils.empty_rooms import get_available_rooms
+
+
+def data_version():
+    """The DataVersion counter, 0 until the first change."""
+    return DataVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def bump_data_version():
+    """Increment the DataVersion counter in the current transaction."""
+    version = DataVersion.objects.filter(pk=1)
+    if version.update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(pk=1, version=1)
+    except IntegrityError:  # Created by a concurrent writer
+        version.update(version=F('version') + 1)
+
+
+def seconds_until_next_block(now):
+    """Seconds left in the block containing ``now``."""
+    elapsed = ((now.hour * 60 + now.minute - DAY_START) % BLOCK_MINUTES) * 60 + now.second
+    return BLOCK_MINUTES * 60 - elapsed
+
+
+def get_cached_available_rooms(college=None, buildings=None, version=None):
+    """
+    get_available_rooms, cached until the next block boundary or data change.
+    Pass the ``version`` already read for this request, e.g. by an ETag
+    function; otherwise it is read here. A hit makes no other query.
+    """
+    if version is None:
+        version = data_version()
+    now = timezone.localtime(timezone.now())
+    # Hash the filters so college/building names are safe in any cache backend's keys
+    filters = hashlib.md5(
+        f"{college or ''}|{'|'.join(sorted(buildings or []))}".encode()
+    ).hexdigest()
+    key = f'available_rooms:{version}:{now.date().isoformat()}:{block_for_time(now.time())}:{filters}'
+
+    available_rooms = cache.get(key)
+    if available_rooms is None:
+        available_rooms = get_available_rooms(college=college, buildings=buildings)
+        cache.set(key, available_rooms, timeout=seconds_until_next_block(now))
+    return available_rooms
@@ -0,0 +1,106 @@
+"""
+Server-Sent Events stream of room availability changes.
+
+Each subscriber keeps the last state it sent for every room (free, occupied or
+booked) and only pushes rooms whose state or "available until" time changed. The stream wakes up at every
+block boundary and whenever a booking signal fires in this process to recompute
+the states; in between it only sends a heartbeat comment so proxies keep the
+connection open.
+"""
+import asyncio
+import json
+import threading
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from classrooms.utils.all_rooms import get_all_rooms
+from classrooms.utils.availability_cache import get_cached_available_rooms, seconds_until_next_block
+from classrooms.utils.empty_rooms import get_booked_rooms, is_school_hours
+
+HEARTBEAT_SECONDS = 25
+
+_subscribers = set()  # (event loop, asyncio.Event) per open stream
+_subscribers_lock = threading.Lock()
+
+
+def notify_subscribers():
+    """Wake every open stream; safe to call from any thread (e.g. a booking signal)."""
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for loop, event in subscribers:
+        loop.call_soon_threadsafe(event.set)
+
+
+def room_key(room):
+    """Stable identifier of a room dict returned by the room queries"""
+    return f"{room['college']}/{room['building']}/{room['name']}"
+
+
+def get_room_states(college=None, buildings=None):
+    """Maps every room matching the filters to its current state and details."""
+    rooms = get_all_rooms(college=college, buildings=buildings)
+
+    is_during_school_hours, _ = is_school_hours()
+    if not is_during_school_hours:
+        return {room_key(room): dict(room, state='free', available_until=None) for room in rooms}
+
+    available = {room_key(room): room for room in get_cached_available_rooms(college=college, buildings=buildings)}
+    booked = {room_key(room) for room in get_booked_rooms(college=college, buildings=buildings)}
+
+    states = {}
+    for room in rooms:
+        key = room_key(room)
+        if key in available:
+            states[key] = dict(room, state='free', available_until=available[key]['available_until'])
+        else:
+            states[key] = dict(room, state='booked' if key in booked else 'occupied', available_until=None)
+    return states
+
+
+def format_event(event, data):
+    """Encode one SSE message"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def availability_events(college=None, buildings=None):
+    """
+    Async generator of SSE messages: a ``snapshot`` of every room first, then
+    ``free``/``occupied``/``booked`` events for rooms whose state changes.
+    """
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    subscriber = (loop, wakeup)
+    with _subscribers_lock:
+        _subscribers.add(subscriber)
+
+    try:
+        previous = await sync_to_async(get_room_states)(college, buildings)
+        yield format_event('snapshot', list(previous.values()))
+
+        while True:
+            now = timezone.localtime(timezone.now())
+            until_block = seconds_until_next_block(now)
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=min(until_block, HEARTBEAT_SECONDS))
+            except asyncio.TimeoutError:
+                if until_block > HEARTBEAT_SECONDS:  # Nothing can have changed, only keep the connection open
+                    yield ': heartbeat\n\n'
+                    continue
+            wakeup.clear()
+
+            current = await sync_to_async(get_room_states)(college, buildings)
+            changed = [
+                room for key, room in current.items()
+                if key not in previous or (
+                    (previous[key]['state'], previous[key]['available_until'])
+                    != (room['state'], room['available_until'])
+                )
+            ]
+            previous = current
+
+            for room in changed:
+                yield format_event(room['state'], room)
+    finally:
+        with _subscribers_lock:
+            _subscribers.discard(subscriber)
@@ -0,0 +1,114 @@
+"""
+NumPy-vectorised version of the availability compile step.
+
+Every (room, weekday, epoch) "cell" becomes one row of a cells x blocks
+matrix. Each class adds +1 at its first block and -1 after its last block
+in every cell it meets in; a cumulative sum along the blocks then gives the
+number of classes in progress, so the whole occupancy matrix is built with a
+couple of array passes instead of Python loops per class and per block.
+The packed masks and free-until indexes are derived from the matrix with
+``packbits`` and a reversed ``minimum.accumulate``.
+
+Produces exactly the same rows as availability_builder.compile_rows, which
+falls back to its pure-Python implementation when NumPy is not installed.
+"""
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency
+    np = None
+
+from classrooms.utils.availability import (
+    BLOCK_MINUTES, BLOCKS_PER_DAY, DAY_START, MASK_BYTES, WEEKDAYS, free_until_index, pack_mask,
+)
+
+HAS_NUMPY = np is not None
+DAYS_PER_WEEK = 7
+DATE_KEY = date.max.toordinal() + 1  # Multiplier that keeps (group, date) keys sortable
+
+
+def _blocks(times, round_up):
+    """Block index of each time, as span_mask computes it (unclipped)."""
+    minutes = np.array([t.hour * 60 + t.minute - DAY_START for t in times], dtype=np.int64)
+    if round_up:
+        return -(-minutes // BLOCK_MINUTES)
+    return minutes // BLOCK_MINUTES
+
+
+def compile_rows_vectorised(schedule_rows, rooms):
+    """
+    Vectorised compile_rows: same arguments and result (see availability_builder).
+    """
+    room_index = {room[0]: i for i, room in enumerate(rooms)}
+    classes = [row for row in schedule_rows if row[1] in WEEKDAYS and row[0] in room_index]
+
+    cells = []  # (room position, weekday, valid_from, valid_to, occupied blocks)
+    if classes:
+        room_ids, days, start_times, end_times, start_dates, end_dates = zip(*classes)
+        group = (np.array([room_index[room_id] for room_id in room_ids], dtype=np.int64) * DAYS_PER_WEEK
+                 + np.array([WEEKDAYS[day] for day in days], dtype=np.int64))
+        start_ord = np.array([d.toordinal() for d in start_dates], dtype=np.int64)
+        end_ord = np.array([d.toordinal() for d in end_dates], dtype=np.int64)
+        first_block = np.clip(_blocks(start_times, round_up=False), 0, BLOCKS_PER_DAY)
+        last_block = np.clip(_blocks(end_times, round_up=True), 0, BLOCKS_PER_DAY)
+
+        # Epoch boundaries of each room/weekday: date.min, every start date and every day after an end date
+        boundaries = np.concatenate([
+            np.unique(group) * DATE_KEY + date.min.toordinal(),
+            group * DATE_KEY + start_ord,
+            (group * DATE_KEY + end_ord + 1)[end_ord < date.max.toordinal()],
+        ])
+        keys = np.unique(boundaries)
+        cell_group = keys // DATE_KEY
+        cell_from = keys % DATE_KEY
+
+        # Cells each class meets in: those whose valid_from falls within its dates
+        first_cell = np.searchsorted(keys, group * DATE_KEY + start_ord)
+        last_cell = np.searchsorted(keys, group * DATE_KEY + end_ord, side='right')
+        cell_count = np.maximum(last_cell - first_cell, 0)  # None if the class ends before it starts
+        class_index = np.repeat(np.arange(len(classes)), cell_count)
+        offsets = np.arange(len(class_index)) - np.repeat(np.cumsum(cell_count) - cell_count, cell_count)
+        cell_index = np.repeat(first_cell, cell_count) + offsets
+
+        # Difference array: +1 where a class starts, -1 where it ends, then a running sum
+        spans = first_block[class_index] < last_block[class_index]
+        diff = np.zeros((len(keys), BLOCKS_PER_DAY + 1), dtype=np.int32)
+        np.add.at(diff, (cell_index[spans], first_block[class_index][spans]), 1)
+        np.add.at(diff, (cell_index[spans], last_block[class_index][spans]), -1)
+        occupied = np.cumsum(diff, axis=1, dtype=np.int32)[:, :BLOCKS_PER_DAY] > 0
+
+        # Merge consecutive epochs of a room/weekday that have the same occupancy
+        keep = np.ones(len(keys), dtype=bool)
+        keep[1:] = (cell_group[1:] != cell_group[:-1]) | (occupied[1:] != occupied[:-1]).any(axis=1)
+        cell_group, cell_from, occupied = cell_group[keep], cell_from[keep], occupied[keep]
+        cell_to = np.full(len(cell_group), date.max.toordinal(), dtype=np.int64)
+        same_group = cell_group[1:] == cell_group[:-1]
+        cell_to[:-1][same_group] = cell_from[1:][same_group] - 1
+
+        # Packed masks (bit i = block i) and, per block, the first occupied block at or after it
+        packed = np.packbits(occupied, axis=1, bitorder='little')
+        block_or_end = np.where(occupied, np.arange(BLOCKS_PER_DAY, dtype='<u2'), np.uint16(BLOCKS_PER_DAY))
+        next_occupied = np.minimum.accumulate(block_or_end[:, ::-1], axis=1)[:, ::-1].astype('<u2')
+
+        packed, next_occupied = packed.tobytes(), next_occupied.tobytes()
+        mask_bytes, index_bytes = MASK_BYTES, BLOCKS_PER_DAY * 2
+        for i, (group_key, valid_from, valid_to) in enumerate(zip(
+                cell_group.tolist(), cell_from.tolist(), cell_to.tolist())):
+            cells.append((
+                *divmod(group_key, DAYS_PER_WEEK),
+                date.fromordinal(valid_from), date.fromordinal(valid_to),
+                packed[i * mask_bytes:(i + 1) * mask_bytes], next_occupied[i * index_bytes:(i + 1) * index_bytes],
+            ))
+
+    rows = []
+    free_mask, free_index = pack_mask(0), free_until_index(0)
+    scheduled = {(room, weekday) for room, weekday, *_ in cells}
+    for room, weekday, valid_from, valid_to, occupancy, free_until in cells:
+        room_id, building_id, college_id = rooms[room]
+        rows.append((room_id, building_id, college_id, weekday, valid_from, valid_to, occupancy, free_until))
+    for room, (room_id, building_id, college_id) in enumerate(rooms):
+        for weekday in WEEKDAYS.values():
+            if (room, weekday) not in scheduled:
+                rows.append((room_id, building_id, college_id, weekday, date.min, date.max, free_mask, free_index))
+    return rows
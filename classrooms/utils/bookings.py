@@ -0,0 +1,135 @@
+"""
+Booking lookups for a room on a given day.
+
+BookingIntervals keeps one room/day's bookings sorted by start time together
+with a running maximum of their end times, so overlap, "currently booked" and
+"next free" questions are answered with a binary search instead of a query or
+a walk over every booking. Times follow the views' inclusive convention: a
+booking from 9:00 to 10:00 covers both 9:00 and 10:00.
+
+create_booking serialises writers per room and day through a RoomDayLock row,
+so two students submitting at the same moment cannot both pass the conflict
+check. On PostgreSQL/MySQL updating the row takes a row lock and other rooms
+are unaffected. SQLite has no row locks: the update takes the database write
+lock, so there every booking transaction waits for the one in progress (up to
+the connection's timeout) rather than only those of the same room and day.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from classrooms.models import RoomBooking, RoomDayLock
+
+
+class BookingConflictError(Exception):
+    """The requested time overlaps an existing booking of the room."""
+
+
+class BookingIntervals:
+    def __init__(self, intervals=()):
+        intervals = sorted(intervals)
+        self.bookings = None  # The RoomBooking objects, sorted by start time, when built with from_bookings
+        self.starts = [start for start, _ in intervals]
+        self.ends = [end for _, end in intervals]
+        # max_ends[i] is the latest end among the first i + 1 bookings
+        self.max_ends = []
+        for end in self.ends:
+            self.max_ends.append(max(end, self.max_ends[-1]) if self.max_ends else end)
+
+    @classmethod
+    def from_bookings(cls, bookings):
+        """BookingIntervals of RoomBooking objects, which are kept in ``bookings``."""
+        bookings = sorted(bookings, key=lambda booking: (booking.start_time, booking.end_time))
+        intervals = cls((booking.start_time, booking.end_time) for booking in bookings)
+        intervals.bookings = bookings
+        return intervals
+
+    def __len__(self):
+        return len(self.starts)
+
+    def _latest_end_starting_by(self, t):
+        """Latest end time of the bookings that start at or before ``t`` (None if there are none)."""
+        i = bisect_right(self.starts, t)
+        return self.max_ends[i - 1] if i else None
+
+    def overlaps(self, start_time, end_time):
+        """True if any booking overlaps [start_time, end_time]."""
+        latest_end = self._latest_end_starting_by(end_time)
+        return latest_end is not None and latest_end >= start_time
+
+    def booked_at(self, t):
+        """True if a booking covers ``t``."""
+        return self.overlaps(t, t)
+
+    def next_start_after(self, t):
+        """Start time of the first booking starting after ``t``, or None."""
+        i = bisect_right(self.starts, t)
+        return self.starts[i] if i < len(self.starts) else None
+
+    def next_free(self, t):
+        """
+        Earliest time at or after ``t`` from which the room is no longer booked,
+        following back-to-back bookings. Returns ``t`` if it is not booked.
+        """
+        while True:
+            latest_end = self._latest_end_starting_by(t)
+            if latest_end is None or latest_end <= t:
+                return t
+            t = latest_end
+
+
+def get_room_day_bookings(room, day, with_bookings=False):
+    """
+    BookingIntervals of a room's active bookings on ``day``. With
+    ``with_bookings`` the RoomBooking objects (and their users) are loaded by
+    the same query and kept in ``bookings``, for pages that list them.
+    """
+    bookings = RoomBooking.objects.filter(room=room, booking_date=day, active=True)
+    if with_bookings:
+        return BookingIntervals.from_bookings(bookings.select_related('user'))
+    return BookingIntervals(bookings.values_list('start_time', 'end_time'))
+
+
+def group_bookings_by_room(bookings):
+    """Map room ids to the BookingIntervals of a RoomBooking queryset."""
+    intervals = defaultdict(list)
+    for room_id, start_time, end_time in bookings.values_list('room_id', 'start_time', 'end_time'):
+        intervals[room_id].append((start_time, end_time))
+    return {room_id: BookingIntervals(room_intervals) for room_id, room_intervals in intervals.items()}
+
+
+def lock_room_day(room, day):
+    """
+    Take the booking lock of a room/day for the current transaction.
+
+    The lock row is written rather than read with select_for_update, which
+    SQLite ignores: there the write is what serialises the transactions.
+    """
+    lock = RoomDayLock.objects.filter(room=room, date=day)
+    if lock.update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            RoomDayLock.objects.create(room=room, date=day, version=1)
+    except IntegrityError:  # Created by a concurrent booking; wait for its lock
+        lock.update(version=F('version') + 1)
+
+
+def create_booking(booking):
+    """
+    Save an unsaved RoomBooking unless it overlaps an active booking of its room.
+    Raises BookingConflictError on overlap.
+    """
+    with transaction.atomic():
+        lock_room_day(booking.room, booking.booking_date)
+        day_bookings = get_room_day_bookings(booking.room, booking.booking_date)
+        if day_bookings.overlaps(booking.start_time, booking.end_time):
+            raise BookingConflictError
+        try:
+            with transaction.atomic():
+                booking.save()
+        except IntegrityError:  # A cancelled booking still holds (room, date, start_time)
+            raise BookingConflictError
+    return booking
@@ -1,19 +1,20 @@
 from django.utils import timezone
-from django.db.models import Subquery, OuterRef, IntegerField, Value
-from django.db.models.functions import Coalesce
 from classrooms.models import RoomAvailability, RoomBooking
+from classrooms.utils.availability import block_for_time, lookup_free_until, time_for_block
+from classrooms.utils.bookings import BookingIntervals, group_bookings_by_room
+from classrooms.utils.time_grid import GRID
 
 
 def is_school_hours():
     """
-    Checks if current time is during school hours (weekdays 8 AM to 8 PM).
+    Checks if current time is during school hours (the days and hours of the
+    availability time grid, weekdays 8 AM to 8 PM by default).
     Returns:
         tuple: (bool, str) - (is_school_hours, message_if_not)
     """
     now = timezone.localtime(timezone.now())
-    weekday = now.weekday()
 
-    if weekday > 4 or not (8 <= now.hour < 20):
+    if not GRID.is_open(now):
         return False, 'All rooms free! ..What are you doing here?'
 
     return True, None
@@ -27,15 +28,10 @@ def get_available_rooms(college=None, buildings=None):
     # now = timezone.datetime(2025, 10, 2, 12, 0)
     # print(now)
 
-    weekday = now.weekday()
-    current_minute_block = (now.hour - 8) * 60 + now.minute
+    current_block = block_for_time(now.time())
 
-    # Base query for current availabilities
-    availabilities = RoomAvailability.objects.filter(
-        weekday=weekday,
-        minute_block=current_minute_block,
-        is_available=True
-    )
+    # One row per room holding today's occupancy and free-until index
+    availabilities = RoomAvailability.objects.on(now.date())
 
     # Apply filters using denormalized fields
     if college:
@@ -43,68 +39,85 @@ def get_available_rooms(college=None, buildings=None):
     if buildings:
         availabilities = availabilities.filter(building__name__in=buildings)
 
-    # Annotate with next occupied time using subquery
-    next_occupied_subquery = (
-        RoomAvailability.objects.filter(
-            room=OuterRef('room'),
-            weekday=weekday,
-            minute_block__gt=current_minute_block,
-            is_available=False
-        )
-        .order_by('minute_block')
-        .values('minute_block')[:1]
+    availabilities = availabilities.select_related('room', 'college', 'building')
+
+    today = now.date()
+    current_time = now.time()
+
+    # Fetch today's remaining bookings for the same rooms in one query
+    bookings = RoomBooking.objects.filter(
+        booking_date=today,
+        end_time__gte=current_time,
+        active=True
     )
-    availabilities = availabilities.annotate(
-        next_occupied=Coalesce(
-            Subquery(next_occupied_subquery),
-            Value(959),  # Default to 11:59 PM if no next occupied
-            output_field=IntegerField()
-        )
-    ).select_related('room', 'college', 'building')
+    if college:
+        bookings = bookings.filter(college__name=college)
+    if buildings:
+        bookings = bookings.filter(building__name__in=buildings)
+
+    bookings_by_room = group_bookings_by_room(bookings)
+    no_bookings = BookingIntervals()
 
     # Build results
     available_rooms = []
     for avail in availabilities:
-        # Check if room is currently booked
-        today = now.date()
-        current_time = now.time()
+        # Precomputed first occupied block at or after now; equal to now means occupied
+        next_occupied = lookup_free_until(avail.free_until, current_block)
+        if next_occupied == current_block:
+            continue
+
+        room_bookings = bookings_by_room.get(avail.room_id, no_bookings)
 
         # Check for bookings that overlap with current time
-        booking_exists = RoomBooking.objects.filter(
-            room=avail.room,
-            booking_date=today,
-            start_time__lte=current_time,
-            end_time__gte=current_time
-        ).exists()
-
-        if not booking_exists:
-            end_hour = 8 + avail.next_occupied // 60
-            end_min = avail.next_occupied % 60
-
-            # Find the next booking that starts after now
-            next_booking = RoomBooking.objects.filter(
-                room=avail.room,
-                booking_date=today,
-                start_time__gt=current_time
-            ).order_by('start_time').first()
-
-            # If there's a booking before the class schedule, adjust available_until
-            if next_booking is not None and (
-                    next_booking.start_time.hour < end_hour or
-                    (next_booking.start_time.hour == end_hour and next_booking.start_time.minute < end_min)
-            ):
-                available_until = f"{next_booking.start_time.hour}:{next_booking.start_time.minute:02d}"
-            else:
-                available_until = f"{end_hour}:{end_min:02d}"
-
-            available_rooms.append({
-                'name': avail.room.name,
-                'college': avail.college.name,
-                'building': avail.building.name,
-                'available_until': available_until
-            })
+        if room_bookings.booked_at(current_time):
+            continue
+
+        if next_occupied is None:
+            end_hour, end_min = 23, 59  # Free for the rest of the day
+        else:
+            end_time = time_for_block(next_occupied)
+            end_hour, end_min = end_time.hour, end_time.minute
+
+        # Find the next booking that starts after now
+        next_booking_start = room_bookings.next_start_after(current_time)
+
+        # If there's a booking before the class schedule, adjust available_until
+        if next_booking_start is not None and (
+                next_booking_start.hour < end_hour or
+                (next_booking_start.hour == end_hour and next_booking_start.minute < end_min)
+        ):
+            end_hour, end_min = next_booking_start.hour, next_booking_start.minute
+
+        available_rooms.append((end_hour * 60 + end_min, {
+            'name': avail.room.name,
+            'college': avail.college.name,
+            'building': avail.building.name,
+            'available_until': f"{end_hour}:{end_min:02d}"
+        }))
 
     # return the rooms sorted by which is available the longest
-    available_rooms.sort(key=lambda x: x['available_until'], reverse=True)
+    available_rooms.sort(key=lambda x: x[0], reverse=True)
+
+    return [room for _, room in available_rooms]
+
+
+def get_booked_rooms(college=None, buildings=None):
+    """Returns list of rooms with an active booking right now."""
+    now = timezone.localtime(timezone.now())
+    current_time = now.time()
+
+    bookings = RoomBooking.objects.filter(
+        booking_date=now.date(),
+        start_time__lte=current_time,
+        end_time__gte=current_time,
+        active=True
+    )
+    if college:
+        bookings = bookings.filter(college__name=college)
+    if buildings:
+        bookings = bookings.filter(building__name__in=buildings)
 
-    return available_rooms
+    return [
+        {'name': name, 'college': college_name, 'building': building_name}
+        for name, college_name, building_name in bookings.values_list('room__name', 'college__name', 'building__name')
+    ]
@@ -0,0 +1,361 @@
+"""
+In-process counters, gauges and histograms rendered in the Prometheus text
+exposition format by the /metrics view.
+
+This module does not import Django, so the scraper scripts can record metrics
+too. Every metric is declared at the bottom of this file so the web process
+knows all of them, including those only updated by management commands.
+
+Set the METRICS_DIR environment variable to aggregate across processes
+(gunicorn workers, management commands, the scraper): each process then dumps
+its values to ``METRICS_DIR/metrics_<pid>.json`` from a background thread every
+FLUSH_INTERVAL seconds (only if they changed) and on exit, so recording a value
+never touches the disk. /metrics adds up the files of every process. Files of
+processes that have exited are folded into ``metrics_exited.json`` and removed,
+so their counters are kept without the directory growing with every restart.
+Without METRICS_DIR only the serving process's own values are reported.
+"""
+import atexit
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5.0  # Seconds between dumps of this process's values
+EXITED_FILE = 'metrics_exited.json'
+LOCK_TIMEOUT = 60  # Seconds after which a fold lock is considered abandoned
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+_lock = threading.RLock()
+_registry = {}  # name -> metric, in declaration order
+_dirty = False  # Values changed since the last flush
+_flusher_pid = None  # Process that started the flush thread (a forked worker needs its own)
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # label values tuple -> value
+        _registry[name] = self
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def merge(self, current, other):
+        """Combine the values of the same series from two processes."""
+        return current + other
+
+    def samples(self, key, value):
+        """(suffix, extra labels, value) lines of one series."""
+        yield '', (), value
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        with _lock:
+            key = self._key(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+        _changed()
+
+
+class Gauge(Metric):
+    """Last value set; across processes the most recently set value wins."""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with _lock:
+            self.values[self._key(labels)] = [value, time.time()]
+        _changed()
+
+    def merge(self, current, other):
+        return max(current, other, key=lambda value: value[1])
+
+    def samples(self, key, value):
+        yield '', (), value[0]
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        with _lock:
+            key = self._key(labels)
+            counts = self.values.setdefault(key, [0] * (len(self.buckets) + 3))  # buckets, +Inf, sum, count
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-3] += 1
+            counts[-2] += value
+            counts[-1] += 1
+        _changed()
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the ``with`` block in seconds."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def merge(self, current, other):
+        return [a + b for a, b in zip(current, other)]
+
+    def samples(self, key, value):
+        for bound, count in zip(self.buckets + (math.inf,), value):
+            yield '_bucket', (('le', _format_value(bound)),), count
+        yield '_sum', (), value[-2]
+        yield '_count', (), value[-1]
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _state():
+    """This process's values in a JSON-serialisable form."""
+    with _lock:
+        return {
+            name: [[list(key), value] for key, value in metric.values.items()]
+            for name, metric in _registry.items()
+        }
+
+
+def _metrics_dir():
+    return os.environ.get('METRICS_DIR')
+
+
+def _process_file(directory):
+    return os.path.join(directory, f'metrics_{os.getpid()}.json')
+
+
+def _write_json(path, data):
+    # Write then rename so readers never see a half-written file
+    with open(f'{path}.tmp', 'w') as file:
+        json.dump(data, file)
+    os.replace(f'{path}.tmp', path)
+
+
+def _read_json(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):  # Removed or unreadable; skip it
+        return None
+
+
+def flush():
+    """Write this process's values to METRICS_DIR (no-op when it is not set)."""
+    global _dirty
+    directory = _metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    with _lock:
+        _dirty = False
+        state = _state()
+    _write_json(_process_file(directory), state)
+
+
+def _changed():
+    """Mark this process's values as changed and start the flush thread if needed."""
+    global _dirty, _flusher_pid
+    with _lock:
+        _dirty = True
+        if _flusher_pid == os.getpid() or not _metrics_dir():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_periodically, name='metrics-flush', daemon=True).start()
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        if _dirty:
+            try:
+                flush()
+            except OSError:
+                logger.exception("Could not write metrics to METRICS_DIR")
+
+
+atexit.register(flush)
+
+
+def _pid_alive(pid):
+    """False if the process is known to have exited (only checked on POSIX)."""
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Alive, run by another user
+        pass
+    return True
+
+
+def _process_files(directory):
+    """pid -> file of every other process that dumped to ``directory``."""
+    files = {}
+    for path in glob.glob(os.path.join(directory, 'metrics_*.json')):
+        pid = os.path.basename(path)[len('metrics_'):-len('.json')]
+        if pid.isdigit() and int(pid) != os.getpid():
+            files[int(pid)] = path
+    return files
+
+
+def _merge(states):
+    """{name: {label values tuple: value}} adding up the series of ``states``."""
+    merged = {name: {} for name in _registry}
+    for state in states:
+        for name, series in state.items():
+            if name not in merged:  # Dropped since that process ran
+                continue
+            metric = _registry[name]
+            for key, value in series:
+                key = tuple(key)
+                merged[name][key] = metric.merge(merged[name][key], value) if key in merged[name] else value
+    return merged
+
+
+def _fold_exited(directory):
+    """
+    Add the files of exited processes to EXITED_FILE and remove them. The pids
+    folded are listed in EXITED_FILE until the next fold, so a reader that
+    still sees their files does not count them twice. Skipped while another
+    process holds the lock.
+    """
+    lock = os.path.join(directory, 'metrics.lock')
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+    except FileExistsError:
+        try:
+            if time.time() - os.path.getmtime(lock) > LOCK_TIMEOUT:
+                os.remove(lock)  # Left by a process that died while folding
+        except OSError:
+            pass
+        return
+    try:
+        exited_path = os.path.join(directory, EXITED_FILE)
+        exited = _read_json(exited_path) or {'pids': [], 'state': {}}
+        dead = {pid: path for pid, path in _process_files(directory).items() if not _pid_alive(pid)}
+        if not dead and not exited['pids']:
+            return
+        states = [exited['state']] + [state for state in map(_read_json, dead.values()) if state is not None]
+        _write_json(exited_path, {
+            'pids': list(dead),
+            'state': {
+                name: [[list(key), value] for key, value in series.items()]
+                for name, series in _merge(states).items() if series
+            },
+        })
+        for path in dead.values():
+            os.remove(path)
+    finally:
+        os.remove(lock)
+
+
+def _collect():
+    """States of this process and of every other process that dumped to METRICS_DIR."""
+    states = [_state()]
+    directory = _metrics_dir()
+    if directory and os.path.isdir(directory):
+        _fold_exited(directory)
+        others = {pid: _read_json(path) for pid, path in _process_files(directory).items()}
+        # Read after the process files: a file folded meanwhile is then listed in it
+        exited = _read_json(os.path.join(directory, EXITED_FILE))
+        if exited:
+            states.append(exited['state'])
+            others = {pid: state for pid, state in others.items() if pid not in exited['pids']}
+        states.extend(state for state in others.values() if state is not None)
+    return states
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    merged = _merge(_collect())
+    lines = []
+    for name, metric in _registry.items():
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.type}')
+        for key in sorted(merged[name]):
+            for suffix, extra_labels, value in metric.samples(key, merged[name][key]):
+                labels = ','.join(
+                    f'{label}="{_escape(label_value)}"'
+                    for label, label_value in list(zip(metric.labelnames, key)) + list(extra_labels)
+                )
+                lines.append(f'{name}{suffix}{{{labels}}} {_format_value(value)}' if labels
+                             else f'{name}{suffix} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Forget every value recorded by this process."""
+    with _lock:
+        for metric in _registry.values():
+            metric.values.clear()
+
+
+# Web
+http_request_duration_seconds = Histogram(
+    'classrooms_http_request_duration_seconds', 'Time to build a response, by view.', ['view']
+)
+http_requests_total = Counter(
+    'classrooms_http_requests_total', 'Responses sent, by view and status code.', ['view', 'status']
+)
+
+# load_schedule
+load_schedule_rows_total = Counter(
+    'classrooms_load_schedule_rows_total', 'CSV rows imported by load_schedule.', ['mode']
+)
+load_schedule_duration_seconds = Histogram(
+    'classrooms_load_schedule_duration_seconds', 'Duration of load_schedule runs.', ['mode']
+)
+load_schedule_rows_per_second = Gauge(
+    'classrooms_load_schedule_rows_per_second', 'Import throughput of the last load_schedule run.', ['mode']
+)
+
+# populate_availabilities
+populate_availabilities_duration_seconds = Histogram(
+    'classrooms_populate_availabilities_duration_seconds', 'Duration of availability rebuilds.'
+)
+populate_availabilities_rows_total = Counter(
+    'classrooms_populate_availabilities_rows_total', 'RoomAvailability rows written by rebuilds.'
+)
+
+# Scraper
+scraper_subjects_total = Counter(
+    'classrooms_scraper_subjects_total', 'Subjects searched by the scraper, by outcome.', ['college', 'outcome']
+)
+scraper_rows_total = Counter(
+    'classrooms_scraper_rows_total', 'Schedule rows extracted by the scraper.', ['college']
+)
+scraper_subject_duration_seconds = Histogram(
+    'classrooms_scraper_subject_duration_seconds', 'Time to search and extract one subject.'
+)
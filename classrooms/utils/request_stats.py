@@ -0,0 +1,47 @@
+"""
+Rolling per-view request statistics recorded by QueryTimingMiddleware.
+
+Each view keeps its last WINDOW requests (wall time, query count, DB time) in
+memory, so percentiles reflect recent traffic of this process only.
+"""
+import threading
+from collections import defaultdict, deque
+
+WINDOW = 1000
+PERCENTILES = (50, 90, 99)
+
+_lock = threading.Lock()
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))  # view name -> (total ms, queries, db ms)
+
+
+def record(view, total_ms, queries, db_ms):
+    """Add one request to the rolling window of ``view``."""
+    with _lock:
+        _samples[view].append((total_ms, queries, db_ms))
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    rank = max(-(-len(sorted_values) * p // 100), 1)  # ceil
+    return sorted_values[rank - 1]
+
+
+def summary():
+    """Percentiles of wall time, query count and DB time for every view seen."""
+    with _lock:
+        samples = {view: list(window) for view, window in _samples.items()}
+
+    stats = {}
+    for view, window in sorted(samples.items()):
+        columns = [sorted(values) for values in zip(*window)]
+        stats[view] = {'requests': len(window)}
+        for name, values in zip(('total_ms', 'queries', 'db_ms'), columns):
+            stats[view][name] = {f'p{p}': percentile(values, p) for p in PERCENTILES}
+            stats[view][name]['max'] = values[-1]
+    return stats
+
+
+def reset():
+    """Forget every recorded request."""
+    with _lock:
+        _samples.clear()
@@ -0,0 +1,139 @@
+"""
+Synthetic CUNY-style schedule and booking data for benchmarks and load testing.
+
+Rows use the same CSV columns and formats as the scraped schedule files read by
+load_schedule, and are generated lazily so large files can be streamed to disk.
+Sections never overlap within a room, like a real registrar schedule.
+"""
+import csv
+import random
+from datetime import date, time
+
+from django.db import transaction
+
+from classrooms.models import Room, RoomBooking
+from classrooms.utils.availability_cache import bump_data_version
+
+CSV_FIELDS = [
+    'college_name', 'term', 'subject', 'course_code', 'course_name', 'building', 'room',
+    'start_date', 'end_date', 'days', 'start_time', 'end_time',
+]
+WEEKDAY_CODES = ('Mo', 'Tu', 'We', 'Th', 'Fr')
+# Meeting pattern -> relative frequency
+MEETING_PATTERNS = {'MoWe': 35, 'TuTh': 35, 'MoWeFr': 15, 'Mo': 3, 'Tu': 3, 'We': 3, 'Th': 3, 'Fr': 3}
+WEEKLY_CLASS_MINUTES = 150  # MoWe meets 2 x 75 minutes, MoWeFr 3 x 50
+SPRING_2025 = (date(2025, 1, 27), date(2025, 5, 20))
+SUBJECTS = ['ACCT', 'BIO', 'CHEM', 'CSC', 'ECO', 'ENGL', 'HIST', 'MATH', 'PHIL', 'PHYS', 'PSY', 'SOC']
+DAY_START = 8 * 60  # Minutes since midnight
+DAY_END = 20 * 60
+
+
+def _format_time(minutes):
+    return time(minutes // 60, minutes % 60).strftime('%I:%M %p')
+
+
+def split_days(days):
+    """Split a meeting pattern such as 'MoWeFr' into day codes."""
+    return [days[i:i + 2] for i in range(0, len(days), 2)]
+
+
+def class_minutes(days):
+    """Length of one meeting, rounded down to 5 minutes, so every pattern has the same weekly hours."""
+    return WEEKLY_CLASS_MINUTES // len(split_days(days)) // 5 * 5
+
+
+def generate_schedule_rows(colleges=3, buildings=4, rooms=20, sections=10, term='2025 Spring',
+                           patterns=None, date_ranges=None, seed=0):
+    """
+    Yield schedule CSV rows (dicts keyed by CSV_FIELDS).
+
+    ``buildings`` is per college, ``rooms`` per building and ``sections`` per
+    room; sections that no longer fit before 8pm are dropped. ``patterns`` maps
+    meeting patterns to relative weights (default MEETING_PATTERNS) and each
+    section runs over one of ``date_ranges`` (default the Spring 2025 term).
+    """
+    rng = random.Random(seed)
+    patterns = patterns or MEETING_PATTERNS
+    pattern_days = {days: split_days(days) for days in patterns}
+    pattern_minutes = {days: class_minutes(days) for days in patterns}
+    date_ranges = [
+        (start_date.strftime('%m/%d/%Y'), end_date.strftime('%m/%d/%Y'))
+        for start_date, end_date in (date_ranges or [SPRING_2025])
+    ]
+
+    for c in range(1, colleges + 1):
+        college_name = f'Synthetic College {c}'
+        for b in range(1, buildings + 1):
+            building_name = f'Hall {b}'
+            for r in range(1, rooms + 1):
+                room_name = f'{b}-{r:03d}'
+                # First free minute of each weekday in this room
+                free_from = dict.fromkeys(WEEKDAY_CODES, DAY_START)
+                chosen = rng.choices(list(patterns), weights=list(patterns.values()), k=sections)
+                for days in chosen:
+                    day_list = pattern_days[days]
+                    start = max(free_from[day] for day in day_list) + rng.choice([0, 10, 15, 30, 60])
+                    end = start + pattern_minutes[days]
+                    if end > DAY_END:
+                        continue
+                    for day in day_list:
+                        free_from[day] = end
+
+                    subject = rng.choice(SUBJECTS)
+                    number = rng.randint(100, 499) * 100
+                    start_date, end_date = rng.choice(date_ranges)
+                    yield {
+                        'college_name': college_name,
+                        'term': term,
+                        'subject': subject,
+                        'course_code': f'{subject} {number}',
+                        'course_name': f'{subject} Course {number}',
+                        'building': building_name,
+                        'room': room_name,
+                        'start_date': start_date,
+                        'end_date': end_date,
+                        'days': days,
+                        'start_time': _format_time(start),
+                        'end_time': _format_time(end),
+                    }
+
+
+def write_schedule_csv(file, rows):
+    """Write schedule rows to an open text file one at a time; returns the row count."""
+    writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def create_bookings(user, day, count, seed=0, batch_size=5000):
+    """
+    Create up to ``count`` non-overlapping bookings of random rooms on ``day``.
+    Returns the number of bookings created.
+    """
+    rng = random.Random(seed)
+    rooms = list(Room.objects.values_list('id', 'college_id', 'building_id'))
+    if not rooms:
+        return 0
+
+    free_from = {}  # room id -> first free minute
+    bookings = []
+    for _ in range(count):
+        room_id, college_id, building_id = rng.choice(rooms)
+        start = free_from.get(room_id, DAY_START) + rng.choice([0, 5, 15, 30, 60, 120])
+        end = start + rng.choice([15, 30, 45, 60])
+        if end >= DAY_END:
+            continue
+        free_from[room_id] = end + 5  # Bookings are inclusive, leave a gap
+        bookings.append(RoomBooking(
+            user=user, room_id=room_id, college_id=college_id, building_id=building_id,
+            booking_date=day, start_time=time(start // 60, start % 60), end_time=time(end // 60, end % 60)
+        ))
+
+    with transaction.atomic():
+        RoomBooking.objects.bulk_create(bookings, batch_size=batch_size)
+        bump_data_version()  # bulk_create sends no post_save
+    return len(bookings)
@@ -0,0 +1,87 @@
+"""
+The time grid room availability is stored on, read from settings.
+
+    AVAILABILITY_BLOCK_MINUTES = 5            # 1, 5, 15, ... must divide the day
+    AVAILABILITY_DAY_START = '08:00'
+    AVAILABILITY_DAY_END = '20:00'            # '24:00' for midnight
+    AVAILABILITY_DAYS = ['Mo', 'Tu', 'We', 'Th', 'Fr']
+
+Finer blocks are more accurate but make every stored mask and free-until
+index larger (one bit and two bytes per block). The stored rows are only
+valid for the grid they were built with, so run populate_availabilities
+after changing any of these settings.
+"""
+from datetime import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+ALL_DAY_CODES = ('Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su')  # Position = date.weekday()
+
+
+def parse_clock(value):
+    """Minutes since midnight of an 'HH:MM' string (up to '24:00') or a datetime.time."""
+    if isinstance(value, time):
+        return value.hour * 60 + value.minute
+    try:
+        hours, minutes = (int(part) for part in str(value).split(':'))
+    except ValueError:
+        raise ImproperlyConfigured(f"Invalid time of day: {value!r}. Expected 'HH:MM'")
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or hours * 60 + minutes > 24 * 60:
+        raise ImproperlyConfigured(f"Invalid time of day: {value!r}")
+    return hours * 60 + minutes
+
+
+class TimeGrid:
+    """
+    Block size, opening hours and days of the availability grid.
+    ``day_start`` and ``day_end`` are minutes since midnight.
+    """
+
+    def __init__(self, block_minutes=5, day_start='08:00', day_end='20:00', days=ALL_DAY_CODES[:5]):
+        self.block_minutes = block_minutes
+        self.day_start = parse_clock(day_start)
+        self.day_end = parse_clock(day_end)
+        unknown = set(days) - set(ALL_DAY_CODES)
+        if unknown:
+            raise ImproperlyConfigured(f"Unknown day codes {sorted(unknown)}, expected some of {ALL_DAY_CODES}")
+        if not days:
+            raise ImproperlyConfigured("The availability grid needs at least one day")
+        if self.day_end <= self.day_start:
+            raise ImproperlyConfigured("The availability day must end after it starts")
+        if not isinstance(block_minutes, int) or block_minutes < 1 or (self.day_end - self.day_start) % block_minutes:
+            raise ImproperlyConfigured(
+                f"Block length {block_minutes!r} must be a whole number of minutes dividing the "
+                f"{self.day_end - self.day_start} minute day"
+            )
+
+        self.blocks_per_day = (self.day_end - self.day_start) // block_minutes
+        self.mask_bytes = (self.blocks_per_day + 7) // 8
+        self.day_codes = tuple(code for code in ALL_DAY_CODES if code in days)
+        self.weekdays = {code: ALL_DAY_CODES.index(code) for code in self.day_codes}  # code -> date.weekday()
+
+    def is_open(self, moment):
+        """True if the datetime ``moment`` falls on a grid day within opening hours."""
+        minutes = moment.hour * 60 + moment.minute
+        return moment.weekday() in self.weekdays.values() and self.day_start <= minutes < self.day_end
+
+    def __str__(self):
+        def clock(minutes):
+            return f'{minutes // 60}:{minutes % 60:02d}'
+        return f"{', '.join(self.day_codes)} {clock(self.day_start)} to {clock(self.day_end)}"
+
+
+GRID = TimeGrid(
+    block_minutes=getattr(settings, 'AVAILABILITY_BLOCK_MINUTES', 5),
+    day_start=getattr(settings, 'AVAILABILITY_DAY_START', '08:00'),
+    day_end=getattr(settings, 'AVAILABILITY_DAY_END', '20:00'),
+    days=getattr(settings, 'AVAILABILITY_DAYS', ALL_DAY_CODES[:5]),
+)
+
+BLOCK_MINUTES = GRID.block_minutes
+DAY_START = GRID.day_start  # Minutes since midnight
+DAY_END = GRID.day_end
+BLOCKS_PER_DAY = GRID.blocks_per_day
+MASK_BYTES = GRID.mask_bytes
+DAY_CODES = GRID.day_codes
+WEEKDAYS = GRID.weekdays
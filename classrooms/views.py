@@ -1,7 +1,9 @@
+import hashlib
 import sys
 from io import StringIO
 
 from django.contrib.sites.shortcuts import get_current_site
+from django.core.handlers.asgi import ASGIRequest
 from django.core.management import call_command
 from django.shortcuts import render, redirect
 from django.contrib import messages
@@ -11,25 +13,33 @@ from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.contrib.auth.views import PasswordChangeView
 from django.utils import timezone
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_http_methods, etag
 from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 
 from emptyClassroom.settings import DEFAULT_FROM_EMAIL
 from .forms import CunySignupForm
 from classrooms.models import College, Building, Room, RoomAvailability
-from classrooms.utils.empty_rooms import get_available_rooms, is_school_hours
+from classrooms.utils.empty_rooms import is_school_hours
+from classrooms.utils.availability_cache import data_version, get_cached_available_rooms
+from classrooms.utils.availability_events import availability_events
+from classrooms.utils.bookings import BookingConflictError, create_booking, get_room_day_bookings
 from classrooms.utils.all_rooms import get_all_rooms
+from classrooms.utils import metrics, request_stats
+from classrooms.utils.availability import BLOCKS_PER_DAY, block_for_time, lookup_free_until, time_for_block
+from classrooms.utils.time_grid import GRID
 
 from django.db.models import Q
 from classrooms.models import RoomBooking
 from classrooms.forms import RoomBookingForm
 
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.http import Http404
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 
 
 User = get_user_model()
@@ -52,7 +62,7 @@ def index(request):
 
     # Fetch available rooms only if it's during school hours
     if is_during_school_hours:
-        available_rooms = get_available_rooms(
+        available_rooms = get_cached_available_rooms(
             college=selected_college if selected_college else None,
             buildings=selected_buildings if selected_buildings else None
         )
@@ -323,6 +333,106 @@ def all_rooms(request):
         'selected_buildings': selected_buildings,
     })
 
+def request_data_version(request):
+    """data_version(), read once per request and shared by the ETag function and the view"""
+    if not hasattr(request, '_data_version'):
+        request._data_version = data_version()
+    return request._data_version
+
+
+def available_rooms_etag(request):
+    """Changes with the time block, the rooms/availability/bookings in the database and the filters"""
+    now = timezone.localtime(timezone.now())
+    version = request_data_version(request)
+    return hashlib.md5(
+        f"{request.get_full_path()}|{version}|{now.date().isoformat()}|{block_for_time(now.time())}".encode()
+    ).hexdigest()
+
+
+def all_rooms_etag(request):
+    """Changes with the rooms/availability in the database (e.g. after a schedule reload) and the filters"""
+    return hashlib.md5(f"{request.get_full_path()}|{request_data_version(request)}".encode()).hexdigest()
+
+
+@require_http_methods(["GET", "HEAD"])
+@cache_control(no_cache=True)
+@etag(available_rooms_etag)
+def api_available_rooms(request):
+    """JSON list of rooms free right now, for polling clients (mobile app, signage)"""
+    selected_college = request.GET.get('college', None)
+    selected_buildings = request.GET.getlist('buildings', None)
+
+    is_during_school_hours, message = is_school_hours()
+    if is_during_school_hours:
+        available_rooms = get_cached_available_rooms(
+            college=selected_college if selected_college else None,
+            buildings=selected_buildings if selected_buildings else None,
+            version=request_data_version(request)
+        )
+    else:
+        available_rooms = []
+
+    return JsonResponse(
+        {'rooms': available_rooms, 'message': message},
+        json_dumps_params={'separators': (',', ':')}
+    )
+
+
+@require_http_methods(["GET", "HEAD"])
+@cache_control(no_cache=True)
+@etag(all_rooms_etag)
+def api_all_rooms(request):
+    """JSON list of all rooms regardless of availability"""
+    selected_college = request.GET.get('college', None)
+    selected_buildings = request.GET.getlist('buildings', None)
+
+    all_rooms_list = get_all_rooms(
+        college=selected_college if selected_college else None,
+        buildings=selected_buildings if selected_buildings else None
+    )
+
+    return JsonResponse({'rooms': all_rooms_list}, json_dumps_params={'separators': (',', ':')})
+
+
+@require_http_methods(["GET"])
+async def availability_stream(request):
+    """
+    Server-Sent Events stream of rooms becoming free, occupied or booked.
+    Only served through emptyClassroom/asgi.py: a WSGI server (runserver, gunicorn)
+    reads the whole of an async streaming response before sending any of it, which
+    for this endless stream means never.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse('The availability stream requires an ASGI server.', status=501, content_type='text/plain')
+
+    selected_college = request.GET.get('college', None)
+    selected_buildings = request.GET.getlist('buildings', None)
+
+    response = StreamingHttpResponse(
+        availability_events(
+            college=selected_college if selected_college else None,
+            buildings=selected_buildings if selected_buildings else None
+        ),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+@require_http_methods(["GET"])
+def prometheus_metrics(request):
+    """Counters and histograms of every process in the Prometheus text format (see classrooms/utils/metrics.py)"""
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+@require_http_methods(["GET"])
+@staff_member_required
+def request_metrics(request):
+    """Rolling per-view latency and query percentiles of this process (see QueryTimingMiddleware)"""
+    return JsonResponse({'window': request_stats.WINDOW, 'views': request_stats.summary()})
+
+
 @require_http_methods(["GET"])
 def colleges(request):
     # Fetch all colleges
@@ -407,31 +517,23 @@ def room_details(request, college_name, building_name, room_name):
     # Initialize variables
     now = timezone.localtime(timezone.now())
     today = now.date()
+    day_bookings = None
     current_bookings = None
     is_available = None
     next_available_time = None
 
     # Get booking-related data only if user is authenticated
     if request.user.is_authenticated:
-        # Get current bookings for this room
-        current_bookings = RoomBooking.objects.filter(
-            room=room,
-            booking_date=today
-        ).order_by('start_time')
+        # Today's bookings of this room, listed on the page and used for every check below
+        day_bookings = get_room_day_bookings(room, today, with_bookings=True)
+        current_bookings = day_bookings.bookings
 
         # Check if room is currently available
-        is_available = True
-        for booking in current_bookings:
-            if booking.start_time <= now.time() <= booking.end_time:
-                is_available = False
-                break
+        is_available = not day_bookings.booked_at(now.time())
 
         # Get next available time
-        if not is_available and current_bookings:
-            for booking in current_bookings:
-                if booking.end_time > now.time():
-                    next_available_time = booking.end_time
-                    break
+        if not is_available:
+            next_available_time = day_bookings.next_free(now.time())
 
     # Check if it's during school hours
     is_during_school_hours, message = is_school_hours()
@@ -441,49 +543,31 @@ def room_details(request, college_name, building_name, room_name):
     if request.user.is_authenticated and is_during_school_hours:
         # Calculate next class start time
         next_class_time = None
-        weekday = now.weekday()
-        current_minute_block = (now.hour - 8) * 60 + now.minute
+        current_block = block_for_time(now.time())
 
         # Find the next time when the room is not available (next class)
-        next_occupied = RoomAvailability.objects.filter(
-            room=room,
-            weekday=weekday,
-            minute_block__gt=current_minute_block,
-            is_available=False
-        ).order_by('minute_block').first()
-
-        if next_occupied:
-            # Convert minute_block to time
-            next_hour = 8 + next_occupied.minute_block // 60
-            next_minute = next_occupied.minute_block % 60
-            next_class_time = timezone.datetime.strptime(f"{next_hour}:{next_minute}", "%H:%M").time()
+        availability = RoomAvailability.objects.on(today).filter(room=room).first()
+
+        if availability:
+            next_occupied = lookup_free_until(availability.free_until, current_block + 1)
+            if next_occupied is not None:
+                next_class_time = time_for_block(next_occupied)
 
         if request.method == 'POST':
-            form = RoomBookingForm(request.POST, next_class_time=next_class_time)
+            form = RoomBookingForm(request.POST, next_class_time=next_class_time, day_bookings=day_bookings)
             if form.is_valid():
-                # Check if room is already booked for this time
-                booking_date = form.cleaned_data['booking_date']
-                start_time = form.cleaned_data['start_time']
-                end_time = form.cleaned_data['end_time']
-
-                existing_bookings = RoomBooking.objects.filter(
-                    room=room,
-                    booking_date=booking_date,
-                ).filter(
-                    (Q(start_time__lte=start_time) & Q(end_time__gte=start_time)) |
-                    (Q(start_time__lte=end_time) & Q(end_time__gte=end_time)) |
-                    (Q(start_time__gte=start_time) & Q(end_time__lte=end_time))
-                )
-
-                if existing_bookings.exists():
+                booking = form.save(commit=False)
+                booking.user = request.user
+                booking.room = room
+                booking.college = college
+                booking.building = building
+
+                # Check if room is already booked for this time and save, under the room's lock
+                try:
+                    create_booking(booking)
+                except BookingConflictError:
                     messages.error(request, "This room is already booked for the selected time.")
                 else:
-                    booking = form.save(commit=False)
-                    booking.user = request.user
-                    booking.room = room
-                    booking.college = college
-                    booking.building = building
-                    booking.save()
                     messages.success(request, f"Room {room.name} booked successfully!")
                     return redirect('room_details', college_name=college_name, building_name=building_name,
                                     room_name=room_name)
@@ -494,7 +578,7 @@ def room_details(request, college_name, building_name, room_name):
 
             # Calculate end time (1 hour later or next class time, whichever is sooner)
             one_hour_later = (now + timezone.timedelta(hours=1)).time().replace(second=0, microsecond=0)
-            default_end_time = timezone.datetime.strptime("20:00", "%H:%M").time()
+            default_end_time = time_for_block(BLOCKS_PER_DAY)
 
             # Ensure end time is after start time
             if one_hour_later.hour < start_time.hour:  # Handle day boundary case
@@ -516,7 +600,7 @@ def room_details(request, college_name, building_name, room_name):
                 'start_time': start_time,
                 'end_time': end_time
             }
-            form = RoomBookingForm(initial=initial_data, next_class_time=next_class_time)
+            form = RoomBookingForm(initial=initial_data, next_class_time=next_class_time, day_bookings=day_bookings)
 
     return render(request, 'room_details.html', {
         'college': college,
@@ -530,6 +614,7 @@ def room_details(request, college_name, building_name, room_name):
             'booking_date', 'start_time') if request.user.is_authenticated else None,
         'is_during_school_hours': is_during_school_hours,
         'message': message,
+        'school_hours': GRID,
     })
 
 
@@ -48,6 +48,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'classrooms.middleware.MetricsMiddleware',  # First, so timings cover the other middleware
+    'classrooms.middleware.QueryTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +59,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Per-request wall time, query count and DB time (Server-Timing header and /metrics/requests/)
+REQUEST_METRICS = os.environ.get('REQUEST_METRICS', 'False') == 'True'
+
 ROOT_URLCONF = 'emptyClassroom.urls'
 
 TEMPLATES = [
@@ -85,10 +90,38 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Tests use a file like the real database: the in-memory test database fails concurrent
+        # writers with "table is locked" instead of waiting, as the booking lock relies on
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The index page caches the available rooms list until the next time grid block. Cache
+# keys include the DataVersion counter (one primary-key lookup per request), which bookings
+# and availability rebuilds bump, so a change made in any worker or a schedule reload
+# invalidates every worker's local cache; a shared backend is optional.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
 
+# Availability time grid (see classrooms/utils/time_grid.py)
+# Block length in minutes (1, 5, 15, ...), opening hours and days rooms are tracked on.
+# Stored availability is only valid for the grid it was built with: rerun
+# `python manage.py populate_availabilities` after changing any of these.
+
+AVAILABILITY_BLOCK_MINUTES = int(os.environ.get('AVAILABILITY_BLOCK_MINUTES', 5))
+AVAILABILITY_DAY_START = os.environ.get('AVAILABILITY_DAY_START', '08:00')
+AVAILABILITY_DAY_END = os.environ.get('AVAILABILITY_DAY_END', '20:00')
+AVAILABILITY_DAYS = os.environ.get('AVAILABILITY_DAYS', 'Mo,Tu,We,Th,Fr').split(',')
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 